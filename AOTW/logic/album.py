@@ -1,7 +1,21 @@
 from AOTW.logic.communications import GoogleCloudStorage
+from AOTW.logic.submission import Submission
+from AOTW.logic.date_helper import DateHelper
+from AOTW.logic import json_codec
 
 
 class Album:
+    __slots__ = (
+        "album",
+        "artist",
+        "spotify_link",
+        "playlist_updated",
+        "week",
+        "submission_id",
+        "submitted_at",
+        "chooser",
+    )
+
     def __init__(
         self,
         album: str,
@@ -9,17 +23,60 @@ class Album:
         spotify_link: str = None,
         playlist_updated: bool = None,
         week: int = None,
-        **kwargs,
+        submission_id: str = None,
+        submitted_at: str = None,
+        chooser: str = None,
     ):
         self.album = album
         self.artist = artist
         self.spotify_link = spotify_link
         self.playlist_updated = playlist_updated
         self.week = week
+        self.submission_id = submission_id
+        self.submitted_at = submitted_at
+        self.chooser = chooser
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """
+        Builds an Album from a logged AOTW record, validating the schema.
+
+        Fields that are not part of the album record are ignored.
 
-        # Set additional attributes from kwargs
-        for key, value in kwargs.items():
-            setattr(self, key, value)
+        Raises:
+            ValueError: If album or artist is missing, or a field has the wrong type.
+        """
+
+        for field in ("album", "artist"):
+            if not isinstance(data.get(field), str):
+                raise ValueError(f"Invalid album, bad or missing '{field}': {data}")
+        week = data.get("week")
+        if week is not None and not isinstance(week, int):
+            raise ValueError(f"Invalid album week: {week}")
+        playlist_updated = data.get("playlist_updated")
+        if playlist_updated is not None and not isinstance(playlist_updated, bool):
+            raise ValueError(f"Invalid album playlist_updated: {playlist_updated}")
+        return cls(
+            album=data["album"],
+            artist=data["artist"],
+            spotify_link=data.get("spotify_link"),
+            playlist_updated=playlist_updated,
+            week=week,
+            submission_id=data.get("submission_id"),
+            submitted_at=data.get("submitted_at"),
+            chooser=data.get("chooser"),
+        )
+
+    @classmethod
+    def from_submission(cls, submission: Submission, week: int = None):
+        return cls(
+            album=submission.album,
+            artist=submission.artist,
+            week=week,
+            submission_id=submission.submission_id,
+            submitted_at=DateHelper.format_timestamp(submission.timestamp),
+            chooser=submission.user_email,
+        )
 
     def _update_playlist(self):
         self.playlist_updated = True
@@ -27,23 +84,71 @@ class Album:
     def _set_week(self, week: int):
         self.week = week
 
+    def to_dict(self):
+        return {
+            "week": self.week,
+            "album": self.album,
+            "artist": self.artist,
+            "spotify_link": self.spotify_link,
+            "playlist_updated": self.playlist_updated,
+            "submission_id": self.submission_id,
+            "submitted_at": self.submitted_at,
+            "chooser": self.chooser,
+        }
+
+    def to_json(self):
+        return json_codec.dumps(self.to_dict())
+
+    def _is_older_pick_than(self, other):
+        if self.submitted_at is None or other.submitted_at is None:
+            return False
+        return DateHelper.parse_timestamp(
+            self.submitted_at
+        ) < DateHelper.parse_timestamp(other.submitted_at)
+
+    def merge(self, logged):
+        """
+        Returns the record to store when logged is the record another run already stored.
+
+        A later pick for the same week wins. For the same pick, progress such as the
+        playlist update is kept from both records.
+        """
+
+        if logged is None or logged.week != self.week:
+            return self
+        if logged.submission_id == self.submission_id:
+            self.playlist_updated = self.playlist_updated or logged.playlist_updated
+            self.spotify_link = self.spotify_link or logged.spotify_link
+            return self
+        if self._is_older_pick_than(logged):
+            return logged
+        return self
+
     def log_data(self, filepath):
         """
         Writes the AOTW data to a JSON file in Google Cloud Storage.
 
+        The write is conditional on the file not having changed since it was read, and is
+        merged with the stored record if a concurrent run updated it.
+
         Args:
-            gcs_client: An instance of the GoogleCloudStorage class.
+            filepath: The blob name to write to.
+
+        Returns:
+            The Album that was stored.
         """
 
-        data = {
-            "week": self.week,
-            "album": self.album,
-            "artist": self.artist,
-            "spotify_link": self.spotify_link,
-            "playlist_updated": self.playlist_updated,
-        }
+        stored = []
+
+        def merge(logged_data):
+            logged = Album.from_dict(logged_data) if logged_data else None
+            album = self.merge(logged)
+            stored[:] = [album]
+            return album.to_dict()
+
         gcs_client = GoogleCloudStorage()
-        gcs_client.write_to_json(data, filepath)
+        gcs_client.update_json(filepath, merge)
+        return stored[0]
 
     def __str__(self):
         return f"Album: {self.album}\nArtist: {self.artist}"
@@ -1,4 +1,3 @@
-import datetime
 import pytz
 
 from AOTW.logic.date_helper import DateHelper
@@ -7,6 +6,9 @@ from AOTW.logic.group import Group
 from AOTW.logic.email_manager import EmailManager
 from AOTW.logic.playlist_manager import PlaylistManager
 from AOTW.logic.form_manager import FormManager
+from AOTW.logic.prefetch_manager import PrefetchManager
+from AOTW.logic.stats_manager import StatsManager
+from AOTW.logic.schedule import DayPlan, ScheduleCompiler
 from AOTW.logic.config import Config
 from AOTW.logic.communications import GoogleCloudStorage
 
@@ -20,12 +22,16 @@ class AOTWManager:
         email_manager: EmailManager = None,
         playlist_manager: PlaylistManager = None,
         form_manager: FormManager = None,
+        prefetch_manager: PrefetchManager = None,
+        stats_manager: StatsManager = None,
     ):
         self.group = group
         self.date_helper = date_helper
         self.email_manager = email_manager
         self.playlist_manager = playlist_manager
         self.form_manager = form_manager
+        self.prefetch_manager = prefetch_manager
+        self.stats_manager = stats_manager
         self.config = config
         self.chooser = self._get_current_chooser()
         self.today_as_int = self.date_helper.get_current_weekday()
@@ -49,51 +55,112 @@ class AOTWManager:
     def _read_aotw_from_log(self):
         blob_name = self.config.album_log_filepath
         gcs_client = GoogleCloudStorage()
-        json_data = gcs_client.read_json(blob_name)
+        # Validated by generation on every read, since the album file changes during a run
+        json_data = gcs_client.read_json(blob_name, cache_ttl=0)
         if json_data is not None:
-            return Album(**json_data)
+            return Album.from_dict(json_data)
         else:
             return None
 
     def create_aotw_weekly_file(self):
-        blob_name = f"form_submissions/submissions.json"
-        gcs_client = GoogleCloudStorage()
-        submission_data = gcs_client.read_json(blob_name)
-
-        filtered_data = [
-            entry
-            for entry in submission_data
-            if entry["user_email"] == self.chooser.email
-        ]
-        filtered_data = [
-            entry
-            for entry in filtered_data
-            if datetime.datetime.fromisoformat(
-                entry["timestamp"].replace("Z", "+00:00")
-            )
-            >= self.date_helper.get_start_of_aotw(self.aotw_day_as_int).replace(
-                tzinfo=pytz.UTC
-            )
-            and datetime.datetime.fromisoformat(
-                entry["timestamp"].replace("Z", "+00:00")
-            )
-            <= self.date_helper.get_end_of_aotw(self.aotw_day_as_int).replace(
-                tzinfo=pytz.UTC
+        start_of_aotw = self.date_helper.get_start_of_aotw(
+            self.aotw_day_as_int
+        ).replace(tzinfo=pytz.UTC)
+        end_of_aotw = self.date_helper.get_end_of_aotw(self.aotw_day_as_int).replace(
+            tzinfo=pytz.UTC
+        )
+
+        # The log is stored most recent first, so the first match is the latest pick
+        latest_submission = next(
+            self.form_manager.iter_logged_submissions(
+                user_email=self.chooser.email,
+                min_timestamp=start_of_aotw,
+                max_timestamp=end_of_aotw,
+            ),
+            None,
+        )
+
+        if latest_submission is not None:
+            aotw = Album.from_submission(
+                latest_submission,
+                week=self.date_helper.get_current_week(self.aotw_day_as_int),
             )
-        ]
+            logged_aotw = self._read_aotw_from_log()
+            if logged_aotw is not None and (
+                logged_aotw.album,
+                logged_aotw.artist,
+                logged_aotw.week,
+            ) == (aotw.album, aotw.artist, aotw.week):
+                if logged_aotw.submission_id == aotw.submission_id:
+                    print("AOTW file is already up-to-date")
+                    return logged_aotw
+                # Same pick submitted again, the playlist does not need redoing
+                aotw.playlist_updated = logged_aotw.playlist_updated
+                aotw.spotify_link = logged_aotw.spotify_link
+            return self._log_aotw(aotw)
+
+    def _log_aotw(self, aotw: Album):
+        """Logs the weekly album file and adds the week to the listening stats."""
+        stored = aotw.log_data(self.config.album_log_filepath)
+        if self.stats_manager is not None:
+            try:
+                self.stats_manager.record(stored)
+            except Exception as e:
+                print(f"Could not update listening stats: {e}")
+        return stored
+
+    def prefetch_aotw(self, aotw: Album = None):
+        """
+        Stages the Spotify lookup and starts the fun facts for the current pick ahead of AOTW day.
+
+        Failures are logged rather than raised; the AOTW day run redoes the work if needed.
+        """
+
+        if self.prefetch_manager is None:
+            return None
+        aotw = aotw or self._read_aotw_from_log()
+        if aotw is None or aotw.submission_id is None:
+            return None
+        try:
+            return self.prefetch_manager.prefetch(aotw)
+        except Exception as e:
+            print(f"Prefetch failed, it will be done on AOTW day instead: {e}")
+            return None
+
+    def _get_staged(self, aotw: Album):
+        if self.prefetch_manager is None:
+            return None
+        return self.prefetch_manager.get_staged(aotw)
+
+    def ingest_submissions(self, update_playlist=False):
+        """
+        Logs only the new form responses and refreshes the weekly album file if the chooser submitted.
 
-        # Sort by timestamp in descending order (most recent first)
-        filtered_data.sort(key=lambda entry: entry["timestamp"], reverse=True)
+        Args:
+            update_playlist: Whether to update the playlist straight away with the new pick.
 
-        # Return the first element (most recent) if any
-        if filtered_data:
-            relevant_submission = filtered_data[0]
-            aotw = Album(**relevant_submission)
-            aotw._set_week(self.date_helper.get_current_week(self.aotw_day_as_int))
-            aotw.log_data(self.config.album_log_filepath)
+        Returns:
+            A list of the newly logged Submission records.
+        """
 
-    def retrieve_and_log_form_submissions(self):
-        return self.form_manager.retrieve_and_log_submissions()
+        new_submissions = self.form_manager.ingest_new_submissions()
+        if any(
+            submission.user_email == self.chooser.email
+            for submission in new_submissions
+        ):
+            print(f"New pick from {self.chooser.name}, updating AOTW file")
+            aotw = self.create_aotw_weekly_file()
+            self.prefetch_aotw(aotw)
+            if update_playlist:
+                self.update_playlist()
+        return new_submissions
+
+    def renew_submission_watch(self):
+        return self.form_manager.renew_submission_watch()
+
+    def catch_up_submissions(self):
+        """Logs the form responses that push ingestion has not logged yet, if any."""
+        return self.form_manager.ingest_new_submissions()
 
     def update_playlist(self):
         aotw = self._read_aotw_from_log()
@@ -102,14 +169,29 @@ class AOTWManager:
                 print("Spotify playlist is already up-to-date")
             else:
                 print("Updating spotify playlist...")
-                self.playlist_manager.update_playlist(aotw)
+                resolved = self.playlist_manager.update_playlist(
+                    aotw, staged=self._get_staged(aotw)
+                )
+                self._update_archive_playlist(aotw, resolved)
                 aotw.playlist_updated = True
-                aotw.log_data(self.config.album_log_filepath)
+                self._log_aotw(aotw)
                 print("Playlist updated")
         else:
             print("Cannot update playlist because there is currently no AOTW!")
             print(f"Tell {self.chooser.name} to get on it!")
 
+    def _update_archive_playlist(self, aotw: Album, resolved: dict):
+        try:
+            self.playlist_manager.update_archive_playlist(aotw, staged=resolved)
+        except Exception as e:
+            print(f"Could not update the archive playlist: {e}")
+
+    def start_fun_facts(self):
+        """Starts generating the announcement's fun facts early, unless they are already stored."""
+        aotw = self._read_aotw_from_log()
+        if aotw is not None:
+            self.email_manager.start_fun_facts(album=aotw.album, artist=aotw.artist)
+
     def send_chosen_email(self):
         aotw = self._read_aotw_from_log()
         if aotw is not None:
@@ -117,19 +199,41 @@ class AOTWManager:
             self.email_manager.send_aotw_chosen_email(album=aotw.album, artist=aotw.artist)
             print(f"Sent")
 
-    def send_daily_email(self):
-        if self.today_as_int == self.aotw_day_as_int:
+    def _get_stats(self):
+        if self.stats_manager is None:
+            return None
+        try:
+            return self.stats_manager.get_stats()
+        except Exception as e:
+            print(f"Could not read listening stats: {e}")
+            return None
+
+    def send_daily_email(self, plan: DayPlan = None):
+        """
+        Sends the AOTW or reminder email due today.
+
+        Args:
+            plan: Optional plan compiled ahead of time by ScheduleCompiler. It is worked
+                out from the config when missing or made for a different weekday.
+        """
+
+        if plan is None or plan.weekday != self.today_as_int:
+            if plan is not None:
+                print(f"Ignoring plan for {plan}, today is weekday {self.today_as_int}")
+            plan = ScheduleCompiler(
+                self.aotw_day_as_int, self.reminder_days_as_ints
+            ).plan_for_weekday(self.today_as_int)
+
+        if plan is None:
+            print("No email to send today")
+        elif plan.kind == DayPlan.AOTW:
             print("Sending AOTW email")
-            self.email_manager.send_aotw_email(self.chooser.name)
+            stats = self._get_stats() if self.config.email_stats else None
+            self.email_manager.send_aotw_email(self.chooser.name, stats=stats)
             print("Sent")
-        elif self.today_as_int in self.reminder_days_as_ints:
+        else:
             if self._read_aotw_from_log() is None:
                 return print("Cannot send reminder because AOTW was not picked")
             print("Sending reminder email")
-            days_left = DateHelper.days_between_weekday_ints(
-                self.today_as_int, self.aotw_day_as_int
-            )
-            self.email_manager.send_reminder_email(days_left=days_left)
+            self.email_manager.send_reminder_email(days_left=plan.days_left)
             print("Sent")
-        else:
-            print("No email to send today")
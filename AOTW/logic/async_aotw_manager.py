@@ -0,0 +1,75 @@
+import asyncio
+import functools
+
+from AOTW.logic.aotw_manager import AOTWManager
+from AOTW.logic.async_communications import executor
+from AOTW.logic.communications import LazyClient
+from AOTW.logic.schedule import DayPlan
+
+
+class AsyncAOTWManager:
+    """
+    Coroutine versions of the AOTWManager steps, for callers running an event loop.
+
+    Each step runs the synchronous step, blocking I/O included, on the shared async thread
+    pool, so independent steps can be awaited together with asyncio.gather. The steps are
+    thread-backed, like the async facades, and make no native async requests.
+    """
+
+    def __init__(self, manager: AOTWManager):
+        self.manager = manager
+
+    async def _step(self, step, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor, functools.partial(step, *args, **kwargs)
+        )
+
+    async def build_form_client(self):
+        """Builds the Forms client up front, so steps awaited together share one client."""
+        form_handler = self.manager.form_manager.form_handler
+        if isinstance(form_handler, LazyClient):
+            await self._step(form_handler.get)
+
+    async def catch_up_submissions(self):
+        return await self._step(self.manager.catch_up_submissions)
+
+    async def renew_submission_watch(self):
+        return await self._step(self.manager.renew_submission_watch)
+
+    async def create_aotw_weekly_file(self):
+        return await self._step(self.manager.create_aotw_weekly_file)
+
+    async def prefetch_aotw(self, aotw=None):
+        return await self._step(self.manager.prefetch_aotw, aotw)
+
+    async def ingest_submissions(self, update_playlist=False):
+        return await self._step(
+            self.manager.ingest_submissions, update_playlist=update_playlist
+        )
+
+    async def start_fun_facts(self):
+        return await self._step(self.manager.start_fun_facts)
+
+    async def update_playlist(self):
+        return await self._step(self.manager.update_playlist)
+
+    async def send_chosen_email(self):
+        return await self._step(self.manager.send_chosen_email)
+
+    async def send_daily_email(self, plan: DayPlan = None):
+        return await self._step(self.manager.send_daily_email, plan=plan)
+
+    async def finish_pending(self):
+        return await self._step(self.manager.email_manager.finish_pending)
+
+    async def set_aotw(self):
+        """Runs the set_aotw steps, overlapping the ones that do not depend on each other."""
+        await self.build_form_client()
+        await asyncio.gather(self.catch_up_submissions(), self.renew_submission_watch())
+        aotw = await self.create_aotw_weekly_file()
+        await self.prefetch_aotw(aotw)
+        await self.start_fun_facts()
+        await self.update_playlist()
+        await self.send_chosen_email()
+        await self.finish_pending()
@@ -0,0 +1,214 @@
+"""asyncio facades for the backend clients in communications.py.
+
+The GCS, Gmail, Forms and Spotify facades are thread-backed: each has the same method
+names as its synchronous client, as coroutines that run the blocking synchronous method
+(with its resilience policy) on a shared thread pool. Every request in flight still
+occupies a worker thread, so concurrency is bounded by the pool and by a per-backend
+semaphore, not by the event loop. They let event-loop callers overlap requests without
+blocking the loop; they do not make the underlying clients non-blocking, as those
+libraries have no async transport.
+
+Only OpenAI is called natively, through AsyncOpenAI, under the same resilience policy as
+the synchronous client.
+"""
+
+import asyncio
+import functools
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from openai import AsyncOpenAI
+
+from AOTW.logic import resilience
+from AOTW.logic.communications import (
+    FormAPI,
+    GmailAPI,
+    GoogleCloudStorage,
+    LazyClient,
+    OpenAIAPI,
+    SpotifyAPI,
+)
+
+# Requests allowed in flight at once, per backend
+CONCURRENCY_LIMITS = {
+    "gcs": 32,
+    "gmail": 8,
+    "forms": 8,
+    "spotify": 8,
+    "openai": 4,
+}
+
+executor = ThreadPoolExecutor(
+    max_workers=sum(CONCURRENCY_LIMITS.values()), thread_name_prefix="aotw-async"
+)
+
+# Semaphores and AsyncOpenAI clients belong to an event loop, so they are kept per loop
+_loop_state = weakref.WeakKeyDictionary()
+
+
+def _get_loop_state():
+    loop = asyncio.get_running_loop()
+    if loop not in _loop_state:
+        _loop_state[loop] = {
+            "semaphores": {
+                backend: asyncio.Semaphore(limit)
+                for backend, limit in CONCURRENCY_LIMITS.items()
+            },
+            "openai_client": None,
+        }
+    return _loop_state[loop]
+
+
+def semaphore(backend):
+    return _get_loop_state()["semaphores"][backend]
+
+
+async def run_in_thread(backend, func, *args, **kwargs):
+    """Runs a blocking call on the shared pool, within the backend's concurrency limit."""
+    async with semaphore(backend):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor, functools.partial(func, *args, **kwargs)
+        )
+
+
+class AsyncClient:
+    """
+    Base for the thread-backed facades: exposes every method of the synchronous client as a
+    coroutine that runs it on the shared thread pool.
+
+    The synchronous client is built lazily, in a worker thread, on the first call.
+    """
+
+    backend = None
+
+    def __init__(self, factory):
+        self._client = LazyClient(factory)
+
+    async def get(self):
+        if not self._client.is_built:
+            await run_in_thread(self.backend, self._client.get)
+        return self._client.get()
+
+    def __getattr__(self, name):
+        async def call(*args, **kwargs):
+            client = await self.get()
+            return await run_in_thread(
+                self.backend, getattr(client, name), *args, **kwargs
+            )
+
+        call.__name__ = name
+        return call
+
+    async def _iterate(self, method, *args, batch_size=256, **kwargs):
+        """Iterates a synchronous generator method, fetching batch_size items per thread hop."""
+        client = await self.get()
+        iterator = await run_in_thread(
+            self.backend, lambda: iter(getattr(client, method)(*args, **kwargs))
+        )
+
+        def next_batch():
+            batch = []
+            for item in iterator:
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    break
+            return batch
+
+        while True:
+            batch = await run_in_thread(self.backend, next_batch)
+            for item in batch:
+                yield item
+            if len(batch) < batch_size:
+                return
+
+
+class AsyncGoogleCloudStorage(AsyncClient):
+    backend = "gcs"
+
+    def __init__(self):
+        super().__init__(GoogleCloudStorage)
+
+    def iter_json_records(self, blob_name, predicate=None, stop_when=None):
+        return self._iterate(
+            "iter_json_records", blob_name, predicate=predicate, stop_when=stop_when
+        )
+
+
+class AsyncGmailAPI(AsyncClient):
+    backend = "gmail"
+
+    def __init__(self, sender_email):
+        super().__init__(lambda: GmailAPI(sender_email))
+
+
+class AsyncFormAPI(AsyncClient):
+    backend = "forms"
+
+    def __init__(self):
+        super().__init__(FormAPI)
+
+
+class AsyncSpotifyAPI(AsyncClient):
+    backend = "spotify"
+
+    def __init__(self, local_credentials: dict):
+        super().__init__(lambda: SpotifyAPI(local_credentials))
+
+
+class AsyncOpenAIAPI:
+    """The async counterpart of OpenAIAPI, using AsyncOpenAI directly."""
+
+    backend = "openai"
+
+    def __init__(self, api_key):
+        self.api_key = api_key
+
+    @property
+    def client(self):
+        state = _get_loop_state()
+        if state["openai_client"] is None:
+            # Retries are handled by the resilience policy
+            state["openai_client"] = AsyncOpenAI(
+                api_key=self.api_key, timeout=60, max_retries=0
+            )
+        return state["openai_client"]
+
+    def _messages(prompt):
+        return [
+            {"role": "system", "content": OpenAIAPI.default_context},
+            {"role": "user", "content": prompt},
+        ]
+
+    async def send_prompt(self, prompt):
+        """
+        Sends a prompt to the OpenAI API and returns the generated text.
+
+        Raises:
+            resilience.DeadlineExceeded: If the openai deadline passes first.
+        """
+
+        async with semaphore(self.backend):
+            response = await resilience.call_async(
+                self.backend,
+                lambda: self.client.chat.completions.create(
+                    model=OpenAIAPI.default_model,
+                    messages=AsyncOpenAIAPI._messages(prompt),
+                ),
+            )
+        return response.choices[0].message.content.strip()
+
+    async def stream_prompt(self, prompt):
+        """Sends a prompt to the OpenAI API and yields the generated text as it arrives."""
+        async with semaphore(self.backend):
+            stream = await resilience.call_async(
+                self.backend,
+                lambda: self.client.chat.completions.create(
+                    model=OpenAIAPI.default_model,
+                    messages=AsyncOpenAIAPI._messages(prompt),
+                    stream=True,
+                ),
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
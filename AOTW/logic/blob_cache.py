@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import OrderedDict
+
+
+class CacheEntry:
+    __slots__ = ("generation", "data", "validated_at")
+
+    def __init__(self, generation, data, validated_at):
+        self.generation = generation
+        self.data = data
+        self.validated_at = validated_at
+
+
+class BlobCache:
+    """
+    A two tier (memory, then local disk) cache of GCS blob contents.
+
+    Entries are keyed by blob name and remember the generation they were read at, so a
+    cached copy can be revalidated with a metadata request instead of a download. The disk
+    tier lives in /tmp, which on Cloud Functions survives across warm invocations. /tmp is
+    backed by the instance's memory, so both tiers have a byte budget and evict the least
+    recently used entries first.
+    """
+
+    CACHE_DIR = os.environ.get(
+        "AOTW_CACHE_DIR", os.path.join(tempfile.gettempdir(), "aotw_blob_cache")
+    )
+    MAX_MEMORY_BYTES = 32 * 1024 * 1024
+    MAX_DISK_BYTES = 128 * 1024 * 1024
+    MAX_ENTRY_BYTES = 4 * 1024 * 1024
+
+    memory = OrderedDict()
+    memory_bytes = 0
+    # Bytes of cached data on disk, or None until the cache directory is first scanned
+    disk_bytes = None
+
+    def _path(blob_name):
+        digest = hashlib.sha1(blob_name.encode("utf-8")).hexdigest()
+        return os.path.join(BlobCache.CACHE_DIR, digest)
+
+    def get(blob_name):
+        """Returns the cached CacheEntry for a blob, or None."""
+        entry = BlobCache.memory.get(blob_name)
+        if entry is not None:
+            BlobCache.memory.move_to_end(blob_name)
+            return entry
+        entry = BlobCache._read_disk(blob_name)
+        if entry is not None:
+            BlobCache._remember(blob_name, entry)
+        return entry
+
+    def put(blob_name, generation, data):
+        if generation is None or len(data) > BlobCache.MAX_ENTRY_BYTES:
+            BlobCache.invalidate(blob_name)
+            return
+        entry = CacheEntry(int(generation), data, time.time())
+        BlobCache._remember(blob_name, entry)
+        BlobCache._write_disk(blob_name, entry)
+
+    def refresh(blob_name, generation, data):
+        """Replaces a cached entry after a write. Blobs that are not cached are left out."""
+        if blob_name in BlobCache.memory or os.path.exists(
+            BlobCache._path(blob_name) + ".json"
+        ):
+            BlobCache.put(blob_name, generation, data)
+
+    def touch(blob_name):
+        """Marks a cached entry as just validated against GCS."""
+        entry = BlobCache.get(blob_name)
+        if entry is not None:
+            entry.validated_at = time.time()
+            BlobCache._write_disk(blob_name, entry, data=False)
+
+    def invalidate(blob_name):
+        entry = BlobCache.memory.pop(blob_name, None)
+        if entry is not None:
+            BlobCache.memory_bytes -= len(entry.data)
+        BlobCache._remove_disk(BlobCache._path(blob_name))
+
+    def _remember(blob_name, entry):
+        previous = BlobCache.memory.pop(blob_name, None)
+        if previous is not None:
+            BlobCache.memory_bytes -= len(previous.data)
+        BlobCache.memory[blob_name] = entry
+        BlobCache.memory_bytes += len(entry.data)
+        while BlobCache.memory_bytes > BlobCache.MAX_MEMORY_BYTES:
+            _, evicted = BlobCache.memory.popitem(last=False)
+            BlobCache.memory_bytes -= len(evicted.data)
+
+    def _read_disk(blob_name):
+        path = BlobCache._path(blob_name)
+        try:
+            with open(path + ".json", "r") as f:
+                meta = json.load(f)
+            if meta["blob_name"] != blob_name:
+                return None
+            with open(path + ".bin", "rb") as f:
+                data = f.read()
+            # The modification time orders disk entries for eviction
+            os.utime(path + ".bin")
+        except (OSError, ValueError, KeyError):
+            return None
+        return CacheEntry(meta["generation"], data, meta["validated_at"])
+
+    def _write_disk(blob_name, entry, data=True):
+        """Best effort; the cache still works from memory if /tmp is unavailable."""
+        path = BlobCache._path(blob_name)
+        meta = {
+            "blob_name": blob_name,
+            "generation": entry.generation,
+            "validated_at": entry.validated_at,
+        }
+        try:
+            os.makedirs(BlobCache.CACHE_DIR, exist_ok=True)
+            if data:
+                # Drop the old metadata first so a partial write is never read as valid
+                if os.path.exists(path + ".json"):
+                    os.remove(path + ".json")
+                previous_bytes = BlobCache._disk_size(path)
+                with open(path + ".bin.tmp", "wb") as f:
+                    f.write(entry.data)
+                os.replace(path + ".bin.tmp", path + ".bin")
+            with open(path + ".json.tmp", "w") as f:
+                json.dump(meta, f)
+            os.replace(path + ".json.tmp", path + ".json")
+        except OSError as e:
+            print(f"Could not write blob cache to disk: {e}")
+            return
+        if data:
+            if BlobCache.disk_bytes is None:
+                BlobCache._evict_disk()
+            else:
+                BlobCache.disk_bytes += len(entry.data) - previous_bytes
+                if BlobCache.disk_bytes > BlobCache.MAX_DISK_BYTES:
+                    BlobCache._evict_disk()
+
+    def _disk_size(path):
+        try:
+            return os.path.getsize(path + ".bin")
+        except OSError:
+            return 0
+
+    def _remove_disk(path):
+        removed_bytes = BlobCache._disk_size(path)
+        for suffix in (".json", ".bin"):
+            try:
+                os.remove(path + suffix)
+            except OSError:
+                pass
+        if BlobCache.disk_bytes is not None:
+            BlobCache.disk_bytes = max(BlobCache.disk_bytes - removed_bytes, 0)
+
+    def _evict_disk():
+        """Rescans the disk tier and removes its least recently used entries over budget."""
+        entries = []
+        try:
+            with os.scandir(BlobCache.CACHE_DIR) as scan:
+                for item in scan:
+                    if item.name.endswith(".bin"):
+                        stat = item.stat()
+                        entries.append((stat.st_mtime, stat.st_size, item.path[:-4]))
+        except OSError:
+            return
+        BlobCache.disk_bytes = sum(size for _, size, _ in entries)
+        for _, _, path in sorted(entries):
+            if BlobCache.disk_bytes <= BlobCache.MAX_DISK_BYTES:
+                break
+            BlobCache._remove_disk(path)
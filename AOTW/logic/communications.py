@@ -1,17 +1,23 @@
 import base64
+import gzip
+import io
 import os
+import random
+import time
 import json
-import datetime
 
+import httplib2
+import requests
 from google.auth import default
 from google.oauth2 import service_account
-from google.auth.transport.requests import Request
+from google.auth.transport.requests import AuthorizedSession, Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.errors import HttpError
 from googleapiclient.discovery import build
 from google.cloud import secretmanager_v1 as secrets
 from google.auth.exceptions import DefaultCredentialsError
+from google.api_core.exceptions import NotFound, PreconditionFailed
 from spotipy.oauth2 import SpotifyOAuth
 from spotipy import Spotify
 from spotipy.exceptions import SpotifyException
@@ -19,15 +25,145 @@ from google.cloud import storage
 from openai import OpenAI
 from email.mime.text import MIMEText
 
+from AOTW.logic.submission import Submission
+from AOTW.logic import resilience
+from AOTW.logic.blob_cache import BlobCache
+from AOTW.logic.date_helper import DateHelper
+from AOTW.logic import json_codec
+
+
+class HttpTransport:
+    """
+    A process-wide keep-alive HTTP connection pool shared by every Google API client.
+
+    Storage, Secret Manager, token refreshes and the discovery based clients (Gmail, Forms)
+    all send their requests through the same pooled adapter, so connections to Google hosts
+    are reused within a run and across warm invocations.
+    """
+
+    CONNECT_TIMEOUT = 5
+    READ_TIMEOUT = 30
+    POOL_SIZE = 32
+
+    adapter = None
+    session = None
+    authorized_sessions = {}
+
+    def timeout():
+        return (HttpTransport.CONNECT_TIMEOUT, HttpTransport.READ_TIMEOUT)
+
+    def get_adapter():
+        if not HttpTransport.adapter:
+            HttpTransport.adapter = requests.adapters.HTTPAdapter(
+                pool_connections=HttpTransport.POOL_SIZE,
+                pool_maxsize=HttpTransport.POOL_SIZE,
+            )
+        return HttpTransport.adapter
+
+    def get_session():
+        """Returns the unauthenticated pooled session (used for token refreshes)."""
+        if not HttpTransport.session:
+            session = requests.Session()
+            session.mount("https://", HttpTransport.get_adapter())
+            HttpTransport.session = session
+        return HttpTransport.session
+
+    def auth_request():
+        """Returns a google-auth Request that refreshes tokens over the shared pool."""
+        return Request(session=HttpTransport.get_session())
+
+    def authorized_session(credentials):
+        """Returns an authorized session for the given credentials, backed by the shared pool."""
+        key = id(credentials)
+        if key not in HttpTransport.authorized_sessions:
+            session = AuthorizedSession(
+                credentials, auth_request=HttpTransport.auth_request()
+            )
+            session.mount("https://", HttpTransport.get_adapter())
+            HttpTransport.authorized_sessions[key] = session
+        return HttpTransport.authorized_sessions[key]
+
+    def discovery_http(credentials):
+        """Returns an httplib2 compatible object for googleapiclient built on the shared pool."""
+        return _SessionHttp(HttpTransport.authorized_session(credentials))
+
+
+class _SessionHttp:
+    """Minimal httplib2.Http interface over a requests session, for googleapiclient."""
+
+    def __init__(self, session):
+        self.session = session
+
+    def request(
+        self,
+        uri,
+        method="GET",
+        body=None,
+        headers=None,
+        redirections=None,
+        connection_type=None,
+    ):
+        response = self.session.request(
+            method,
+            uri,
+            data=body,
+            headers=headers,
+            timeout=HttpTransport.timeout(),
+        )
+        info = dict(response.headers)
+        info["status"] = str(response.status_code)
+        return httplib2.Response(info), response.content
+
+    def close(self):
+        # The pool outlives individual clients
+        pass
+
+
+class LazyClient:
+    """
+    Defers building a backend client until it is first used.
+
+    Wraps a zero-argument factory and forwards attribute access to the client it builds,
+    so a manager can be handed a LazyClient wherever it expects the client itself.
+    Runs that never send or read anything never pay for credentials or discovery.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._client = None
+
+    @property
+    def is_built(self):
+        return self._client is not None
+
+    def get(self):
+        if self._client is None:
+            self._client = self._factory()
+        return self._client
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
 
 class CredentialsManager:
     """Manages credentials, handling local files and Google Secret Manager."""
 
+    # Validated GCP credentials keyed by scopes, reused across warm invocations
+    gcp_credentials = {}
+
     def __init__(self):
         pass
 
     def get_gcp_credentials(scopes=None):
         """Gets Google Cloud credentials, handling refresh and validation."""
+        cache_key = tuple(scopes or ())
+        if cache_key in CredentialsManager.gcp_credentials:
+            return CredentialsManager.gcp_credentials[cache_key]
+        credentials = CredentialsManager._load_gcp_credentials(scopes)
+        CredentialsManager.gcp_credentials[cache_key] = credentials
+        return credentials
+
+    def _load_gcp_credentials(scopes=None):
         try:
             credentials, _ = default(scopes=scopes)
         except DefaultCredentialsError as e:
@@ -38,7 +174,10 @@ class CredentialsManager:
             raise
 
         try:
-            storage.Client(credentials=credentials).list_buckets(
+            storage.Client(
+                credentials=credentials,
+                _http=HttpTransport.authorized_session(credentials),
+            ).list_buckets(
                 max_results=1
             )  # Validate with API call
             return credentials
@@ -50,8 +189,11 @@ class CredentialsManager:
                 and credentials.refresh_token
             ):
                 try:
-                    credentials.refresh(Request())
-                    storage.Client(credentials=credentials).list_buckets(
+                    credentials.refresh(HttpTransport.auth_request())
+                    storage.Client(
+                        credentials=credentials,
+                        _http=HttpTransport.authorized_session(credentials),
+                    ).list_buckets(
                         max_results=1
                     )  # Validate with API call after refresh
                     return credentials
@@ -168,21 +310,68 @@ class CredentialsManager:
             scopes=scopes,
         )
         try:
-            creds.refresh(Request())
+            creds.refresh(HttpTransport.auth_request())
         except Exception as e:
             print(f"Error refreshing token: {e}")
             raise
 
         return creds
 
-    def get_secret_value(self, secret_name):
-        credentials, project_id = default()
-        client = secrets.SecretManagerServiceClient()
-        name = f"projects/{project_id}/secrets/{secret_name}/versions/latest"
-        response = client.access_secret_version(request={"name": name})
-        secret_value = response.payload.data.decode("UTF-8")
+    def get_secret_value(self, secret_name, version="latest"):
+        """Reads a version of a secret through the Secret Manager REST API.
+
+        Uses the shared HTTP pool rather than a separate gRPC channel.
+        """
+        credentials, project_id = CredentialsManager._get_default_credentials()
+        name = f"projects/{project_id}/secrets/{secret_name}/versions/{version}"
+        session = HttpTransport.authorized_session(credentials)
+
+        def access():
+            response = session.get(
+                f"https://secretmanager.googleapis.com/v1/{name}:access",
+                timeout=HttpTransport.timeout(),
+            )
+            response.raise_for_status()
+            return response
+
+        response = resilience.call("secrets", access)
+        payload = response.json()["payload"]["data"]
+        secret_value = base64.b64decode(payload).decode("UTF-8")
         return secret_value
 
+    def _get_default_credentials():
+        if "default" not in CredentialsManager.gcp_credentials:
+            credentials, project_id = default(
+                scopes=["https://www.googleapis.com/auth/cloud-platform"]
+            )
+            CredentialsManager.gcp_credentials["default"] = (credentials, project_id)
+        return CredentialsManager.gcp_credentials["default"]
+
+    def add_secret_version(self, secret_name, value):
+        """Stores value as a new version of a secret, creating the secret if needed.
+
+        Returns:
+            The resource name of the new secret version.
+        """
+        _, project_id = CredentialsManager._get_default_credentials()
+        client = secrets.SecretManagerServiceClient()
+        parent = f"projects/{project_id}"
+        secret_path = f"{parent}/secrets/{secret_name}"
+        try:
+            client.get_secret(request={"name": secret_path})
+        except NotFound:
+            client.create_secret(
+                request={
+                    "parent": parent,
+                    "secret_id": secret_name,
+                    "secret": {"replication": {"automatic": {}}},
+                }
+            )
+        response = client.add_secret_version(
+            request={"parent": secret_path, "payload": {"data": value.encode("UTF-8")}}
+        )
+        return response.name
+
 
 class SpotifyAPI:
     """
@@ -197,14 +386,19 @@ class SpotifyAPI:
         "playlist-modify-private",
         "user-library-read",
     ]
+    # Most tracks Spotify accepts in one add items request
+    MAX_TRACKS_PER_REQUEST = 100
+    client = None
 
     def __init__(self, local_credentials: dict):
         """
-        Initializes the Spotify client.
+        Initializes the Spotify client, reusing the one built by an earlier invocation.
         """
-        self.sp = CredentialsManager().get_spotify_client(
-            self.SCOPES, local_credentials
-        )
+        if not SpotifyAPI.client:
+            SpotifyAPI.client = CredentialsManager().get_spotify_client(
+                self.SCOPES, local_credentials
+            )
+        self.sp = SpotifyAPI.client
 
     def search_album(self, artist_name, album_name):
         """
@@ -225,7 +419,9 @@ class SpotifyAPI:
             raise Exception("Spotify client not authenticated")
 
         query = f"{artist_name} {album_name} -deluxe"
-        results = self.sp.search(q=query, type="album")
+        results = resilience.call(
+            "spotify", lambda: self.sp.search(q=query, type="album"), hedge=True
+        )
 
         albums = results["albums"]["items"]
 
@@ -234,13 +430,42 @@ class SpotifyAPI:
 
         return albums[0]["uri"]
 
-    def overwrite_playlist_with_album(self, playlist_id, album_uri):
+    def get_album_track_uris(self, album_uri):
         """
-        Overwrites an existing playlist with the tracks of a given album.
+        Gets the URIs of every track on an album, in order.
+
+        Args:
+            album_uri: The URI of the album.
+
+        Returns:
+            A list of track URIs.
+
+        Raises:
+            Exception: If Spotify client is not authenticated.
+        """
+
+        if not self.sp:
+            raise Exception("Spotify client not authenticated")
+
+        album_tracks = resilience.call(
+            "spotify", lambda: self.sp.album_tracks(album_uri), hedge=True
+        )
+        track_uris = [track["uri"] for track in album_tracks["items"]]
+        while album_tracks["next"]:
+            page = album_tracks
+            album_tracks = resilience.call(
+                "spotify", lambda: self.sp.next(page), hedge=True
+            )
+            track_uris.extend(track["uri"] for track in album_tracks["items"])
+        return track_uris
+
+    def overwrite_playlist_with_tracks(self, playlist_id, track_uris):
+        """
+        Overwrites an existing playlist with the given tracks.
 
         Args:
             playlist_id: The ID of the playlist to update.
-            album_uri: The URI of the album to add to the playlist.
+            track_uris: The URIs of the tracks to put in the playlist.
 
         Raises:
             Exception: If Spotify client is not authenticated or an error occurs.
@@ -250,14 +475,110 @@ class SpotifyAPI:
             raise Exception("Spotify client not authenticated")
 
         # Clear the existing playlist
-        self.sp.playlist_replace_items(playlist_id, [])
-
-        # Get the album's track URIs
-        album_tracks = self.sp.album_tracks(album_uri)
-        track_uris = [track["uri"] for track in album_tracks["items"]]
+        resilience.call(
+            "spotify", lambda: self.sp.playlist_replace_items(playlist_id, [])
+        )
 
         # Add the tracks to the playlist
-        self.sp.playlist_add_items(playlist_id, track_uris)
+        resilience.call(
+            "spotify",
+            lambda: self.sp.playlist_add_items(playlist_id, track_uris),
+            idempotent=False,
+        )
+
+    def append_tracks(self, playlist_id, track_uris):
+        """
+        Appends tracks to the end of a playlist, in requests of at most MAX_TRACKS_PER_REQUEST.
+
+        Args:
+            playlist_id: The ID of the playlist to update.
+            track_uris: The URIs of the tracks to append.
+
+        Returns:
+            The playlist's snapshot_id after the last request, or None if there was nothing to add.
+
+        Raises:
+            Exception: If Spotify client is not authenticated or an error occurs.
+        """
+
+        if not self.sp:
+            raise Exception("Spotify client not authenticated")
+
+        snapshot_id = None
+        for start in range(0, len(track_uris), SpotifyAPI.MAX_TRACKS_PER_REQUEST):
+            chunk = track_uris[start : start + SpotifyAPI.MAX_TRACKS_PER_REQUEST]
+            result = resilience.call(
+                "spotify",
+                lambda: self.sp.playlist_add_items(playlist_id, chunk),
+                idempotent=False,
+            )
+            snapshot_id = result["snapshot_id"]
+        return snapshot_id
+
+    def get_playlist_snapshot_id(self, playlist_id):
+        """Returns the playlist's current snapshot_id, which changes whenever it is edited."""
+        if not self.sp:
+            raise Exception("Spotify client not authenticated")
+
+        playlist = resilience.call(
+            "spotify",
+            lambda: self.sp.playlist(playlist_id, fields="snapshot_id"),
+            hedge=True,
+        )
+        return playlist["snapshot_id"]
+
+    def get_playlist_tracks_by_album(self, playlist_id):
+        """
+        Gets the URIs of a playlist's tracks, grouped by album.
+
+        Args:
+            playlist_id: The ID of the playlist.
+
+        Returns:
+            A dict of sets of track URIs by album URI.
+
+        Raises:
+            Exception: If Spotify client is not authenticated.
+        """
+
+        if not self.sp:
+            raise Exception("Spotify client not authenticated")
+
+        fields = "items(track(uri,album(uri))),next"
+        page = resilience.call(
+            "spotify",
+            lambda: self.sp.playlist_items(playlist_id, fields=fields),
+            hedge=True,
+        )
+        tracks_by_album = {}
+        while True:
+            for item in page["items"]:
+                track = item.get("track")
+                if track and track.get("album"):
+                    tracks_by_album.setdefault(track["album"]["uri"], set()).add(
+                        track["uri"]
+                    )
+            if not page["next"]:
+                return tracks_by_album
+            previous = page
+            page = resilience.call(
+                "spotify", lambda: self.sp.next(previous), hedge=True
+            )
+
+    def overwrite_playlist_with_album(self, playlist_id, album_uri):
+        """
+        Overwrites an existing playlist with the tracks of a given album.
+
+        Args:
+            playlist_id: The ID of the playlist to update.
+            album_uri: The URI of the album to add to the playlist.
+
+        Raises:
+            Exception: If Spotify client is not authenticated or an error occurs.
+        """
+
+        track_uris = self.get_album_track_uris(album_uri)
+        self.overwrite_playlist_with_tracks(playlist_id, track_uris)
         print(f"Playlist '{playlist_id}' updated with album '{album_uri}'")
 
 
@@ -268,6 +589,8 @@ class GmailAPI:
     Handles authentication (using Authentication class), message creation, and email sending.
     """
 
+    service = None
+
     def __init__(self, sender_email):
         self.sender_email = sender_email
         scopes = [
@@ -276,8 +599,12 @@ class GmailAPI:
             # "https://www.googleapis.com/auth/gmail.compose",
             # "https://www.googleapis.com/auth/gmail.readonly",
         ]
-        credentials = CredentialsManager().get_gmail_creds(scopes=scopes)
-        self.sp = build("gmail", "v1", credentials=credentials)
+        if not GmailAPI.service:
+            credentials = CredentialsManager().get_gmail_creds(scopes=scopes)
+            GmailAPI.service = build(
+                "gmail", "v1", http=HttpTransport.discovery_http(credentials)
+            )
+        self.sp = GmailAPI.service
 
     def create_message(self, sender, recipients, subject, body):
         """
@@ -331,9 +658,10 @@ class GmailAPI:
             message = self.create_message_html(
                 self.sender_email, recipients, subject, body
             )
-            self.sp.users().messages().send(
-                userId="me", body={"raw": message}
-            ).execute()
+            request = (
+                self.sp.users().messages().send(userId="me", body={"raw": message})
+            )
+            resilience.call("gmail", request.execute, idempotent=False)
             print("Email sent!")
         except Exception as e:
             print(f"An error occurred: {e}")
@@ -351,10 +679,15 @@ class FormAPI:
         "https://www.googleapis.com/auth/forms.responses.readonly",
         "https://www.googleapis.com/auth/drive",
     ]
+    service = None
 
     def __init__(self):
-        credentials = CredentialsManager.get_gcp_credentials(scopes=FormAPI.SCOPES)
-        self.sp = build("forms", "v1", credentials=credentials)
+        if not FormAPI.service:
+            credentials = CredentialsManager.get_gcp_credentials(scopes=FormAPI.SCOPES)
+            FormAPI.service = build(
+                "forms", "v1", http=HttpTransport.discovery_http(credentials)
+            )
+        self.sp = FormAPI.service
 
     def _log_response(response_data):
         with open("submissions.json", "a+") as f:
@@ -362,46 +695,93 @@ class FormAPI:
             f.write("\n")
 
     def _parse_aotw_response(self, response):
-        response_data = {
-            "user_email": response["respondentEmail"],
-            "timestamp": response["lastSubmittedTime"],
-            "album": response["answers"]["230e86f5"]["textAnswers"]["answers"][0][
-                "value"
-            ],
-            "artist": response["answers"]["768e031c"]["textAnswers"]["answers"][0][
+        return Submission(
+            user_email=response["respondentEmail"],
+            timestamp=response["lastSubmittedTime"],
+            album=response["answers"]["230e86f5"]["textAnswers"]["answers"][0]["value"],
+            artist=response["answers"]["768e031c"]["textAnswers"]["answers"][0][
                 "value"
             ],
-        }
-        return response_data
+        )
 
-    def _read_responses(self, form_id):
+    def _read_responses(self, form_id, min_timestamp=None):
         """
         Reads all responses to the specified Google Form.
 
         Args:
             form_id: The ID of the Google Form.
+            min_timestamp: Optional datetime; only responses submitted at or after it are read.
 
         Returns:
-            A list of dictionaries, where each dictionary represents a response and contains metadata (e.g., user email, timestamp) and answers.
+            A list of Submission records.
 
         Raises:
             Exception: If reading responses fails.
         """
 
-        try:
-            response = self.sp.forms().responses().list(formId=form_id).execute()
-            responses = response.get("responses", [])
+        request_args = {"formId": form_id}
+        if min_timestamp:
+            request_args["filter"] = (
+                f"timestamp >= {DateHelper.format_timestamp(min_timestamp)}"
+            )
 
+        try:
             response_list = []
-            for r in responses:
-                response_data = self._parse_aotw_response(r)
-                response_list.append(response_data)
+            while True:
+                request = self.sp.forms().responses().list(**request_args)
+                response = resilience.call("forms", request.execute)
+                for r in response.get("responses", []):
+                    response_list.append(self._parse_aotw_response(r))
+                if not response.get("nextPageToken"):
+                    break
+                request_args["pageToken"] = response["nextPageToken"]
 
             return response_list
         except HttpError as error:
             print(f"An error occurred while reading responses: {error}")
             raise Exception("Failed to read responses")
 
+    def create_watch(self, form_id, topic_name):
+        """
+        Creates a watch that publishes a Pub/Sub message to topic_name whenever the form gets a response.
+
+        Watches expire after 7 days, see renew_watch.
+
+        Returns:
+            The created watch resource.
+        """
+
+        watch = {
+            "watch": {
+                "target": {"topic": {"topicName": topic_name}},
+                "eventType": "RESPONSES",
+            }
+        }
+        request = self.sp.forms().watches().create(formId=form_id, body=watch)
+        return resilience.call("forms", request.execute, idempotent=False)
+
+    def renew_watch(self, form_id, topic_name):
+        """
+        Renews the form's response watch on topic_name, creating it if it does not exist.
+
+        Returns:
+            The renewed or created watch resource.
+        """
+
+        watches = resilience.call(
+            "forms", self.sp.forms().watches().list(formId=form_id).execute
+        )
+        for watch in watches.get("watches", []):
+            if (
+                watch.get("eventType") == "RESPONSES"
+                and watch["target"]["topic"]["topicName"] == topic_name
+            ):
+                request = (
+                    self.sp.forms().watches().renew(formId=form_id, watchId=watch["id"])
+                )
+                return resilience.call("forms", request.execute)
+        return self.create_watch(form_id, topic_name)
+
     def get_form_submissions(
         self, form_id, user_filter=None, min_timestamp_filter=None
     ):
@@ -414,47 +794,56 @@ class FormAPI:
             min_timestamp_filter: Optional minimum timestamp to filter responses.
 
         Returns:
-            A dictionary containing the extracted response data or None if no matching response is found.
+            A list of Submission records, most recent first, or None if no matching response is found.
         """
 
-        responses = self._read_responses(form_id)
+        responses = self._read_responses(form_id, min_timestamp=min_timestamp_filter)
         filtered_responses = responses
 
         if user_filter:
             filtered_responses = [
-                r for r in filtered_responses if r["user_email"] == user_filter
+                r for r in filtered_responses if r.user_email == user_filter
             ]
 
         if min_timestamp_filter:
             filtered_responses = [
-                r
-                for r in filtered_responses
-                if datetime.datetime.fromisoformat(r["timestamp"])
-                >= min_timestamp_filter
+                r for r in filtered_responses if r.timestamp >= min_timestamp_filter
             ]
 
         if not filtered_responses:
             return None
-        filtered_responses.sort(key=lambda x: x["timestamp"], reverse=True)
+        filtered_responses.sort(key=lambda x: x.timestamp, reverse=True)
         return filtered_responses
 
 
 class GoogleCloudStorage:
     BUCKET_NAME = "batty-bot-aotw"
     SECRET = "storage_credentials"
+    # JSON payloads at least this large are stored compact and gzipped
+    COMPRESSION_THRESHOLD_BYTES = 32 * 1024
+    GZIP_MAGIC = b"\x1f\x8b"
     """
     A class for interacting with Google Cloud Storage.
 
     Uses service account credentials for authentication.
     """
 
+    client = None
+
     def __init__(self):
         """
         Initializes the Google Cloud Storage client using credentials from Secret Manager.
+
+        The client is shared by every instance in the process.
         """
 
-        credentials = CredentialsManager.get_gcp_credentials()
-        self.client = storage.Client(credentials=credentials)  # Cloud Storage client
+        if not GoogleCloudStorage.client:
+            credentials = CredentialsManager.get_gcp_credentials()
+            GoogleCloudStorage.client = storage.Client(
+                credentials=credentials,
+                _http=HttpTransport.authorized_session(credentials),
+            )
+        self.client = GoogleCloudStorage.client
 
     def upload_file(self, source_file_path, destination_blob_name):
         """
@@ -472,7 +861,7 @@ class GoogleCloudStorage:
         blob = bucket.blob(destination_blob_name)
 
         try:
-            blob.upload_from_filename(source_file_path)
+            resilience.call("gcs", lambda: blob.upload_from_filename(source_file_path))
             print(f"File '{source_file_path}' uploaded to '{destination_blob_name}'")
         except Exception as e:
             print(f"Failed to upload file: {e}")
@@ -494,7 +883,9 @@ class GoogleCloudStorage:
         blob = bucket.blob(source_blob_name)
 
         try:
-            blob.download_to_filename(destination_file_path)
+            resilience.call(
+                "gcs", lambda: blob.download_to_filename(destination_file_path)
+            )
             print(f"File '{source_blob_name}' downloaded to '{destination_file_path}'")
         except Exception as e:
             print(f"Failed to download file: {e}")
@@ -513,59 +904,318 @@ class GoogleCloudStorage:
 
         return self.client.bucket(GoogleCloudStorage.BUCKET_NAME)
 
-    def read_json(self, blob_name):
-        """Reads JSON data from a GCS blob and returns it as a Python object.
+    def list_blob_names(self, prefix):
+        """Returns the names of the blobs whose name starts with prefix."""
+        return resilience.call(
+            "gcs",
+            lambda: [
+                blob.name
+                for blob in self.client.list_blobs(
+                    GoogleCloudStorage.BUCKET_NAME, prefix=prefix
+                )
+            ],
+        )
+
+    def read_bytes(self, blob_name, cache_ttl=None):
+        """Downloads the stored bytes of a GCS blob.
+
+        Downloads are raw, so gzip objects are returned compressed rather than transcoded.
 
         Args:
-            GoogleCloudStorage.BUCKET_NAME: The name of the bucket.
             blob_name: The name of the blob.
+            cache_ttl: If None, the blob is always downloaded. Otherwise the blob cache is
+                used: a copy validated less than cache_ttl seconds ago is returned without
+                any request, and an older copy is revalidated by generation with a metadata
+                request.
 
         Returns:
-            The parsed JSON data as a Python object.
+            The blob's bytes, or None if it does not exist.
         """
 
         bucket = self.client.bucket(GoogleCloudStorage.BUCKET_NAME)
-        blob = bucket.blob(blob_name)
-        if blob.exists():
-            blob_bytes = blob.download_as_bytes()
-            return json.loads(blob_bytes)
-        else:
+        if cache_ttl is not None:
+            entry = BlobCache.get(blob_name)
+            if entry is not None:
+                if time.time() - entry.validated_at < cache_ttl:
+                    return entry.data
+                current = resilience.call(
+                    "gcs", lambda: bucket.get_blob(blob_name), hedge=True
+                )
+                if current is not None and current.generation == entry.generation:
+                    BlobCache.touch(blob_name)
+                    return entry.data
+
+        def download():
+            # Each attempt gets its own blob, a hedged attempt may run alongside another
+            blob = bucket.blob(blob_name)
+            return blob, blob.download_as_bytes(raw_download=True)
+
+        try:
+            blob, blob_bytes = resilience.call("gcs", download, hedge=True)
+        except NotFound:
+            BlobCache.invalidate(blob_name)
             print(f"File {blob_name} does not exist, returning None")
             return None
+        if cache_ttl is not None:
+            BlobCache.put(blob_name, blob.generation, blob_bytes)
+        return blob_bytes
+
+    def read_json(self, blob_name, cache_ttl=None):
+        """Reads JSON data from a GCS blob and returns it as a Python object.
+
+        Args:
+            blob_name: The name of the blob.
+            cache_ttl: Optional seconds a cached copy is trusted without revalidation, see read_bytes.
+
+        Returns:
+            The parsed JSON data as a Python object, or None if the blob does not exist.
+        """
+
+        blob_bytes = self.read_bytes(blob_name, cache_ttl=cache_ttl)
+        if blob_bytes is None:
+            return None
+        return GoogleCloudStorage.decode_json(blob_bytes)
+
+    def read_json_with_generation(self, blob_name):
+        """Reads the current JSON data of a blob along with its generation.
+
+        Returns:
+            A tuple of the parsed data (None if the blob does not exist) and its generation
+            (0 if the blob does not exist, which as a precondition means "must not exist").
+        """
+
+        bucket = self.client.bucket(GoogleCloudStorage.BUCKET_NAME)
+
+        def download():
+            # Each attempt gets its own blob, a hedged attempt may run alongside another
+            blob = bucket.blob(blob_name)
+            return blob, blob.download_as_bytes(raw_download=True)
+
+        try:
+            blob, blob_bytes = resilience.call("gcs", download, hedge=True)
+        except NotFound:
+            return None, 0
+        return GoogleCloudStorage.decode_json(blob_bytes), int(blob.generation)
+
+    def write_to_json(self, data, blob_name, compact=False, if_generation_match=None):
+        """Writes data to a GCS blob as JSON.
+
+        Payloads over COMPRESSION_THRESHOLD_BYTES are written compact and gzipped, with
+        Content-Encoding set so other tools still see JSON.
+
+        Args:
+            data: A JSON serializable object.
+            blob_name: The name of the blob.
+            compact: Whether to write compact JSON instead of pretty-printing it.
+            if_generation_match: Optional generation the blob must currently have for the
+                write to happen, 0 meaning the blob must not exist yet.
+
+        Returns:
+            The generation of the written blob.
+
+        Raises:
+            PreconditionFailed: If if_generation_match does not match the blob.
+        """
 
-    def write_to_json(self, data, blob_name):
         bucket = self.client.bucket(GoogleCloudStorage.BUCKET_NAME)
         blob = bucket.blob(blob_name)
-        json_data = json.dumps(data, indent=4)
-        blob.upload_from_string(json_data, content_type="application/json")
+        json_data, content_encoding = GoogleCloudStorage.encode_json(data, compact)
+        blob.content_encoding = content_encoding
+        resilience.call(
+            "gcs",
+            lambda: blob.upload_from_string(
+                json_data,
+                content_type="application/json",
+                if_generation_match=if_generation_match,
+            ),
+        )
+        # Only blobs read with a cache_ttl are cached, keep those up to date
+        BlobCache.refresh(blob_name, blob.generation, json_data)
+        return blob.generation
+
+    def update_json(self, blob_name, merge, compact=False, max_attempts=5):
+        """Read-merge-write of a JSON blob that is safe against concurrent writers.
 
-    def read_txt(self, blob_name):
+        Each write is conditional on the generation that was read. If another writer got in
+        first, the blob is read again and merged again.
+
+        Args:
+            blob_name: The name of the blob.
+            merge: Callable taking the current data (None if the blob does not exist) and
+                returning the data to store, or None to leave the blob unchanged.
+            compact: Whether to write compact JSON instead of pretty-printing it.
+            max_attempts: How many times to retry after losing a race.
+
+        Returns:
+            The data stored in the blob after the update.
+
+        Raises:
+            PreconditionFailed: If every attempt lost a race.
+        """
+
+        updated, _ = self.update_json_with_generation(
+            blob_name, merge, compact=compact, max_attempts=max_attempts
+        )
+        return updated
+
+    def update_json_with_generation(
+        self, blob_name, merge, current=None, compact=False, max_attempts=5
+    ):
+        """Like update_json, starting from data the caller already read.
+
+        Args:
+            current: Optional (data, generation) of the blob, as returned by
+                read_json_with_generation. The first attempt merges it instead of reading
+                the blob, so a caller that read the blob anyway saves a download.
+
+        Returns:
+            A tuple of the data stored in the blob after the update and its generation.
+        """
+
+        for attempt in range(max_attempts):
+            if current is None:
+                current = self.read_json_with_generation(blob_name)
+            data, generation = current
+            current = None
+            updated = merge(data)
+            if updated is None:
+                return data, generation
+            try:
+                generation = self.write_to_json(
+                    updated, blob_name, compact=compact, if_generation_match=generation
+                )
+                return updated, generation
+            except PreconditionFailed:
+                if attempt + 1 >= max_attempts:
+                    raise
+                print(f"{blob_name} changed while updating it, merging again")
+                time.sleep(random.uniform(0, 0.1 * 2**attempt))
+
+    def iter_json_records(
+        self, blob_name, predicate=None, stop_when=None, chunk_size=256 * 1024
+    ):
+        """Streams the records of a JSON array blob without loading the whole blob.
+
+        The blob is downloaded chunk_size bytes at a time (decompressing gzip objects on
+        the fly) and records are yielded as soon as they are parsed.
+
+        Args:
+            blob_name: The name of the blob containing a JSON array.
+            predicate: Optional callable; only records for which it returns True are yielded.
+            stop_when: Optional callable; the scan stops at the first record for which it
+                returns True, without downloading the rest of the blob.
+            chunk_size: Number of bytes to download at a time.
+
+        Yields:
+            The parsed records.
+        """
+
+        bucket = self.client.bucket(GoogleCloudStorage.BUCKET_NAME)
+
+        def open_stream():
+            blob = bucket.blob(blob_name)
+            reader = blob.open("rb", chunk_size=chunk_size, raw_download=True)
+            stream = io.BufferedReader(reader, buffer_size=chunk_size)
+            # Downloads the first chunk, so a failed request is retried here
+            stream.peek(2)
+            return stream
+
+        try:
+            stream = resilience.call("gcs", open_stream)
+        except NotFound:
+            print(f"File {blob_name} does not exist, nothing to stream")
+            return
+        if stream.peek(2)[:2] == GoogleCloudStorage.GZIP_MAGIC:
+            stream = gzip.GzipFile(fileobj=stream)
+
+        with stream:
+            for record in json_codec.iter_array(stream, chunk_size):
+                if stop_when is not None and stop_when(record):
+                    return
+                if predicate is None or predicate(record):
+                    yield record
+
+    def encode_json(data, compact=False):
+        """Serializes data for upload, compressing large payloads.
+
+        Returns:
+            A tuple of the payload bytes and its Content-Encoding (None if uncompressed).
+        """
+
+        json_data = json_codec.dumps(data, indent=None if compact else 4)
+        if len(json_data) < GoogleCloudStorage.COMPRESSION_THRESHOLD_BYTES:
+            return json_data, None
+        if not compact:
+            json_data = json_codec.dumps(data)
+        return gzip.compress(json_data), "gzip"
+
+    def decode_bytes(blob_bytes):
+        """Decompresses blob bytes if they are gzipped."""
+        if blob_bytes[:2] == GoogleCloudStorage.GZIP_MAGIC:
+            return gzip.decompress(blob_bytes)
+        return blob_bytes
+
+    def decode_json(blob_bytes):
+        """Parses JSON blob bytes, decompressing them first if they are gzipped."""
+        return json_codec.loads(GoogleCloudStorage.decode_bytes(blob_bytes))
+
+    def delete_blob(self, blob_name):
+        """Deletes a blob, ignoring blobs that are already gone."""
+        bucket = self.client.bucket(GoogleCloudStorage.BUCKET_NAME)
+        blob = bucket.blob(blob_name)
+        BlobCache.invalidate(blob_name)
+        try:
+            resilience.call("gcs", blob.delete)
+        except NotFound:
+            pass
+
+    def read_txt(self, blob_name, cache_ttl=None):
         """Reads the content of a GCS blob (text file) and returns it as a string.
 
         Args:
             blob_name: The name of the text file blob.
+            cache_ttl: Optional seconds a cached copy is trusted without revalidation, see read_bytes.
 
         Returns:
-            The content of the text file as a string.
+            The content of the text file as a string, or None if the blob does not exist.
+        """
+
+        blob_bytes = self.read_bytes(blob_name, cache_ttl=cache_ttl)
+        if blob_bytes is None:
+            return None
+        return GoogleCloudStorage.decode_bytes(blob_bytes).decode("utf-8")
+
+    def write_txt(self, text, blob_name, content_type="text/plain"):
+        """Writes a string to a GCS blob.
+
+        Args:
+            text: The text to write.
+            blob_name: The name of the blob.
+            content_type: The content type stored with the blob.
         """
 
         bucket = self.client.bucket(GoogleCloudStorage.BUCKET_NAME)
         blob = bucket.blob(blob_name)
-        if blob.exists():
-            return blob.download_as_text()
-        else:
-            print(f"File {blob_name} does not exist, returning None")
-            return None
+        data = text.encode("utf-8")
+        resilience.call(
+            "gcs", lambda: blob.upload_from_string(data, content_type=content_type)
+        )
+        BlobCache.refresh(blob_name, blob.generation, data)
 
 
 class OpenAIAPI:
     client = None
     default_model = "gpt-4o-mini"
     default_context = "You are a helpful assistant."
+    BATCH_ENDPOINT = "/v1/chat/completions"
+    BATCH_COMPLETION_WINDOW = "24h"
+    BATCH_POLL_SECONDS = 30
+    BATCH_TIMEOUT_SECONDS = 24 * 60 * 60
 
     def __init__(self, api_key):
         if not OpenAIAPI.client:
-            OpenAIAPI.client = OpenAI(api_key=api_key)
+            # Retries are handled by the resilience policy
+            OpenAIAPI.client = OpenAI(api_key=api_key, timeout=60, max_retries=0)
 
     def send_prompt(self, prompt):
         """
@@ -586,8 +1236,149 @@ class OpenAIAPI:
             {"role": "user", "content": prompt},
         ]
 
-        response = self.client.chat.completions.create(
-            model=OpenAIAPI.default_model, messages=message
+        response = resilience.call(
+            "openai",
+            lambda: self.client.chat.completions.create(
+                model=OpenAIAPI.default_model, messages=message
+            ),
         )
 
         return response.choices[0].message.content.strip()
+
+    def stream_prompt(self, prompt):
+        """
+        Sends a prompt to the OpenAI API and yields the generated text as it arrives.
+
+        Args:
+            prompt: The prompt to send to the model.
+
+        Yields:
+            Chunks of generated text.
+        """
+
+        message = [
+            {"role": "system", "content": OpenAIAPI.default_context},
+            {"role": "user", "content": prompt},
+        ]
+
+        stream = resilience.call(
+            "openai",
+            lambda: self.client.chat.completions.create(
+                model=OpenAIAPI.default_model, messages=message, stream=True
+            ),
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    def _batch_line(custom_id, prompt):
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": OpenAIAPI.BATCH_ENDPOINT,
+            "body": {
+                "model": OpenAIAPI.default_model,
+                "messages": [
+                    {"role": "system", "content": OpenAIAPI.default_context},
+                    {"role": "user", "content": prompt},
+                ],
+            },
+        }
+
+    def submit_batch(self, prompts: dict, metadata: dict = None):
+        """
+        Submits prompts as a single batch job, answered within the completion window.
+
+        Args:
+            prompts: A dict of prompts by custom id, used to match up the results.
+            metadata: Optional string values attached to the job, shown in the dashboard.
+
+        Returns:
+            The batch id.
+        """
+
+        jsonl = "".join(
+            json.dumps(OpenAIAPI._batch_line(custom_id, prompt)) + "\n"
+            for custom_id, prompt in prompts.items()
+        )
+        input_file = resilience.call(
+            "openai",
+            lambda: self.client.files.create(
+                file=("batch.jsonl", jsonl.encode("utf-8")), purpose="batch"
+            ),
+            idempotent=False,
+        )
+        batch = resilience.call(
+            "openai",
+            lambda: self.client.batches.create(
+                input_file_id=input_file.id,
+                endpoint=OpenAIAPI.BATCH_ENDPOINT,
+                completion_window=OpenAIAPI.BATCH_COMPLETION_WINDOW,
+                metadata=metadata,
+            ),
+            idempotent=False,
+        )
+        print(f"Submitted batch {batch.id} with {len(prompts)} prompts")
+        return batch.id
+
+    def wait_for_batch(self, batch_id, poll_seconds=None, timeout=None):
+        """
+        Polls a batch job until it stops running.
+
+        Returns:
+            The finished batch. An expired batch is returned too, with the results it has.
+
+        Raises:
+            RuntimeError: If the batch failed or was cancelled.
+            TimeoutError: If the batch is still running after timeout seconds.
+        """
+
+        poll_seconds = poll_seconds or OpenAIAPI.BATCH_POLL_SECONDS
+        timeout = timeout or OpenAIAPI.BATCH_TIMEOUT_SECONDS
+        deadline_at = time.monotonic() + timeout
+        while True:
+            batch = resilience.call(
+                "openai", lambda: self.client.batches.retrieve(batch_id)
+            )
+            if batch.status in ("completed", "expired"):
+                return batch
+            if batch.status in ("failed", "cancelling", "cancelled"):
+                raise RuntimeError(f"Batch {batch_id} {batch.status}: {batch.errors}")
+            if time.monotonic() + poll_seconds > deadline_at:
+                raise TimeoutError(
+                    f"Batch {batch_id} still {batch.status} after {timeout}s"
+                )
+            time.sleep(poll_seconds)
+
+    def read_batch_results(self, batch):
+        """
+        Reads the generated text of a finished batch.
+
+        Returns:
+            A dict of generated text by custom id. Prompts that failed are left out.
+        """
+
+        results = {}
+        if batch.output_file_id:
+            content = resilience.call(
+                "openai", lambda: self.client.files.content(batch.output_file_id)
+            )
+            for line in content.text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get("response") or {}
+                if record.get("error") or response.get("status_code") != 200:
+                    print(
+                        f"Batch prompt {record['custom_id']} failed: "
+                        f"{record.get('error') or response.get('status_code')}"
+                    )
+                    continue
+                message = response["body"]["choices"][0]["message"]["content"]
+                results[record["custom_id"]] = message.strip()
+        missing = (
+            batch.request_counts.total - len(results) if batch.request_counts else 0
+        )
+        if missing:
+            print(f"Batch {batch.id} is missing {missing} results")
+        return results
@@ -1,14 +1,23 @@
 import os
 import datetime
+from functools import cached_property
 from enum import Enum
 from dotenv import load_dotenv
 import pytz
 from google.cloud import secretmanager
+import hashlib
 import json
+import time
 
 from AOTW.logic.date_helper import DateHelper
 from AOTW.logic.communications import CredentialsManager
 
+try:
+    # Generated at deploy time by AOTW/scripts/build_config_snapshot.py
+    from AOTW.logic.config_snapshot import SNAPSHOT
+except ImportError:
+    SNAPSHOT = None
+
 
 class Env(Enum):
     TEST = "test"
@@ -16,23 +25,87 @@ class Env(Enum):
 
 
 class Config:
+    # Single JSON secret holding every run variable for an environment
+    CONFIG_BUNDLE_SECRET = "AOTW_CONFIG"
+    CONFIG_BUNDLE_SCHEMA_VERSION = 1
+    CONFIG_BUNDLE_VARS = [
+        "PROJECT_ID",
+        "SENDER_EMAIL",
+        "PARTICIPANT_EMAILS",
+        "AOTW_DAY",
+        "AOTW_FORM_LINK",
+        "AOTW_FORM_ID",
+        "PLAYLIST_ID",
+        "PLAYLIST_LINK",
+        "OPENAI_API_KEY",
+        "REMINDER_DAYS",
+        "SPOTIFY_CREDENTIALS_FILE",
+        "FORMS_WATCH_TOPIC",
+        "ARCHIVE_PLAYLIST_ID",
+        "EMAIL_STATS",
+    ]
+    # Never written to the config snapshot, always resolved at runtime
+    SECRET_VARS = ["OPENAI_API_KEY"]
+    OPTIONAL_VARS = ["FORMS_WATCH_TOPIC", "ARCHIVE_PLAYLIST_ID", "EMAIL_STATS"]
+    CONFIG_SNAPSHOT_SCHEMA_VERSION = 1
+
+    # Resolved run variables and config bundles are shared by the tasks handled in this
+    # process, and resolved again once they are older than this many seconds
+    RUN_VAR_CACHE_TTL = 10 * 60
+    # (env, var_name) -> (value, resolved_at)
+    _run_var_cache = {}
+    # env -> (bundle, fetched_at)
+    _config_bundles = {}
+    _checked_snapshots = set()
+    _stale_snapshots = set()
+    # Set by from_values, replaces every lookup for that instance
+    _fixed_run_vars = None
+
     def __init__(self, env, test_date: datetime.datetime = None):
         self.env = self._get_env(env)
         self.run_date = self._get_run_date(test_date)
         self.project_id = self._get_run_var("PROJECT_ID")
         self.bot_email = self._get_run_var("SENDER_EMAIL")
-        self.spotify_local_credentials = self._get_spotify_local_credentials()
         self.participant_emails = self._get_run_var("PARTICIPANT_EMAILS").split(",")
         self.aotw_day = self._get_run_var("AOTW_DAY")
         self.aotw_form_link = self._get_run_var("AOTW_FORM_LINK")
         self.aotw_form_id = self._get_run_var("AOTW_FORM_ID")
         self.playlist_id = self._get_run_var("PLAYLIST_ID")
         self.playlist_link = self._get_run_var("PLAYLIST_LINK")
-        self.openai_api_key = self._get_run_var("OPENAI_API_KEY")
         self.reminder_days = self._get_run_var("REMINDER_DAYS").split(",")
+        self.forms_watch_topic = self._get_optional_run_var("FORMS_WATCH_TOPIC")
+        self.archive_playlist_id = self._get_optional_run_var("ARCHIVE_PLAYLIST_ID")
+        # Off unless set to "true"
+        self.email_stats = (
+            self._get_optional_run_var("EMAIL_STATS") or ""
+        ).lower() == "true"
         self.package_path = os.path.dirname(os.path.dirname(__file__))
         self._print_config_to_terminal()
 
+    @classmethod
+    def from_values(cls, env, values: dict, test_date: datetime.datetime = None):
+        """
+        Builds a Config from explicit run variable values, without reading .env or secrets.
+
+        Used by scripts running against local stand-ins. The values only apply to the
+        returned instance and never enter the process-wide cache.
+        """
+
+        config = cls.__new__(cls)
+        config._fixed_run_vars = {
+            var_name: values.get(var_name) for var_name in Config.CONFIG_BUNDLE_VARS
+        }
+        config.__init__(Env(env).value, test_date)
+        return config
+
+    @cached_property
+    def spotify_local_credentials(self):
+        return self._get_spotify_local_credentials()
+
+    @cached_property
+    def openai_api_key(self):
+        return self._get_run_var("OPENAI_API_KEY")
+
     @property
     def current_week(self):
         return DateHelper(self.run_date).get_current_week(
@@ -40,11 +113,15 @@ class Config:
         )
 
     @property
-    def album_log_filepath(self):
+    def album_log_prefix(self):
         if self.env == Env.PROD:
-            return f"albums/aotw_{self.current_week}.json"
+            return "albums/aotw_"
         else:
-            return f"albums/test/aotw_{self.current_week}.json"
+            return "albums/test/aotw_"
+
+    @property
+    def album_log_filepath(self):
+        return f"{self.album_log_prefix}{self.current_week}.json"
 
     def _get_env(self, env):
         result = Env(env)
@@ -60,6 +137,8 @@ class Config:
 
         If GOOGLE_APPLICATION_CREDENTIALS is set (indicating GCP), it will use Google Cloud Secret Manager.
         Otherwise, it will search for the variable in the .env file.
+        Non-secret variables come from the deploy-time config snapshot when one was built.
+        Values are cached per environment for RUN_VAR_CACHE_TTL seconds.
 
         Args:
             var_name (str): environment variable name
@@ -67,6 +146,89 @@ class Config:
         Returns:
             str: variable value
         """
+        if self._fixed_run_vars is not None:
+            return self._fixed_run_vars.get(var_name)
+        cached = Config._run_var_cache.get((self.env, var_name))
+        if cached is not None and Config._is_fresh(cached[1]):
+            return cached[0]
+        snapshot = self._get_snapshot_values()
+        if snapshot is not None and var_name in snapshot:
+            value = snapshot[var_name]
+        else:
+            value = self._lookup_run_var(var_name)
+        self._cache_run_var(var_name, value)
+        return value
+
+    def _cache_run_var(self, var_name: str, value):
+        Config._run_var_cache[(self.env, var_name)] = (value, time.monotonic())
+
+    def _is_fresh(cached_at):
+        return time.monotonic() - cached_at < Config.RUN_VAR_CACHE_TTL
+
+    def snapshot_checksum(values: dict):
+        canonical = json.dumps(values, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def snapshot_vars():
+        return [
+            var_name
+            for var_name in Config.CONFIG_BUNDLE_VARS
+            if var_name not in Config.SECRET_VARS
+        ]
+
+    def _get_snapshot_values(self):
+        """Returns this environment's non-secret values from the deploy-time snapshot.
+
+        Returns None when there is no usable snapshot: none was built, it has another
+        schema, its checksum does not match its values, or it was found to be stale.
+        On GCP the first lookup compares it with the live config bundle, which the
+        secrets are read from anyway, before any snapshot value is used.
+        """
+        if SNAPSHOT is None or self.env in Config._stale_snapshots:
+            return None
+        if SNAPSHOT.get("schema_version") != Config.CONFIG_SNAPSHOT_SCHEMA_VERSION:
+            return None
+        entry = SNAPSHOT["environments"].get(self.env.value)
+        if entry is None:
+            return None
+        if self.env not in Config._checked_snapshots:
+            Config._checked_snapshots.add(self.env)
+            if Config.snapshot_checksum(entry["values"]) != entry["checksum"]:
+                print(
+                    f"Config snapshot for {self.env.value} fails its checksum, ignoring it"
+                )
+                Config._stale_snapshots.add(self.env)
+                return None
+            if "GOOGLE_CLOUD_PROJECT" in os.environ:
+                self._get_config_bundle()
+                if self.env in Config._stale_snapshots:
+                    return None
+        return entry["values"]
+
+    def _check_snapshot(self, bundle_values: dict):
+        """Compares the snapshot with the config bundle and stops using it if it is stale."""
+        snapshot = self._get_snapshot_values()
+        if snapshot is None:
+            return
+        live_values = {var_name: bundle_values.get(var_name) for var_name in snapshot}
+        if Config.snapshot_checksum(live_values) != Config.snapshot_checksum(snapshot):
+            print(
+                f"Config snapshot for {self.env.value} is stale, using the config bundle"
+            )
+            Config._stale_snapshots.add(self.env)
+            for var_name in snapshot:
+                Config._run_var_cache.pop((self.env, var_name), None)
+
+    def _get_optional_run_var(self, var_name: str):
+        """Returns a run variable's value, or None if it is not configured."""
+        try:
+            return self._get_run_var(var_name)
+        except Exception:
+            if self._fixed_run_vars is None:
+                self._cache_run_var(var_name, None)
+            return None
+
+    def _lookup_run_var(self, var_name: str):
         try:
             if "GOOGLE_CLOUD_PROJECT" in os.environ:
                 raise Exception(
@@ -85,14 +247,84 @@ class Config:
             # local prod variables
             return os.environ.get(var_name)
         except:
-            if self.env == Env.TEST:
-                # GCP dev variables
-                dev_var_name = f"DEV_{var_name}"
-                try:
-                    return CredentialsManager().get_secret_value(dev_var_name)
-                except:
-                    return CredentialsManager().get_secret_value(var_name)
-            return CredentialsManager().get_secret_value(var_name)
+            bundle = self._get_config_bundle()
+            # Bundles written before missing variables were left out store them as null
+            if bundle is not None and bundle.get(var_name) is not None:
+                return bundle[var_name]
+            return self._get_secret_run_var(var_name)
+
+    def _get_secret_run_var(self, var_name: str):
+        """Reads a single run variable from its own secret (per-variable layout)."""
+        if self.env == Env.TEST:
+            # GCP dev variables
+            dev_var_name = f"DEV_{var_name}"
+            try:
+                return CredentialsManager().get_secret_value(dev_var_name)
+            except:
+                return CredentialsManager().get_secret_value(var_name)
+        return CredentialsManager().get_secret_value(var_name)
+
+    @property
+    def config_bundle_secret_name(self):
+        if self.env == Env.TEST:
+            return f"DEV_{Config.CONFIG_BUNDLE_SECRET}"
+        return Config.CONFIG_BUNDLE_SECRET
+
+    def _get_config_bundle(self):
+        """Returns the run variables from the environment's JSON config bundle.
+
+        The bundle is fetched with a single secret access, then reused for
+        RUN_VAR_CACHE_TTL seconds. The version can be pinned with the AOTW_CONFIG_VERSION
+        environment variable. Returns None if no bundle exists, in which case variables
+        are read from their individual secrets. Other failures are not cached, so the next
+        lookup tries the bundle again.
+        """
+        cached = Config._config_bundles.get(self.env)
+        if cached is None or not Config._is_fresh(cached[1]):
+            version = os.environ.get("AOTW_CONFIG_VERSION", "latest")
+            try:
+                raw_bundle = CredentialsManager().get_secret_value(
+                    self.config_bundle_secret_name, version=version
+                )
+                bundle = self._parse_config_bundle(raw_bundle)
+            except Exception as e:
+                print(f"No config bundle available, using per-variable secrets: {e}")
+                response = getattr(e, "response", None)
+                if getattr(response, "status_code", None) == 404:
+                    Config._config_bundles[self.env] = (None, time.monotonic())
+                return None
+            Config._config_bundles[self.env] = (bundle, time.monotonic())
+            self._check_snapshot(bundle)
+            return bundle
+        return cached[0]
+
+    def _parse_config_bundle(self, raw_bundle):
+        bundle = json.loads(raw_bundle)
+        if bundle.get("schema_version") != Config.CONFIG_BUNDLE_SCHEMA_VERSION:
+            raise ValueError(
+                f"Unsupported config bundle schema: {bundle.get('schema_version')}"
+            )
+        return bundle["values"]
+
+    @classmethod
+    def build_config_bundle(cls, env):
+        """Assembles a config bundle for an environment from the per-variable secrets.
+
+        Does not resolve the rest of the config, so it works before any bundle exists.
+        Variables without a secret are left out, so lookups fall back to their own secret.
+        """
+        config = cls.__new__(cls)
+        config.env = config._get_env(env)
+        values = {}
+        for var_name in Config.CONFIG_BUNDLE_VARS:
+            try:
+                values[var_name] = config._get_secret_run_var(var_name)
+            except Exception:
+                print(f"{var_name} not found, leaving it out of the bundle")
+        return {
+            "schema_version": Config.CONFIG_BUNDLE_SCHEMA_VERSION,
+            "values": values,
+        }
 
     def _read_json_file(self, path):
         try:
@@ -1,7 +1,9 @@
 import datetime
+import re
 
 
 class DateHelper:
+    FRACTION_PATTERN = re.compile(r"\.(\d+)")
 
     def __init__(self, current_date: datetime.datetime):
         self.current_date = current_date
@@ -99,3 +101,33 @@ class DateHelper:
         """
 
         return abs((weekday_as_int_2 - weekday_as_int_1) % 7)
+
+    def parse_timestamp(timestamp):
+        """Parses an RFC 3339 timestamp, such as the Forms API "2024-05-06T17:03:12.345Z", into a UTC datetime.
+
+        Fractional seconds of any precision are accepted.
+
+        Args:
+            timestamp: The timestamp string.
+
+        Returns:
+            A timezone-aware datetime in UTC.
+        """
+
+        value = timestamp.replace("Z", "+00:00")
+        value = DateHelper.FRACTION_PATTERN.sub(
+            lambda match: "." + match.group(1)[:6].ljust(6, "0"), value, count=1
+        )
+        parsed = datetime.datetime.fromisoformat(value)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+        return parsed.astimezone(datetime.timezone.utc)
+
+    def format_timestamp(timestamp):
+        """Formats a datetime in the same RFC 3339 "Z" form the Forms API uses."""
+        timespec = "microseconds" if timestamp.microsecond % 1000 else "milliseconds"
+        return (
+            timestamp.astimezone(datetime.timezone.utc)
+            .isoformat(timespec=timespec)
+            .replace("+00:00", "Z")
+        )
@@ -1,61 +1,338 @@
 from AOTW.logic.config import Env
 from AOTW.logic.communications import OpenAIAPI, GoogleCloudStorage
-import re
+from AOTW.logic.fun_facts_store import FunFactsMetrics, FunFactsStore
+from AOTW.logic.templates import EmailTemplates, format_fun_facts
 import html
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 
 
 class EmailManager:
+    # Reference blobs rarely change, trust a cached copy for this long
+    REFERENCE_CACHE_TTL = 60 * 60
+    # How long the announcement waits for fun facts before using fallback content
+    FUN_FACTS_DEADLINE_SECONDS = 20
+    FUN_FACTS_FALLBACK = "We couldn't dig up fun facts about $album by $artist in time this week. Happy listening!"
+
+    fun_facts_executor = ThreadPoolExecutor(
+        max_workers=4, thread_name_prefix="fun-facts"
+    )
+
     def __init__(self, config, emailer):
         self.config = config
         self.emailer = emailer
-        self.send_email_func = emailer.send_email
+        self.fun_facts_store = FunFactsStore()
+        self.fun_facts_metrics = FunFactsMetrics(config)
+        # (album, artist) -> (future, started_at) for fun facts being generated
+        self.pending_fun_facts = {}
+        # Completed once a late result has been handled, for finish_pending to wait on
+        self.late_fun_facts_handled = []
+
+    @property
+    def send_email_func(self):
+        # Resolved on use so a LazyClient emailer is only built when an email is sent
+        return self.emailer.send_email
 
     def read_fun_fact_prompt_template(self):
         blob_name = f"reference/fun_fact_prompt.txt"
         gcs_client = GoogleCloudStorage()
-        fun_fact_prompt = gcs_client.read_txt(blob_name)
+        fun_fact_prompt = gcs_client.read_txt(
+            blob_name, cache_ttl=EmailManager.REFERENCE_CACHE_TTL
+        )
         return fun_fact_prompt
 
-    def get_fun_facts(self, album, artist):
+    def _fun_fact_prompt(self, album, artist):
         prompt = self.read_fun_fact_prompt_template()
-        prompt = prompt.replace("$album", album).replace("$artist", artist)
+        return prompt.replace("$album", album).replace("$artist", artist)
+
+    def get_fun_facts(self, album, artist):
+        prompt = self._fun_fact_prompt(album, artist)
         open_ai = OpenAIAPI(self.config.openai_api_key)
         fun_facts = open_ai.send_prompt(prompt)
+        return self.format_fun_facts(fun_facts)
+
+    def _stream_fun_facts(self, album, artist):
+        prompt = self._fun_fact_prompt(album, artist)
+        open_ai = OpenAIAPI(self.config.openai_api_key)
+        fun_facts = "".join(open_ai.stream_prompt(prompt)).strip()
+        return self.format_fun_facts(fun_facts)
+
+    def _generate_fun_facts(self, album, artist):
+        fun_facts = self._stream_fun_facts(album, artist)
+        self._store_fun_facts(album, artist, fun_facts, source="live")
+        return fun_facts
+
+    def start_fun_facts(self, album, artist):
+        """
+        Starts generating fun facts in the background, so they are ready by the time the email is sent.
+
+        Albums with stored fun facts, from the batch job or an earlier run, are not
+        generated again. A new result is kept in the fun facts store as soon as it arrives,
+        so it is not lost when nothing waits for it in this run.
+        """
+
+        key = (album, artist)
+        if key not in self.pending_fun_facts:
+            stored = self._read_stored_fun_facts(album, artist)
+            if stored is not None:
+                self.fun_facts_metrics.record("served_from_store", album=album)
+                future = Future()
+                future.set_result(stored)
+            else:
+                future = EmailManager.fun_facts_executor.submit(
+                    self._generate_fun_facts, album, artist
+                )
+            self.pending_fun_facts[key] = (future, time.monotonic())
+        return self.pending_fun_facts[key][0]
+
+    def _read_stored_fun_facts(self, album, artist):
+        try:
+            return self.fun_facts_store.get(album, artist)
+        except Exception as e:
+            print(f"Could not read stored fun facts: {e}")
+            return None
+
+    def _fallback_fun_facts(self, album, artist):
+        fun_facts = self._read_stored_fun_facts(album, artist)
+        if fun_facts is not None:
+            return fun_facts, "fallback_cached"
+        fallback = EmailManager.FUN_FACTS_FALLBACK.replace(
+            "$album", album.capitalize()
+        ).replace("$artist", artist.capitalize())
+        return html.escape(fallback), "fallback_template"
+
+    def _store_fun_facts(self, album, artist, fun_facts, source):
+        try:
+            self.fun_facts_store.put(album, artist, fun_facts, source=source)
+            return True
+        except Exception as e:
+            print(f"Could not store fun facts: {e}")
+            return False
+
+    def _record_late_fun_facts(self, album, future):
+        if future.exception() is not None:
+            print(f"Late fun facts for {album} failed: {future.exception()}")
+            return
+        self.fun_facts_metrics.record("late_results_stored", album=album)
+
+    def get_fun_facts_within_deadline(self, album, artist, deadline=None):
+        """
+        Returns fun facts HTML, waiting at most deadline seconds from when generation started.
+
+        If generation is late or fails, stored fun facts for the album or a templated
+        message is returned instead, and a late result is stored once it arrives.
+        """
+
+        if deadline is None:
+            deadline = EmailManager.FUN_FACTS_DEADLINE_SECONDS
+        future = self.start_fun_facts(album, artist)
+        _, started_at = self.pending_fun_facts[(album, artist)]
+        remaining = deadline - (time.monotonic() - started_at)
+        wait([future], timeout=max(remaining, 0))
+        elapsed = time.monotonic() - started_at
+
+        if future.done() and future.exception() is None:
+            del self.pending_fun_facts[(album, artist)]
+            fun_facts = future.result()
+            self.fun_facts_metrics.record("requests", "on_time", seconds=elapsed)
+            return fun_facts
+
+        fun_facts, fallback_event = self._fallback_fun_facts(album, artist)
+        if future.done():
+            del self.pending_fun_facts[(album, artist)]
+            print(f"Fun facts generation failed: {future.exception()}")
+            self.fun_facts_metrics.record(
+                "requests", "failures", fallback_event, seconds=elapsed
+            )
+        else:
+            print(f"Fun facts missed the {deadline}s deadline, using fallback")
+            handled = Future()
 
-        # conver to right html format
-        fun_facts = html.escape(fun_facts)
-        fun_facts = fun_facts.replace("\n", "<br>")
-        fun_facts = re.sub(r"\\'", "'", fun_facts)
-        fun_facts = re.sub(
-            r"\s{2,}", " ", fun_facts
-        )  # Replaces two or more spaces with a single space
-        fun_facts = fun_facts.strip()
-        # add spaces between fun facts and rest of introduction
-        fun_facts = fun_facts.replace("1.", "<br><br>1.")
-        fun_facts = re.sub(r"(<br>\s*){3,}", "<br><br>", fun_facts)
+            def handle_late(late):
+                try:
+                    self._record_late_fun_facts(album, late)
+                finally:
+                    handled.set_result(None)
 
+            self.late_fun_facts_handled.append(handled)
+            future.add_done_callback(handle_late)
+            self.fun_facts_metrics.record(
+                "requests", "deadline_hits", fallback_event, seconds=elapsed
+            )
         return fun_facts
 
-    def send_aotw_email(self, chooser_name):
-        subject = "New AOTW!"
+    def finish_pending(self, timeout=60):
+        """
+        Waits up to timeout seconds for late fun facts, so they are stored before the run ends.
 
-        body = f"""Time for a new AOTW! It is {chooser_name}'s turn to choose an album.<br><br>Please submit your AOTW here: {self.config.aotw_form_link}<br><br>Here's the playlist: {self.config.playlist_link}"""
+        Then writes the run's fun facts metrics, in a single GCS update.
+        """
+
+        started_at = time.monotonic()
+        futures = [future for future, _ in self.pending_fun_facts.values()]
+        if futures:
+            wait(futures, timeout=timeout)
+        # Callbacks run after wait returns, so wait for them to finish as well
+        if self.late_fun_facts_handled:
+            remaining = timeout - (time.monotonic() - started_at)
+            wait(self.late_fun_facts_handled, timeout=max(remaining, 0))
+        self.pending_fun_facts = {}
+        self.late_fun_facts_handled = []
+        self.fun_facts_metrics.flush()
+
+    def generate_fun_facts_batch(
+        self, pairs, overwrite=False, poll_seconds=None, timeout=None
+    ):
+        """
+        Generates fun facts for many albums as a single OpenAI batch job and stores them.
+
+        Pairs naming the same album (ignoring case and surrounding whitespace) are sent
+        once, and albums that already have stored fun facts are skipped unless overwrite
+        is set. Waits for the batch to finish, which can take up to its 24h window.
+
+        The submitted batch is recorded in the fun facts store until its results are
+        collected. If waiting times out or the process stops, the next call resumes
+        that batch instead of submitting the pairs again; pairs that are not part of it
+        are left for the call after. Call finish_pending afterwards to write the metrics.
+
+        Args:
+            pairs: (album, artist) tuples, e.g. the picks of several groups or weeks.
+            overwrite: Whether to regenerate albums that already have stored fun facts.
+
+        Returns:
+            A dict of the stored fun facts HTML by (album, artist).
+        """
+
+        open_ai = OpenAIAPI(self.config.openai_api_key)
+        job = self.fun_facts_store.get_batch_job()
+        if job is not None:
+            batch_id = job["batch_id"]
+            pending = {key: tuple(pair) for key, pair in job["pairs"].items()}
+            print(f"Resuming batch {batch_id} with {len(pending)} prompts")
+        else:
+            pending = {}
+            for album, artist in pairs:
+                pending.setdefault(FunFactsStore.key(album, artist), (album, artist))
+            if not overwrite:
+                for key in self.fun_facts_store.stored_keys() & pending.keys():
+                    del pending[key]
+            if not pending:
+                print("No fun facts to generate")
+                return {}
+            prompts = {
+                key: self._fun_fact_prompt(album, artist)
+                for key, (album, artist) in pending.items()
+            }
+            batch_id = open_ai.submit_batch(
+                prompts, metadata={"job": "fun_facts", "env": self.config.env.value}
+            )
+            self.fun_facts_store.put_batch_job(batch_id, pending)
+
+        try:
+            batch = open_ai.wait_for_batch(
+                batch_id, poll_seconds=poll_seconds, timeout=timeout
+            )
+        except RuntimeError:
+            # The batch failed or was cancelled, there is nothing left to resume
+            self.fun_facts_store.clear_batch_job()
+            self.fun_facts_metrics.record("batch_failures", prompts=len(pending))
+            raise
+        except Exception:
+            print(f"Batch {batch_id} is still recorded, rerun to resume it")
+            self.fun_facts_metrics.record("batch_failures", prompts=len(pending))
+            raise
+        results = open_ai.read_batch_results(batch)
+
+        stored = {}
+        for key, text in results.items():
+            album, artist = pending[key]
+            fun_facts = self.format_fun_facts(text)
+            if self._store_fun_facts(album, artist, fun_facts, source="batch"):
+                stored[(album, artist)] = fun_facts
+        events = ["batch_requests"] + ["batch_results_stored"] * len(stored)
+        self.fun_facts_metrics.record(*events, prompts=len(pending), stored=len(stored))
+        print(f"Stored fun facts for {len(stored)} of {len(pending)} albums")
+        self.fun_facts_store.clear_batch_job()
+        return stored
+
+    def format_fun_facts(self, fun_facts):
+        # conver to right html format, memoized
+        return format_fun_facts(fun_facts)
+
+    def render_stats_section(self, stats: dict, top_n: int = 3):
+        """
+        Renders listening stats, as kept by StatsManager, as an HTML email section.
+
+        Args:
+            stats: The aggregate stats.
+            top_n: How many artists to list.
+
+        Returns:
+            The HTML section, or an empty string if no weeks have been recorded yet.
+        """
+
+        if not stats or not stats.get("weeks_recorded"):
+            return ""
+        picks = sorted(
+            stats["picks_per_participant"].items(), key=lambda item: (-item[1], item[0])
+        )
+        artists = sorted(
+            stats["artist_counts"].items(), key=lambda item: (-item[1], item[0])
+        )[:top_n]
+
+        lines = [f"<b>AOTW stats</b> ({stats['weeks_recorded']} weeks so far)"]
+        lines.extend(
+            f"{html.escape(email.split('@')[0])}: {count} picks"
+            for email, count in picks
+        )
+        if artists:
+            lines.append(
+                "Most picked artists: "
+                + ", ".join(
+                    f"{html.escape(artist.title())} ({count})"
+                    for artist, count in artists
+                )
+            )
+        lines.append(
+            f"Current streak: {stats['current_streak']} weeks (longest {stats['longest_streak']})"
+        )
+        return "<br>".join(lines)
+
+    def send_aotw_email(self, chooser_name, stats: dict = None):
+        subject = EmailTemplates.render("aotw_subject")
+
+        body = EmailTemplates.render(
+            "aotw_body",
+            chooser_name=chooser_name,
+            form_link=self.config.aotw_form_link,
+            playlist_footer=EmailTemplates.fragment(
+                "playlist_footer", playlist_link=self.config.playlist_link
+            ),
+        )
+        stats_section = self.render_stats_section(stats)
+        if stats_section:
+            body += f"<br><br>{stats_section}"
 
         self.send_email_func(self.config.get_participant_emails(), subject, body)
 
     def send_reminder_email(self, days_left: int):
-        subject = f"AOTW Reminder - {days_left} Days Left to Listen"
-        body = (
-            f"Remember to listen to the AOTW! You have {days_left} days left to listen."
-        )
+        subject = EmailTemplates.render("reminder_subject", days_left=days_left)
+        body = EmailTemplates.render("reminder_body", days_left=days_left)
         self.send_email_func(self.config.get_participant_emails(), subject, body)
 
-    def send_aotw_chosen_email(self, album: str, artist: str):
-        subject = (
-            f"Get ready to listen to {album.capitalize()} by {artist.capitalize()}!"
+    def send_aotw_chosen_email(self, album: str, artist: str, fun_facts: str = None):
+        names = {"album": album.capitalize(), "artist": artist.capitalize()}
+        subject = EmailTemplates.render("chosen_subject", **names)
+        if fun_facts is None:
+            fun_facts = self.get_fun_facts_within_deadline(album, artist)
+        body = EmailTemplates.render(
+            "chosen_body",
+            **names,
+            listen_footer=EmailTemplates.fragment(
+                "listen_footer", playlist_link=self.config.playlist_link
+            ),
+            fun_facts=fun_facts,
         )
-        fun_facts = self.get_fun_facts(album, artist)
-        body = f"A new AOTW has been chosen: {album.capitalize()} by {artist.capitalize()}.<br><br>Listen to it here: {self.config.playlist_link}!<br><br>{fun_facts}"
         self.send_email_func(self.config.get_participant_emails(), subject, body)
 
     def _print_email_to_terminal(recipients, subject, body):
@@ -1,19 +1,168 @@
-import os
-import json
+import datetime
+import re
 
 from AOTW.logic.communications import FormAPI, GoogleCloudStorage
+from AOTW.logic.submission import Submission
+from AOTW.logic.date_helper import DateHelper
 
 
 class FormManager:
+    # The log is sharded by month, so logging a response only rewrites the current month.
+    # Each shard is stored most recent first, which lets readers stop scanning early.
+    SUBMISSIONS_PREFIX = "form_submissions/"
+    SHARD_PATTERN = re.compile(r"(\d{4})-(\d{2})\.json")
+    # Single log written before sharding, read after every shard as it is older
+    LEGACY_SUBMISSIONS_BLOB = "form_submissions/submissions.json"
+
     def __init__(self, config, form_handler: FormAPI):
         self.config = config
         self.form_handler = form_handler
 
+    def _shard_blob(self, timestamp: datetime.datetime):
+        utc_timestamp = timestamp.astimezone(datetime.timezone.utc)
+        return f"{FormManager.SUBMISSIONS_PREFIX}{utc_timestamp:%Y-%m}.json"
+
     def _log_submissions(self, submissions):
+        """
+        Merges submissions into their monthly shards, keeping anything a concurrent run logged meanwhile.
+
+        Returns:
+            A list of the submissions that were not logged before, most recent first.
+        """
+
+        shards = {}
+        for submission in submissions:
+            shards.setdefault(self._shard_blob(submission.timestamp), []).append(
+                submission
+            )
+
+        gcs_client = GoogleCloudStorage()
+        new_submissions = []
+        for blob_name, shard_submissions in shards.items():
+            shard_new = []
+
+            def merge(submission_data):
+                logged = [
+                    Submission.from_dict(entry) for entry in submission_data or []
+                ]
+                logged_keys = {submission.key for submission in logged}
+                shard_new[:] = [
+                    submission
+                    for submission in shard_submissions
+                    if submission.key not in logged_keys
+                ]
+                if not shard_new:
+                    return None
+                merged = logged + shard_new
+                merged.sort(key=lambda submission: submission.timestamp, reverse=True)
+                return [submission.to_dict() for submission in merged]
+
+            gcs_client.update_json(blob_name, merge, compact=True)
+            new_submissions.extend(shard_new)
+        new_submissions.sort(key=lambda submission: submission.timestamp, reverse=True)
+        return new_submissions
+
+    def _submission_blobs(self, min_timestamp=None):
+        """Returns the log's blob names, most recent first, skipping months before min_timestamp."""
+        gcs_client = GoogleCloudStorage()
+        names = gcs_client.list_blob_names(FormManager.SUBMISSIONS_PREFIX)
+        shards = []
+        for name in names:
+            match = FormManager.SHARD_PATTERN.fullmatch(
+                name[len(FormManager.SUBMISSIONS_PREFIX) :]
+            )
+            if match is not None:
+                shards.append(((int(match[1]), int(match[2])), name))
+        shards.sort(reverse=True)
+
+        blob_names = []
+        for (year, month), name in shards:
+            if min_timestamp is not None:
+                utc_min = min_timestamp.astimezone(datetime.timezone.utc)
+                if (year, month) < (utc_min.year, utc_min.month):
+                    return blob_names
+            blob_names.append(name)
+        if FormManager.LEGACY_SUBMISSIONS_BLOB in names:
+            blob_names.append(FormManager.LEGACY_SUBMISSIONS_BLOB)
+        return blob_names
+
+    def iter_logged_submissions(
+        self, user_email=None, min_timestamp=None, max_timestamp=None
+    ):
+        """
+        Streams logged submissions matching the filters, most recent first.
+
+        The filters are applied to the raw records while the log is streamed. Months before
+        min_timestamp are not read, and the scan stops at the first older submission.
+
+        Args:
+            user_email: Optional email address to filter submissions by user.
+            min_timestamp: Optional aware datetime; older submissions are not read.
+            max_timestamp: Optional aware datetime; newer submissions are skipped.
+
+        Yields:
+            Submission records.
+        """
+
+        predicate = None
+        if user_email:
+            predicate = lambda record: record.get("user_email") == user_email
+        stop_when = None
+        if min_timestamp:
+            stop_when = (
+                lambda record: DateHelper.parse_timestamp(record["timestamp"])
+                < min_timestamp
+            )
+
         gcs_client = GoogleCloudStorage()
-        gcs_client.write_to_json(submissions, "form_submissions/submissions.json")
+        for blob_name in self._submission_blobs(min_timestamp):
+            records = gcs_client.iter_json_records(
+                blob_name, predicate=predicate, stop_when=stop_when
+            )
+            for record in records:
+                submission = Submission.from_dict(record)
+                if max_timestamp and submission.timestamp > max_timestamp:
+                    continue
+                yield submission
+
+    def ingest_new_submissions(self):
+        """
+        Fetches only the responses newer than the submissions log and appends them to it.
+
+        Returns:
+            A list of the newly logged Submission records, most recent first.
+        """
+
+        # The log is most recent first, so its first record is the watermark
+        latest = next(self.iter_logged_submissions(), None)
+        watermark = latest.timestamp if latest is not None else None
+        fetched = self.form_handler.get_form_submissions(
+            form_id=self.config.aotw_form_id, min_timestamp_filter=watermark
+        )
+        new_submissions = self._log_submissions(fetched or [])
+        if not new_submissions:
+            print("No new form submissions")
+            return []
+
+        print(f"{len(new_submissions)} new submissions logged")
+        return new_submissions
+
+    def renew_submission_watch(self):
+        """Keeps the Forms response watch that drives push ingestion alive."""
+        topic = self.config.forms_watch_topic
+        if not topic:
+            return None
+        watch = self.form_handler.renew_watch(self.config.aotw_form_id, topic)
+        print(f"Form watch {watch.get('id')} expires {watch.get('expireTime')}")
+        return watch
 
     def retrieve_and_log_submissions(self):
+        """
+        Fetches every form response and logs the ones missing from the log.
+
+        A full resync; the scheduled runs only fetch new responses with ingest_new_submissions.
+        """
+
         submissions = self.form_handler.get_form_submissions(
             form_id=self.config.aotw_form_id
         )
@@ -22,6 +171,15 @@ class FormManager:
             return None
         else:
             print("Logging google form submissions...")
-            self._log_submissions(submissions)
+            logged_keys = {
+                submission.key for submission in self.iter_logged_submissions()
+            }
+            self._log_submissions(
+                [
+                    submission
+                    for submission in submissions
+                    if submission.key not in logged_keys
+                ]
+            )
             print(f"{len(submissions)} total submissions logged")
         return submissions
@@ -0,0 +1,152 @@
+import collections
+import datetime
+import hashlib
+import json
+import threading
+
+from AOTW.logic.config import Config, Env
+from AOTW.logic.communications import GoogleCloudStorage
+
+
+class FunFactsStore:
+    """
+    Generated fun facts HTML kept in GCS, keyed by album and artist.
+
+    Read before generating, so an album's fun facts are only generated once, whether by
+    the batch job or a live run. Also used as the fallback when generation misses its
+    deadline.
+    """
+
+    PREFIX = "fun_facts/"
+    # The batch job in flight, so a rerun resumes it instead of submitting a duplicate
+    BATCH_JOB_BLOB = "batches/fun_facts.json"
+    CACHE_TTL = 24 * 60 * 60
+
+    def key(album, artist):
+        normalized = f"{album.strip().lower()}|{artist.strip().lower()}"
+        return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+    def _blob_name(self, album, artist):
+        return f"{FunFactsStore.PREFIX}{FunFactsStore.key(album, artist)}.json"
+
+    def get(self, album, artist):
+        """Returns the stored fun facts HTML for an album, or None."""
+        gcs_client = GoogleCloudStorage()
+        entry = gcs_client.read_json(
+            self._blob_name(album, artist), cache_ttl=FunFactsStore.CACHE_TTL
+        )
+        if entry is None:
+            return None
+        return entry["fun_facts"]
+
+    def stored_keys(self):
+        """Returns the keys of every album with stored fun facts, in one listing."""
+        gcs_client = GoogleCloudStorage()
+        return {
+            blob_name[len(FunFactsStore.PREFIX) :].removesuffix(".json")
+            for blob_name in gcs_client.list_blob_names(FunFactsStore.PREFIX)
+        }
+
+    def get_batch_job(self):
+        """Returns the batch job submitted but not yet collected, or None."""
+        return GoogleCloudStorage().read_json(FunFactsStore.BATCH_JOB_BLOB, cache_ttl=0)
+
+    def put_batch_job(self, batch_id, pairs: dict):
+        """
+        Records a submitted batch job.
+
+        Args:
+            pairs: The (album, artist) of each prompt, by custom id.
+        """
+
+        job = {
+            "batch_id": batch_id,
+            "pairs": {key: list(pair) for key, pair in pairs.items()},
+            "submitted_at": datetime.datetime.now(tz=datetime.timezone.utc).isoformat(),
+        }
+        GoogleCloudStorage().write_to_json(job, FunFactsStore.BATCH_JOB_BLOB)
+
+    def clear_batch_job(self):
+        GoogleCloudStorage().delete_blob(FunFactsStore.BATCH_JOB_BLOB)
+
+    def put(self, album, artist, fun_facts, source):
+        """
+        Stores fun facts HTML for an album, replacing any previous version.
+
+        Args:
+            source: How the facts were generated, "live" or "batch".
+        """
+
+        entry = {
+            "album": album,
+            "artist": artist,
+            "fun_facts": fun_facts,
+            "source": source,
+            "generated_at": datetime.datetime.now(tz=datetime.timezone.utc).isoformat(),
+        }
+        gcs_client = GoogleCloudStorage()
+        gcs_client.write_to_json(entry, self._blob_name(album, artist))
+
+
+class FunFactsMetrics:
+    """
+    Counters for fun facts generation against its deadline.
+
+    Every event is printed as a structured log line (picked up by Cloud Logging) and
+    counted in memory. The counts are added to a small counters blob per environment
+    by flush, once per run, so recording never waits on GCS.
+    """
+
+    COUNTERS = (
+        "requests",
+        "on_time",
+        "deadline_hits",
+        "failures",
+        "fallback_cached",
+        "fallback_template",
+        "late_results_stored",
+        "served_from_store",
+        "batch_requests",
+        "batch_results_stored",
+        "batch_failures",
+    )
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.counts = collections.Counter()
+        # Late results are recorded from the fun facts threads
+        self.lock = threading.Lock()
+
+    @property
+    def blob_name(self):
+        if self.config.env == Env.PROD:
+            return "metrics/fun_facts.json"
+        return "metrics/test/fun_facts.json"
+
+    def record(self, *events, **details):
+        print(
+            json.dumps(
+                {"metric": "fun_facts", "events": events, **details}, default=str
+            )
+        )
+
+        with self.lock:
+            self.counts.update(events)
+
+    def flush(self):
+        """Adds the counts recorded since the last flush to the counters blob."""
+        with self.lock:
+            counts, self.counts = self.counts, collections.Counter()
+        if not counts:
+            return
+
+        def increment(counters):
+            counters = counters or {counter: 0 for counter in FunFactsMetrics.COUNTERS}
+            for event, count in counts.items():
+                counters[event] = counters.get(event, 0) + count
+            return counters
+
+        try:
+            GoogleCloudStorage().update_json(self.blob_name, increment)
+        except Exception as e:
+            print(f"Could not record fun facts metrics: {e}")
@@ -0,0 +1,88 @@
+import base64
+import json
+
+from AOTW.logic.aotw_manager import AOTWManager
+
+
+class SubmissionIngestor:
+    """
+    Handles Google Forms watch notifications delivered through Pub/Sub.
+
+    A RESPONSES notification only says that the form changed, so the ingestor reads the
+    responses submitted since the last logged one and lets the AOTWManager update the week.
+    """
+
+    RESPONSES_EVENT = "RESPONSES"
+
+    def __init__(self, manager: AOTWManager):
+        self.manager = manager
+        self.config = manager.config
+
+    def is_submission_notification(self, message: dict):
+        attributes = message.get("attributes") or {}
+        return (
+            attributes.get("eventType") == SubmissionIngestor.RESPONSES_EVENT
+            and attributes.get("formId") == self.config.aotw_form_id
+        )
+
+    def handle_message(self, message: dict, update_playlist=False):
+        """
+        Ingests the responses announced by a Pub/Sub message.
+
+        Args:
+            message: The Pub/Sub message, with the Forms notification in its attributes.
+            update_playlist: Whether to update the playlist as soon as the chooser submits.
+
+        Returns:
+            A list of the newly logged Submission records.
+        """
+
+        if not self.is_submission_notification(message):
+            print(f"Ignoring message: {message.get('attributes')}")
+            return []
+        return self.manager.ingest_submissions(update_playlist=update_playlist)
+
+
+class InProcessPubSub:
+    """
+    A local stand-in for Pub/Sub push delivery.
+
+    Messages published to a topic are delivered synchronously to every subscribed handler,
+    in the same envelope format a push subscription would POST.
+    """
+
+    def __init__(self):
+        self.subscribers = {}
+        self.published_count = 0
+
+    def subscribe(self, topic_name, handler):
+        self.subscribers.setdefault(topic_name, []).append(handler)
+
+    def publish(self, topic_name, data=b"", attributes=None):
+        self.published_count += 1
+        message = {
+            "data": base64.b64encode(data).decode("utf-8"),
+            "attributes": attributes or {},
+            "messageId": str(self.published_count),
+        }
+        envelope = {"message": message, "subscription": f"{topic_name}-push"}
+        return [handler(envelope) for handler in self.subscribers.get(topic_name, [])]
+
+    def publish_form_response(self, topic_name, form_id):
+        """Publishes a message shaped like a Forms RESPONSES watch notification."""
+        return self.publish(
+            topic_name,
+            attributes={
+                "formId": form_id,
+                "eventType": SubmissionIngestor.RESPONSES_EVENT,
+                "watchId": "local",
+            },
+        )
+
+
+def decode_message_data(message: dict):
+    """Returns the JSON body of a Pub/Sub message, or None if it has no data."""
+    data = message.get("data")
+    if not data:
+        return None
+    return json.loads(base64.b64decode(data))
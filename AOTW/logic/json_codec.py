@@ -0,0 +1,99 @@
+"""JSON encoding helpers that use orjson when it is installed and fall back to the json module."""
+
+import codecs
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(data, indent=None):
+    """Serializes data to UTF-8 JSON bytes.
+
+    Args:
+        data: A JSON serializable object.
+        indent: Indentation for pretty printing. If None, output is compact.
+
+    Returns:
+        The encoded JSON as bytes.
+    """
+
+    if indent is None:
+        if orjson is not None:
+            return orjson.dumps(data)
+        return json.dumps(data, separators=(",", ":")).encode("utf-8")
+    return json.dumps(data, indent=indent).encode("utf-8")
+
+
+def loads(data):
+    """Parses JSON from bytes or str."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+ARRAY_SEPARATORS = " \t\n\r,"
+# Characters that can follow an item of an array, so the item is known to be complete
+ITEM_DELIMITERS = ARRAY_SEPARATORS + "]"
+
+
+def iter_array(stream, chunk_size=64 * 1024):
+    """Yields the items of a top-level JSON array from a binary stream, one at a time.
+
+    The stream is read chunk_size bytes at a time, so memory use is bounded by the chunk
+    size and the largest single item rather than by the size of the document.
+
+    Args:
+        stream: A binary file-like object containing a JSON array.
+        chunk_size: Number of bytes to read at a time.
+
+    Raises:
+        ValueError: If the stream does not contain a JSON array.
+    """
+
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    position = 0
+    started = False
+    eof = False
+
+    while True:
+        while position < len(buffer) and buffer[position] in ARRAY_SEPARATORS:
+            position += 1
+
+        needs_data = position == len(buffer)
+        if not needs_data and started and buffer[position] != "]":
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+                # A number split across chunks decodes as a shorter value (e.g. "-2" of
+                # "-2.5"), so an item only counts once a delimiter follows it
+                needs_data = not eof and (
+                    end == len(buffer) or buffer[end] not in ITEM_DELIMITERS
+                )
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                needs_data = True
+
+        if needs_data:
+            if eof:
+                raise ValueError("Unexpected end of JSON array")
+            chunk = stream.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[position:] + text_decoder.decode(chunk, final=eof)
+            position = 0
+            continue
+
+        if not started:
+            if buffer[position] != "[":
+                raise ValueError("Expected a JSON array")
+            started = True
+            position += 1
+        elif buffer[position] == "]":
+            return
+        else:
+            position = end
+            yield item
@@ -1,18 +1,192 @@
-from AOTW.logic.communications import SpotifyAPI
+import time
+
+from AOTW.logic.communications import GoogleCloudStorage, SpotifyAPI
 from AOTW.logic.album import Album
-from AOTW.logic.config import Config
+from AOTW.logic.config import Config, Env
 
 
 class PlaylistManager:
+    # How long a run's claim on an album it is appending to the archive is honoured
+    ARCHIVE_CLAIM_SECONDS = 10 * 60
+
     def __init__(self, config: Config, spotify_client: SpotifyAPI):
         self.config = config
         self.spotify_client = spotify_client
 
-    def update_playlist(self, aotw: Album):
+    def resolve_album(self, aotw: Album):
+        """Looks up the album on Spotify and returns its URI and track URIs."""
         album_uri = self.spotify_client.search_album(
             artist_name=aotw.artist, album_name=aotw.album
         )
-        self.spotify_client.overwrite_playlist_with_album(
-            playlist_id=self.config.playlist_id, album_uri=album_uri
+        track_uris = self.spotify_client.get_album_track_uris(album_uri)
+        return {"album_uri": album_uri, "track_uris": track_uris}
+
+    def update_playlist(self, aotw: Album, staged: dict = None):
+        """
+        Overwrites the AOTW playlist with the album's tracks.
+
+        Args:
+            aotw: The album of the week.
+            staged: Optional prefetched result of resolve_album, which skips the lookups.
+
+        Returns:
+            The resolve_album result that was used.
+        """
+
+        resolved = staged or self.resolve_album(aotw)
+        self.spotify_client.overwrite_playlist_with_tracks(
+            playlist_id=self.config.playlist_id, track_uris=resolved["track_uris"]
         )
         print(f"Playlist updated to {aotw.album} by {aotw.artist}")
+        return resolved
+
+    @property
+    def archive_state_blob(self):
+        if self.config.env == Env.PROD:
+            return "playlists/archive_state.json"
+        return "playlists/test/archive_state.json"
+
+    def empty_archive_state():
+        # pending holds albums whose tracks are not all appended yet, with the time a run
+        # claimed them, or None once that run gave up
+        return {"snapshot_id": None, "albums": [], "pending": {}}
+
+    def update_archive_playlist(self, aotw: Album, staged: dict = None):
+        """
+        Appends the album's tracks to the all-time archive playlist, unless already there.
+
+        The albums in the playlist are kept in a state blob together with the playlist's
+        snapshot_id. Membership is only read back from Spotify when the snapshot_id shows
+        the playlist was changed elsewhere, so a normal week costs a snapshot lookup, one
+        append, one state read and two small state writes.
+
+        An album is claimed in the state before its tracks are appended, so concurrent runs
+        do not both append it, and only recorded once every chunk was appended. After a
+        failed append, the next run appends the tracks that are still missing. The claim
+        has to land before the append and the new snapshot_id is only known after it, so
+        these stay two writes. Each is conditional on the generation of the previous one,
+        so neither reads the state again unless another run wrote it meanwhile.
+
+        Args:
+            aotw: The album of the week.
+            staged: Optional prefetched result of resolve_album, which skips the lookups.
+
+        Returns:
+            Whether tracks were appended.
+        """
+
+        playlist_id = self.config.archive_playlist_id
+        if not playlist_id:
+            return False
+        resolved = staged or self.resolve_album(aotw)
+        album_uri = resolved["album_uri"]
+        if album_uri is None:
+            print(f"{aotw.album} by {aotw.artist} not found, archive not updated")
+            return False
+
+        gcs_client = GoogleCloudStorage()
+        current = gcs_client.read_json_with_generation(self.archive_state_blob)
+        state = current[0] or PlaylistManager.empty_archive_state()
+        snapshot_id = self.spotify_client.get_playlist_snapshot_id(playlist_id)
+        if snapshot_id == state["snapshot_id"]:
+            if album_uri in state["albums"]:
+                print("Archive playlist already has this album")
+                return False
+            tracks_by_album = None
+            missing = resolved["track_uris"]
+        else:
+            print("Archive playlist was changed elsewhere, reading its tracks")
+            tracks_by_album = self.spotify_client.get_playlist_tracks_by_album(
+                playlist_id
+            )
+            present = tracks_by_album.get(album_uri, set())
+            missing = [uri for uri in resolved["track_uris"] if uri not in present]
+
+        if missing:
+            claimed, current = self._claim_archive_album(album_uri, current)
+            if not claimed:
+                print("Another run is adding this album to the archive playlist")
+                return False
+            try:
+                snapshot_id = self.spotify_client.append_tracks(playlist_id, missing)
+            except Exception:
+                self._release_archive_album(album_uri)
+                raise
+            print(f"Added {aotw.album} by {aotw.artist} to the archive playlist")
+        else:
+            print("Archive playlist already has this album")
+
+        self._record_archive_album(
+            album_uri, state["snapshot_id"], snapshot_id, tracks_by_album, current
+        )
+        return bool(missing)
+
+    def _claim_archive_album(self, album_uri, current):
+        """
+        Marks the album as being appended, unless it is present or another run has it.
+
+        Returns:
+            Whether the album was claimed, and the state's (data, generation) afterwards.
+        """
+        now = time.time()
+        claimed = []
+
+        def claim(state):
+            state = state or PlaylistManager.empty_archive_state()
+            pending = state.get("pending", {})
+            claimed_at = pending.get(album_uri)
+            claimed[:] = []
+            if album_uri in state["albums"] or (
+                claimed_at is not None
+                and now - claimed_at < PlaylistManager.ARCHIVE_CLAIM_SECONDS
+            ):
+                return None
+            claimed.append(album_uri)
+            return {**state, "pending": {**pending, album_uri: now}}
+
+        current = GoogleCloudStorage().update_json_with_generation(
+            self.archive_state_blob, claim, current=current
+        )
+        return bool(claimed), current
+
+    def _release_archive_album(self, album_uri):
+        """Keeps a failed album pending, free for the next run to finish."""
+
+        def release(state):
+            state = state or PlaylistManager.empty_archive_state()
+            return {**state, "pending": {**state.get("pending", {}), album_uri: None}}
+
+        try:
+            GoogleCloudStorage().update_json(self.archive_state_blob, release)
+        except Exception as e:
+            print(f"Could not release the archive playlist claim: {e}")
+
+    def _record_archive_album(
+        self, album_uri, read_snapshot_id, snapshot_id, tracks_by_album, current
+    ):
+        def record(state):
+            state = state or PlaylistManager.empty_archive_state()
+            pending = {
+                uri: claimed_at
+                for uri, claimed_at in state.get("pending", {}).items()
+                if uri != album_uri
+            }
+            albums = set(state["albums"])
+            if tracks_by_album is not None:
+                # Albums still pending are only partly in the playlist
+                albums.update(uri for uri in tracks_by_album if uri not in pending)
+            albums.add(album_uri)
+            if state["snapshot_id"] != read_snapshot_id:
+                # Another run recorded a change meanwhile, so the next run reads the playlist
+                snapshot_id_to_store = None
+            else:
+                snapshot_id_to_store = snapshot_id
+            return {
+                "snapshot_id": snapshot_id_to_store,
+                "albums": sorted(albums),
+                "pending": pending,
+            }
+
+        GoogleCloudStorage().update_json_with_generation(
+            self.archive_state_blob, record, current=current
+        )
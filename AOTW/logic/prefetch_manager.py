@@ -0,0 +1,134 @@
+from google.api_core.exceptions import PreconditionFailed
+
+from AOTW.logic.album import Album
+from AOTW.logic.config import Config, Env
+from AOTW.logic.date_helper import DateHelper
+from AOTW.logic.communications import GoogleCloudStorage
+from AOTW.logic.email_manager import EmailManager
+from AOTW.logic.playlist_manager import PlaylistManager
+
+
+class PrefetchManager:
+    """
+    Resolves a pick's Spotify tracks and starts its fun facts as soon as it is submitted.
+
+    Spotify results are staged in GCS keyed by submission id, with a per-week pointer to the
+    submission currently staged. When the chooser submits again, the previous results
+    are discarded and the new pick is staged instead. Fun facts are generated in the
+    background and kept in the fun facts store, so a slow completion never holds up
+    the run that prefetches.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        playlist_manager: PlaylistManager,
+        email_manager: EmailManager,
+    ):
+        self.config = config
+        self.playlist_manager = playlist_manager
+        self.email_manager = email_manager
+
+    @property
+    def staging_prefix(self):
+        if self.config.env == Env.PROD:
+            return "prefetch/"
+        return "prefetch/test/"
+
+    def _staged_blob(self, submission_id):
+        return f"{self.staging_prefix}{submission_id}.json"
+
+    def _pointer_blob(self, week):
+        return f"{self.staging_prefix}week_{week}.json"
+
+    def prefetch(self, aotw: Album):
+        """
+        Stages the Spotify lookup for the week's pick and starts generating its fun facts.
+
+        Does nothing if the pick is already staged. The week's pointer only moves to a
+        newer submission, so a slow prefetch of an older pick cannot replace a newer one.
+
+        Returns:
+            The staged data, or None if a newer pick was staged meanwhile.
+        """
+
+        gcs_client = GoogleCloudStorage()
+        pointer = gcs_client.read_json(self._pointer_blob(aotw.week), cache_ttl=0)
+        if pointer is not None and pointer["submission_id"] == aotw.submission_id:
+            print(f"{aotw.album} by {aotw.artist} is already prefetched")
+            return gcs_client.read_json(
+                self._staged_blob(aotw.submission_id), cache_ttl=0
+            )
+
+        print(f"Prefetching {aotw.album} by {aotw.artist}...")
+        self.email_manager.start_fun_facts(aotw.album, aotw.artist)
+        staged = {
+            "submission_id": aotw.submission_id,
+            "album": aotw.album,
+            "artist": aotw.artist,
+            **self.playlist_manager.resolve_album(aotw),
+        }
+        try:
+            # Staged results never change once written
+            gcs_client.write_to_json(
+                staged,
+                self._staged_blob(aotw.submission_id),
+                if_generation_match=0,
+            )
+        except PreconditionFailed:
+            print("A concurrent run already staged this pick")
+
+        replaced = []
+        superseded = []
+
+        def point_to_submission(current_pointer):
+            replaced[:] = []
+            superseded[:] = []
+            if current_pointer is not None:
+                if current_pointer["submission_id"] == aotw.submission_id:
+                    return None
+                if PrefetchManager._is_newer(current_pointer, aotw):
+                    superseded.append(aotw.submission_id)
+                    return None
+                replaced.append(current_pointer["submission_id"])
+            return {
+                "submission_id": aotw.submission_id,
+                "submitted_at": aotw.submitted_at,
+            }
+
+        gcs_client.update_json(self._pointer_blob(aotw.week), point_to_submission)
+        # The pick that lost is never used, whether it is the old one or this one
+        for submission_id in replaced + superseded:
+            gcs_client.delete_blob(self._staged_blob(submission_id))
+        if superseded:
+            print("A newer pick was staged meanwhile, discarding this one")
+            return None
+        print("Prefetch staged")
+        return staged
+
+    def _is_newer(pointer, aotw: Album):
+        """Whether the pointer's submission was made after the album's."""
+        if pointer.get("submitted_at") is None or aotw.submitted_at is None:
+            return False
+        return DateHelper.parse_timestamp(
+            pointer["submitted_at"]
+        ) > DateHelper.parse_timestamp(aotw.submitted_at)
+
+    def get_staged(self, aotw: Album):
+        """
+        Returns the staged data for the album, or None if it was not prefetched.
+        """
+
+        if aotw.submission_id is None:
+            return None
+        gcs_client = GoogleCloudStorage()
+        # Staged blobs are written once per submission id, so a cached copy stays valid
+        staged = gcs_client.read_json(
+            self._staged_blob(aotw.submission_id), cache_ttl=60 * 60
+        )
+        if staged is None or (staged["album"], staged["artist"]) != (
+            aotw.album,
+            aotw.artist,
+        ):
+            return None
+        return staged
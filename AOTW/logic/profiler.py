@@ -0,0 +1,165 @@
+"""Per-invocation sampling CPU and tracemalloc memory profiling, uploaded to GCS."""
+
+import contextlib
+import datetime
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+
+from AOTW.logic.communications import GoogleCloudStorage
+
+
+class Profiler:
+    """
+    Samples the stack of every thread and traces allocations for the duration of one run.
+
+    Stacks are written in the collapsed format ("root;caller;callee count" per line) read
+    by flamegraph.pl and speedscope. Sampling is wall-clock, so threads blocked on I/O show
+    up too, under their thread name.
+
+    Args:
+        run_id: Identifies the run, used as the GCS folder of the reports.
+        interval: Seconds between stack samples.
+        import_seconds: Optional time taken to import main, included in the summary.
+    """
+
+    PREFIX = "profiles/"
+    SAMPLE_INTERVAL = 0.005
+    TRACEBACK_DEPTH = 15
+    TOP_ALLOCATIONS = 50
+
+    def __init__(self, run_id, interval=SAMPLE_INTERVAL, import_seconds=None):
+        self.run_id = run_id
+        self.interval = interval
+        self.import_seconds = import_seconds
+        self.stacks = Counter()
+        self.samples = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.snapshot = None
+        self.traced_peak_bytes = None
+        self.wall_seconds = None
+        self.cpu_seconds = None
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(Profiler.TRACEBACK_DEPTH)
+        self.started_at = time.perf_counter()
+        self.cpu_started_at = time.process_time()
+        self.thread = threading.Thread(
+            target=self._sample_loop, name="aotw-profiler", daemon=True
+        )
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+        self.wall_seconds = time.perf_counter() - self.started_at
+        self.cpu_seconds = time.process_time() - self.cpu_started_at
+        self.snapshot = tracemalloc.take_snapshot()
+        _, self.traced_peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    def _sample_loop(self):
+        own_ident = threading.get_ident()
+        while not self.stop_event.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own_ident:
+                    self.stacks[Profiler.collapse(names.get(ident, ident), frame)] += 1
+            self.samples += 1
+
+    def collapse(thread_name, frame):
+        """Returns the stack ending at frame as a root-first, semicolon separated string."""
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            filename = os.path.basename(code.co_filename)
+            frames.append(f"{code.co_name} ({filename}:{code.co_firstlineno})")
+            frame = frame.f_back
+        frames.append(str(thread_name))
+        return ";".join(reversed(frames))
+
+    def collapsed_stacks(self):
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.stacks.most_common()
+        )
+
+    def top_allocations(self):
+        """Returns the largest live allocations at the end of the run, with their tracebacks."""
+        snapshot = self.snapshot.filter_traces(
+            [
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            ]
+        )
+        lines = []
+        statistics = snapshot.statistics("traceback")
+        for stat in statistics[: Profiler.TOP_ALLOCATIONS]:
+            lines.append(f"{stat.size / 1024:.1f} KiB in {stat.count} blocks")
+            lines.extend(f"    {line}" for line in stat.traceback.format())
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        return {
+            "run_id": self.run_id,
+            "import_seconds": self.import_seconds,
+            "wall_seconds": self.wall_seconds,
+            "cpu_seconds": self.cpu_seconds,
+            "samples": self.samples,
+            "sample_interval": self.interval,
+            "traced_peak_bytes": self.traced_peak_bytes,
+        }
+
+    def upload(self):
+        """Uploads the reports to profiles/{run_id}/ and returns that folder."""
+        folder = f"{Profiler.PREFIX}{self.run_id}/"
+        gcs_client = GoogleCloudStorage()
+        gcs_client.write_txt(self.collapsed_stacks(), f"{folder}stacks.collapsed.txt")
+        gcs_client.write_txt(self.top_allocations(), f"{folder}allocations.txt")
+        gcs_client.write_to_json(self.summary(), f"{folder}summary.json")
+        print(f"Profile uploaded to gs://{GoogleCloudStorage.BUCKET_NAME}/{folder}")
+        return folder
+
+
+def is_enabled(payload=None):
+    """Profiling is on when AOTW_PROFILE is set, or the event asks for it with "profile": true."""
+    if os.environ.get("AOTW_PROFILE", "").lower() in ("1", "true"):
+        return True
+    return str((payload or {}).get("profile")).lower() == "true"
+
+
+def new_run_id(task):
+    timestamp = datetime.datetime.now(tz=datetime.timezone.utc).strftime(
+        "%Y%m%dT%H%M%SZ"
+    )
+    return f"{timestamp}-{task}-{uuid.uuid4().hex[:8]}"
+
+
+@contextlib.contextmanager
+def profiled(task, enabled, import_seconds=None):
+    """
+    Profiles the body of the with block when enabled, yielding the Profiler or None.
+
+    When disabled nothing is started, so the cost is a single function call. Upload
+    failures are logged rather than raised so profiling never fails a run.
+    """
+
+    if not enabled:
+        yield None
+        return
+    profiler = Profiler(new_run_id(task), import_seconds=import_seconds)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        try:
+            profiler.upload()
+        except Exception as e:
+            print(f"Could not upload profile {profiler.run_id}: {e}")
@@ -0,0 +1,292 @@
+"""Deadlines, retries, circuit breaking and hedged requests for the backend clients in communications.py."""
+
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from openai import APIConnectionError
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CallPolicy:
+    """
+    How calls to a backend are bounded and retried.
+
+    Args:
+        deadline: Seconds allowed for the call, including every retry.
+        max_attempts: Maximum number of attempts.
+        base_delay: Backoff before the first retry, doubled for every further retry.
+        max_delay: Upper bound for a single backoff.
+        hedge_after: Seconds after which an idempotent read is sent a second time, or None.
+    """
+
+    def __init__(
+        self,
+        deadline=30,
+        max_attempts=4,
+        base_delay=0.5,
+        max_delay=8,
+        hedge_after=None,
+    ):
+        self.deadline = deadline
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge_after = hedge_after
+
+    def backoff(self, attempt, retry_after=None):
+        """Full-jitter exponential backoff, never shorter than the server's Retry-After."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+
+class CircuitBreaker:
+    """
+    Stops calling a backend after repeated transient failures.
+
+    After failure_threshold consecutive failures the circuit opens and calls fail fast.
+    Once reset_timeout has passed a single trial call is let through; its outcome closes
+    or re-opens the circuit.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if self.trial_in_flight:
+                return False
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    print(
+                        f"Circuit for {self.name} opened after {self.failures} failures"
+                    )
+                self.opened_at = time.monotonic()
+
+
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+TRANSIENT_EXCEPTIONS = (
+    ConnectionError,
+    TimeoutError,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    APIConnectionError,
+)
+
+POLICIES = {
+    "gcs": CallPolicy(deadline=30, hedge_after=2),
+    "gmail": CallPolicy(deadline=30, max_attempts=3),
+    "forms": CallPolicy(deadline=30),
+    "secrets": CallPolicy(deadline=15),
+    "spotify": CallPolicy(deadline=30, hedge_after=2),
+    "openai": CallPolicy(deadline=120, max_attempts=2, base_delay=2),
+}
+BREAKERS = {backend: CircuitBreaker(backend) for backend in POLICIES}
+
+# Sized for the async facades, which can keep dozens of calls in flight
+executor = ThreadPoolExecutor(max_workers=64, thread_name_prefix="aotw-call")
+
+
+def _get_status(error):
+    """Extracts the HTTP status from the error types raised by the backend libraries."""
+    for attribute in ("status_code", "http_status"):
+        status = getattr(error, attribute, None)
+        if isinstance(status, int):
+            return status
+    resp = getattr(error, "resp", None)  # googleapiclient HttpError
+    if resp is not None and getattr(resp, "status", None) is not None:
+        return int(resp.status)
+    response = getattr(error, "response", None)
+    if response is not None and isinstance(getattr(response, "status_code", None), int):
+        return response.status_code
+    code = getattr(error, "code", None)  # google.api_core exceptions
+    if isinstance(code, int):
+        return code
+    return None
+
+
+def _get_retry_after(error):
+    """Returns the Retry-After delay in seconds advertised with a rate-limit error, if any."""
+    headers = getattr(error, "headers", None)
+    if headers is None:
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None)
+    if headers is None:
+        headers = getattr(error, "resp", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_transient(error):
+    if isinstance(error, TRANSIENT_EXCEPTIONS):
+        return True
+    return _get_status(error) in RETRYABLE_STATUSES
+
+
+def _is_retryable(error, idempotent):
+    if idempotent:
+        return is_transient(error)
+    # Only retry writes the server has told us it did not process
+    return _get_status(error) == 429
+
+
+def _run_attempt(func, timeout, hedge_after):
+    futures = [executor.submit(func)]
+    started_at = time.monotonic()
+    if hedge_after is not None and hedge_after < timeout:
+        done, _ = wait(futures, timeout=hedge_after)
+        if not done:
+            futures.append(executor.submit(func))
+
+    errors = []
+    while futures:
+        remaining = timeout - (time.monotonic() - started_at)
+        done, pending = wait(
+            futures, timeout=max(remaining, 0), return_when=FIRST_COMPLETED
+        )
+        if not done:
+            raise DeadlineExceeded(f"Call did not finish within {timeout:.1f}s")
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            errors.append(future.exception())
+        futures = list(pending)
+    raise errors[0]
+
+
+def call(backend, func, idempotent=True, hedge=False):
+    """
+    Calls func under the backend's deadline, retry, circuit breaker and hedging policy.
+
+    Args:
+        backend: The backend name, a key of POLICIES.
+        func: A zero argument callable making the request.
+        idempotent: Whether the request can safely be repeated. Non-idempotent requests
+            are only retried when the backend rate-limited them.
+        hedge: Whether a slow attempt may be raced against a second identical request.
+            Only used for idempotent reads.
+
+    Returns:
+        The result of func.
+
+    Raises:
+        CircuitOpenError: If the backend's circuit is open.
+        DeadlineExceeded: If the deadline passes before a call succeeds.
+    """
+
+    policy = POLICIES[backend]
+    breaker = BREAKERS[backend]
+    hedge_after = policy.hedge_after if hedge and idempotent else None
+    deadline_at = time.monotonic() + policy.deadline
+
+    for attempt in range(policy.max_attempts):
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit for {backend} is open")
+        remaining = deadline_at - time.monotonic()
+        try:
+            result = _run_attempt(func, remaining, hedge_after)
+        except DeadlineExceeded:
+            breaker.record_failure()
+            raise
+        except Exception as e:
+            if not is_transient(e):
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            if not _is_retryable(e, idempotent) or attempt + 1 >= policy.max_attempts:
+                raise
+            delay = policy.backoff(attempt, _get_retry_after(e))
+            if time.monotonic() + delay >= deadline_at:
+                raise
+            print(f"{backend} call failed ({e}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+        breaker.record_success()
+        return result
+
+
+async def call_async(backend, make_call, idempotent=True):
+    """
+    The asyncio counterpart of call, for clients with native coroutines. Does not hedge.
+
+    Args:
+        backend: The backend name, a key of POLICIES.
+        make_call: A zero argument callable returning a new awaitable for each attempt.
+        idempotent: Whether the request can safely be repeated.
+
+    Returns:
+        The result of the awaitable.
+
+    Raises:
+        CircuitOpenError: If the backend's circuit is open.
+        DeadlineExceeded: If the deadline passes before a call succeeds.
+    """
+
+    policy = POLICIES[backend]
+    breaker = BREAKERS[backend]
+    deadline_at = time.monotonic() + policy.deadline
+
+    for attempt in range(policy.max_attempts):
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit for {backend} is open")
+        remaining = deadline_at - time.monotonic()
+        try:
+            result = await asyncio.wait_for(make_call(), timeout=max(remaining, 0))
+        except asyncio.TimeoutError:
+            breaker.record_failure()
+            raise DeadlineExceeded(f"Call did not finish within {remaining:.1f}s")
+        except Exception as e:
+            if not is_transient(e):
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            if not _is_retryable(e, idempotent) or attempt + 1 >= policy.max_attempts:
+                raise
+            delay = policy.backoff(attempt, _get_retry_after(e))
+            if time.monotonic() + delay >= deadline_at:
+                raise
+            print(f"{backend} call failed ({e}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            continue
+        breaker.record_success()
+        return result
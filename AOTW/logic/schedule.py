@@ -0,0 +1,133 @@
+import calendar
+import datetime
+
+from AOTW.logic.config import Config
+from AOTW.logic.date_helper import DateHelper
+
+
+class DayPlan:
+    """The daily email due on a weekday: the AOTW email, or a reminder with days_left."""
+
+    AOTW = "aotw"
+    REMINDER = "reminder"
+
+    __slots__ = ("kind", "weekday", "days_left")
+
+    def __init__(self, kind: str, weekday: int, days_left: int = None):
+        self.kind = kind
+        self.weekday = weekday
+        self.days_left = days_left
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """
+        Raises:
+            ValueError: If the plan is not a valid AOTW or reminder plan.
+        """
+
+        kind = data.get("kind")
+        weekday = data.get("weekday")
+        if kind not in (DayPlan.AOTW, DayPlan.REMINDER):
+            raise ValueError(f"Invalid plan kind: {kind}")
+        if not isinstance(weekday, int) or not 0 <= weekday <= 6:
+            raise ValueError(f"Invalid plan weekday: {weekday}")
+        days_left = data.get("days_left")
+        if kind == DayPlan.REMINDER and not isinstance(days_left, int):
+            raise ValueError(f"Invalid plan days_left: {days_left}")
+        return cls(kind, weekday, days_left)
+
+    def to_dict(self):
+        return {"kind": self.kind, "weekday": self.weekday, "days_left": self.days_left}
+
+    def __eq__(self, other):
+        return isinstance(other, DayPlan) and self.to_dict() == other.to_dict()
+
+    def __str__(self):
+        day = calendar.day_name[self.weekday]
+        if self.kind == DayPlan.AOTW:
+            return f"{day}: AOTW email"
+        return f"{day}: reminder, {self.days_left} days left"
+
+
+class ScheduleCompiler:
+    """
+    Turns AOTW_DAY and REMINDER_DAYS into the days that have an email to send.
+
+    The output can be used as send dates, cron expressions or a Cloud Scheduler manifest,
+    so daily_email is only invoked on days with work, carrying that day's plan.
+    """
+
+    def __init__(self, aotw_day_as_int: int, reminder_days_as_ints):
+        self.aotw_day_as_int = aotw_day_as_int
+        self.reminder_days_as_ints = list(reminder_days_as_ints)
+
+    @classmethod
+    def from_config(cls, config: Config):
+        return cls(config.get_aotw_day_as_int(), config.get_reminder_days_as_int())
+
+    def plan_for_weekday(self, weekday: int):
+        """Returns the DayPlan for a weekday (0 for Monday), or None if nothing is sent."""
+        if weekday == self.aotw_day_as_int:
+            return DayPlan(DayPlan.AOTW, weekday)
+        if weekday in self.reminder_days_as_ints:
+            days_left = DateHelper.days_between_weekday_ints(
+                weekday, self.aotw_day_as_int
+            )
+            return DayPlan(DayPlan.REMINDER, weekday, days_left)
+        return None
+
+    def plan_for(self, date: datetime.date):
+        return self.plan_for_weekday(date.weekday())
+
+    def weekly_plans(self):
+        """Returns the DayPlan of every weekday with an email, Monday first."""
+        plans = (self.plan_for_weekday(weekday) for weekday in range(7))
+        return [plan for plan in plans if plan is not None]
+
+    def send_dates(self, start: datetime.date, end: datetime.date):
+        """
+        Returns (date, DayPlan) for every date from start to end inclusive with an email.
+        """
+
+        plans = {plan.weekday: plan for plan in self.weekly_plans()}
+        dates = []
+        date = start
+        while date <= end:
+            if date.weekday() in plans:
+                dates.append((date, plans[date.weekday()]))
+            date += datetime.timedelta(days=1)
+        return dates
+
+    def cron_weekday(weekday: int):
+        """Converts a Python weekday (0 for Monday) to a cron weekday (0 for Sunday)."""
+        return (weekday + 1) % 7
+
+    def cron_expressions(self, hour: int = 9, minute: int = 0):
+        """Returns (cron expression, DayPlan), one per weekday with an email."""
+        return [
+            (
+                f"{minute} {hour} * * {ScheduleCompiler.cron_weekday(plan.weekday)}",
+                plan,
+            )
+            for plan in self.weekly_plans()
+        ]
+
+    def scheduler_manifest(
+        self, env: str, hour: int = 9, minute: int = 0, time_zone="US/Pacific"
+    ):
+        """
+        Returns the Cloud Scheduler jobs that call the router on the days with an email.
+
+        Each job's body is the router payload, including the day's plan so daily_email
+        does not have to work it out again.
+        """
+
+        return [
+            {
+                "name": f"aotw-{env}-{plan.kind}-{calendar.day_name[plan.weekday].lower()}",
+                "schedule": cron,
+                "time_zone": time_zone,
+                "body": {"task": "daily_email", "env": env, "plan": plan.to_dict()},
+            }
+            for cron, plan in self.cron_expressions(hour, minute)
+        ]
@@ -0,0 +1,150 @@
+from AOTW.logic.album import Album
+from AOTW.logic.config import Config, Env
+from AOTW.logic.communications import GoogleCloudStorage
+
+
+class StatsManager:
+    """
+    Keeps listening statistics as a small aggregate blob, updated as each week is logged.
+
+    The aggregate holds per-participant pick counts, artist counts and streaks, plus the
+    pick recorded for each week so a replaced pick can be taken back out of the counts.
+    Recording a week only touches that week's counters, so stats never need the album
+    history; rebuild() recomputes everything from the weekly album files if needed.
+    """
+
+    SCHEMA_VERSION = 1
+
+    def __init__(self, config: Config):
+        self.config = config
+
+    @property
+    def blob_name(self):
+        if self.config.env == Env.PROD:
+            return "stats/listening_stats.json"
+        return "stats/test/listening_stats.json"
+
+    def empty_stats():
+        return {
+            "schema_version": StatsManager.SCHEMA_VERSION,
+            "weeks": {},
+            "picks_per_participant": {},
+            "artist_counts": {},
+            "weeks_recorded": 0,
+            "latest_week": None,
+            "current_streak": 0,
+            "longest_streak": 0,
+        }
+
+    def artist_key(artist):
+        return " ".join(artist.lower().split())
+
+    def _increment(counts, key, amount):
+        counts[key] = counts.get(key, 0) + amount
+        if counts[key] <= 0:
+            del counts[key]
+
+    def apply(stats, aotw: Album):
+        """
+        Adds a logged week to stats in place.
+
+        Returns:
+            True if stats changed, False if the week was already recorded with this pick.
+        """
+
+        week = str(aotw.week)
+        pick = {
+            "chooser": aotw.chooser,
+            "album": aotw.album,
+            "artist": aotw.artist,
+            "submission_id": aotw.submission_id,
+        }
+        previous = stats["weeks"].get(week)
+        if previous == pick:
+            return False
+
+        if previous is not None:
+            # The pick for this week was replaced, take the old one back out
+            if previous["chooser"] is not None:
+                StatsManager._increment(
+                    stats["picks_per_participant"], previous["chooser"], -1
+                )
+            StatsManager._increment(
+                stats["artist_counts"], StatsManager.artist_key(previous["artist"]), -1
+            )
+        else:
+            stats["weeks_recorded"] += 1
+            latest_week = stats["latest_week"]
+            if latest_week is None or aotw.week > latest_week:
+                if latest_week is not None and aotw.week == latest_week + 1:
+                    stats["current_streak"] += 1
+                else:
+                    stats["current_streak"] = 1
+                stats["latest_week"] = aotw.week
+                stats["longest_streak"] = max(
+                    stats["longest_streak"], stats["current_streak"]
+                )
+            # Weeks logged out of order only count towards streaks after a rebuild
+
+        if aotw.chooser is not None:
+            StatsManager._increment(stats["picks_per_participant"], aotw.chooser, 1)
+        StatsManager._increment(
+            stats["artist_counts"], StatsManager.artist_key(aotw.artist), 1
+        )
+        stats["weeks"][week] = pick
+        return True
+
+    def record(self, aotw: Album):
+        """Adds a logged week's pick to the stored stats."""
+        if aotw.week is None:
+            return
+
+        def merge(stats):
+            stats = stats or StatsManager.empty_stats()
+            if not StatsManager.apply(stats, aotw):
+                return None
+            return stats
+
+        gcs_client = GoogleCloudStorage()
+        gcs_client.update_json(self.blob_name, merge)
+
+    def get_stats(self):
+        gcs_client = GoogleCloudStorage()
+        stats = gcs_client.read_json(self.blob_name, cache_ttl=0)
+        return stats or StatsManager.empty_stats()
+
+    def rebuild(self):
+        """
+        Recomputes the stats from every weekly album file and overwrites the stored stats.
+
+        Returns:
+            The rebuilt stats.
+        """
+
+        gcs_client = GoogleCloudStorage()
+        albums = []
+        prefix = self.config.album_log_prefix
+        for blob_name in gcs_client.list_blob_names(prefix):
+            week = blob_name[len(prefix) :].removesuffix(".json")
+            if not week.isdigit():
+                continue
+            data = gcs_client.read_json(blob_name)
+            if data is None:
+                continue
+            try:
+                aotw = Album.from_dict(data)
+            except ValueError as e:
+                print(f"Skipping {blob_name}: {e}")
+                continue
+            aotw.week = int(week)
+            if aotw.chooser is None:
+                # Files logged before the chooser was recorded, use the rotation
+                participants = self.config.get_participant_emails()
+                aotw.chooser = participants[aotw.week % len(participants)]
+            albums.append(aotw)
+
+        stats = StatsManager.empty_stats()
+        for aotw in sorted(albums, key=lambda album: album.week):
+            StatsManager.apply(stats, aotw)
+        gcs_client.write_to_json(stats, self.blob_name)
+        return stats
@@ -0,0 +1,64 @@
+import hashlib
+
+from AOTW.logic.date_helper import DateHelper
+
+
+class Submission:
+    """A single AOTW form submission.
+
+    The timestamp is parsed once, when the record is created, into an aware UTC datetime.
+    """
+
+    __slots__ = ("user_email", "timestamp", "album", "artist")
+
+    REQUIRED_FIELDS = ("user_email", "timestamp", "album", "artist")
+
+    def __init__(self, user_email: str, timestamp, album: str, artist: str):
+        self.user_email = user_email
+        if isinstance(timestamp, str):
+            timestamp = DateHelper.parse_timestamp(timestamp)
+        self.timestamp = timestamp
+        self.album = album
+        self.artist = artist
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """Builds a Submission from its JSON representation, validating the schema.
+
+        Raises:
+            ValueError: If a required field is missing or is not a string.
+        """
+
+        for field in cls.REQUIRED_FIELDS:
+            if not isinstance(data.get(field), str):
+                raise ValueError(
+                    f"Invalid submission, bad or missing '{field}': {data}"
+                )
+        return cls(
+            user_email=data["user_email"],
+            timestamp=data["timestamp"],
+            album=data["album"],
+            artist=data["artist"],
+        )
+
+    @property
+    def key(self):
+        """Identifies the submission; a respondent cannot submit twice at the same instant."""
+        return (self.user_email, self.timestamp)
+
+    @property
+    def submission_id(self):
+        """A short stable identifier, used to key data derived from this submission."""
+        key = f"{self.user_email}|{DateHelper.format_timestamp(self.timestamp)}"
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+    def to_dict(self):
+        return {
+            "user_email": self.user_email,
+            "timestamp": DateHelper.format_timestamp(self.timestamp),
+            "album": self.album,
+            "artist": self.artist,
+        }
+
+    def __str__(self):
+        return f"Submission: {self.album} by {self.artist} from {self.user_email}"
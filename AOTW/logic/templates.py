@@ -0,0 +1,168 @@
+"""Email templates, loaded from GCS once per process, and memoized HTML fragments."""
+
+import functools
+from string import Template
+
+from AOTW.logic.communications import GoogleCloudStorage
+
+# What html.escape(quote=True) produces for each character it escapes
+HTML_ESCAPES = {
+    "&": "&amp;",
+    "<": "&lt;",
+    ">": "&gt;",
+    '"': "&quot;",
+    "'": "&#x27;",
+}
+BR = "<br>"
+
+
+@functools.lru_cache(maxsize=256)
+def format_fun_facts(fun_facts):
+    """
+    Converts LLM output to the HTML block shown in the AOTW chosen email, in a single pass.
+
+    Equivalent to the original chain: html.escape, newlines to <br>, whitespace runs
+    collapsed to one space, strip, "<br><br>" before every "1." and runs of three or
+    more <br> (with the whitespace after them) reduced to "<br><br>". Runs of <br> are
+    held back until it is known whether they reach three.
+    """
+
+    out = []
+    whitespace = ""  # whitespace seen since the last visible token
+    br_run = []  # <br>s (and the whitespace between them) not written yet
+    br_count = 0
+    started = False  # whether anything visible was written, for the leading strip
+
+    def collapsed(run):
+        return " " if len(run) > 1 else run
+
+    def flush_br_run(trailing):
+        nonlocal br_run, br_count
+        if br_count >= 3:
+            out.append(BR * 2)
+        else:
+            out.extend(br_run)
+            out.append(trailing)
+        br_run = []
+        br_count = 0
+
+    def add_br():
+        nonlocal whitespace, br_count, started
+        if br_count:
+            br_run.append(collapsed(whitespace))
+        else:
+            if started:
+                out.append(collapsed(whitespace))
+        br_run.append(BR)
+        br_count += 1
+        whitespace = ""
+        started = True
+
+    length = len(fun_facts)
+    for i, char in enumerate(fun_facts):
+        if char == "\n":
+            add_br()
+        elif char.isspace():
+            whitespace += char
+        else:
+            if char == "1" and i + 1 < length and fun_facts[i + 1] == ".":
+                add_br()
+                add_br()
+            if br_count:
+                flush_br_run(collapsed(whitespace))
+            elif started:
+                out.append(collapsed(whitespace))
+            whitespace = ""
+            started = True
+            out.append(HTML_ESCAPES.get(char, char))
+
+    # Trailing whitespace is stripped
+    if br_count:
+        flush_br_run("")
+    return "".join(out)
+
+
+class EmailTemplates:
+    """
+    Email subjects and bodies as string.Template templates, using ${name} placeholders.
+
+    Templates in GCS under PREFIX (e.g. reference/templates/chosen_body.html) override the
+    built-in DEFAULTS. They are read and compiled once per process, on first use.
+    """
+
+    PREFIX = "reference/templates/"
+    DEFAULTS = {
+        "aotw_subject": "New AOTW!",
+        "aotw_body": "Time for a new AOTW! It is ${chooser_name}'s turn to choose an album.<br><br>Please submit your AOTW here: ${form_link}<br><br>${playlist_footer}",
+        "reminder_subject": "AOTW Reminder - ${days_left} Days Left to Listen",
+        "reminder_body": "Remember to listen to the AOTW! You have ${days_left} days left to listen.",
+        "chosen_subject": "Get ready to listen to ${album} by ${artist}!",
+        "chosen_body": "A new AOTW has been chosen: ${album} by ${artist}.<br><br>${listen_footer}<br><br>${fun_facts}",
+        "playlist_footer": "Here's the playlist: ${playlist_link}",
+        "listen_footer": "Listen to it here: ${playlist_link}!",
+    }
+
+    templates = None
+
+    def load():
+        """Reads the template overrides from GCS and compiles every template."""
+        sources = dict(EmailTemplates.DEFAULTS)
+        try:
+            gcs_client = GoogleCloudStorage()
+            for blob_name in gcs_client.list_blob_names(EmailTemplates.PREFIX):
+                name = blob_name[len(EmailTemplates.PREFIX) :].rsplit(".", 1)[0]
+                if name:
+                    sources[name] = gcs_client.read_txt(blob_name)
+        except Exception as e:
+            print(f"Could not load email templates, using the defaults: {e}")
+        EmailTemplates.templates = {
+            name: Template(source) for name, source in sources.items()
+        }
+        EmailTemplates.fragment.cache_clear()
+
+    def get(name):
+        if EmailTemplates.templates is None:
+            EmailTemplates.load()
+        return EmailTemplates.templates[name]
+
+    def render(name, **values):
+        """
+        Renders a template.
+
+        Raises:
+            KeyError: If the template or one of its placeholders' values is missing.
+        """
+
+        return EmailTemplates.get(name).substitute(values)
+
+    @functools.lru_cache(maxsize=256)
+    def fragment(name, **values):
+        """Renders a template that is reused across emails, such as a footer, memoized."""
+        return EmailTemplates.render(name, **values)
+
+    def render_bulk(name, per_recipient, **shared):
+        """
+        Renders a template for many recipients.
+
+        The values shared by every recipient are substituted once, and the partly rendered
+        template is compiled once, so each recipient only costs their own values.
+
+        Args:
+            name: The template name.
+            per_recipient: A list of dicts of each recipient's values.
+            **shared: Values shared by every recipient.
+
+        Returns:
+            The rendered strings, in the order of per_recipient.
+        """
+
+        template = EmailTemplates.get(name)
+        # Shared values are escaped, so they are not read as placeholders in the second pass
+        shared = {key: str(value).replace("$", "$$") for key, value in shared.items()}
+
+        def substitute_shared(match):
+            key = match.group("named") or match.group("braced")
+            return shared.get(key, match.group())
+
+        partial = Template(template.pattern.sub(substitute_shared, template.template))
+        return [partial.substitute(values) for values in per_recipient]
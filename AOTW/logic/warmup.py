@@ -0,0 +1,124 @@
+"""Initializes credentials and clients ahead of the first real request on an instance."""
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from AOTW.logic.config import Config
+from AOTW.logic.communications import (
+    CredentialsManager,
+    FormAPI,
+    GmailAPI,
+    GoogleCloudStorage,
+    OpenAIAPI,
+    SpotifyAPI,
+)
+from AOTW.logic.email_manager import EmailManager
+from AOTW.logic.templates import EmailTemplates
+
+TIMEOUT_SECONDS = 60
+
+last_report = None
+
+
+def _timed(part):
+    started_at = time.perf_counter()
+    try:
+        part()
+        result = {"status": "ok"}
+    except Exception as e:
+        result = {"status": "error", "error": str(e)}
+    result["seconds"] = round(time.perf_counter() - started_at, 3)
+    return result
+
+
+def warm_up(env, import_seconds=None):
+    """
+    Builds config, credentials, every backend client and the reference blobs in parallel.
+
+    Everything is kept in the process-level caches the tasks already use, so the next
+    request on this instance finds it ready. A failing part is reported and does not
+    stop the others.
+
+    Args:
+        env: The environment to warm up, "prod" or "test".
+        import_seconds: Optional time taken to import main, included in the report.
+
+    Returns:
+        A report with the seconds taken and status of each part.
+    """
+
+    global last_report
+    started_at = time.perf_counter()
+    config = None
+
+    def build_config():
+        nonlocal config
+        config = Config(env)
+        # Resolved before the fan-out, so the parts below do not fetch secrets concurrently
+        config.spotify_local_credentials
+        config.openai_api_key
+
+    parts = {"config": _timed(build_config)}
+    if config is not None:
+        tasks = {
+            "gcp_credentials": CredentialsManager._get_default_credentials,
+            "storage": GoogleCloudStorage,
+            "forms": FormAPI,
+            "gmail": lambda: GmailAPI(config.get_sender_email()),
+            "spotify": lambda: SpotifyAPI(config.spotify_local_credentials),
+            "openai": lambda: OpenAIAPI(config.openai_api_key),
+            "email_templates": lambda: EmailTemplates.get("aotw_body"),
+            "fun_fact_prompt": EmailManager(config, None).read_fun_fact_prompt_template,
+        }
+        executor = ThreadPoolExecutor(
+            max_workers=len(tasks), thread_name_prefix="aotw-warmup"
+        )
+        futures = {name: executor.submit(_timed, task) for name, task in tasks.items()}
+        wait(futures.values(), timeout=TIMEOUT_SECONDS)
+        # Parts still running are left to finish in the background
+        executor.shutdown(wait=False)
+        for name, future in futures.items():
+            parts[name] = (
+                future.result()
+                if future.done()
+                else {"status": "timeout", "seconds": TIMEOUT_SECONDS}
+            )
+
+    last_report = {
+        "env": env,
+        "import_seconds": import_seconds,
+        "total_seconds": round(time.perf_counter() - started_at, 3),
+        "parts": parts,
+    }
+    print(json.dumps({"warmup": last_report}))
+    return last_report
+
+
+def warm_state():
+    """Returns which clients are already built, to confirm requests hit warm paths."""
+    return {
+        "storage": GoogleCloudStorage.client is not None,
+        "forms": FormAPI.service is not None,
+        "gmail": GmailAPI.service is not None,
+        "spotify": SpotifyAPI.client is not None,
+        "openai": OpenAIAPI.client is not None,
+        "email_templates": EmailTemplates.templates is not None,
+        "warmed_up": last_report is not None,
+    }
+
+
+def warm_up_on_start(import_seconds=None):
+    """
+    Warms up while the instance starts when AOTW_WARMUP_ON_START is set.
+
+    The variable names the environment to warm up ("prod" or "test"); "1" or "true" mean prod.
+    """
+
+    env = os.environ.get("AOTW_WARMUP_ON_START", "").lower()
+    if not env or env in ("0", "false"):
+        return None
+    if env in ("1", "true"):
+        env = "prod"
+    return warm_up(env, import_seconds)
@@ -0,0 +1,114 @@
+"""Resolves the non-secret run variables of each environment into a frozen config snapshot.
+
+The snapshot is written as a Python module that ships with the function source, so Config
+loads those values with no lookups; only secrets are resolved at runtime. Each environment
+carries a checksum of its values, which Config also uses to spot a stale snapshot by
+comparing it with the config bundle before its first use.
+
+Usage:
+    python -m AOTW.scripts.build_config_snapshot [prod|test ...] [--check]
+
+With --check nothing is written; the exit status is 1 if the snapshot is missing or
+differs from the currently configured values.
+"""
+
+import importlib
+import os
+import pprint
+import sys
+
+from AOTW.logic.config import Config, Env
+from AOTW.logic.date_helper import DateHelper
+
+SNAPSHOT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "logic", "config_snapshot.py"
+)
+
+
+def resolve_values(env):
+    config = Config.__new__(Config)
+    config.env = Env(env)
+    values = {}
+    for var_name in Config.snapshot_vars():
+        try:
+            values[var_name] = config._lookup_run_var(var_name)
+        except Exception:
+            values[var_name] = None
+    return values
+
+
+def validate(env, values):
+    """
+    Raises:
+        ValueError: If a required variable is missing or a value is malformed.
+    """
+
+    missing = [
+        var_name
+        for var_name, value in values.items()
+        if value is None and var_name not in Config.OPTIONAL_VARS
+    ]
+    if missing:
+        raise ValueError(f"{env}: missing {', '.join(missing)}")
+    for day in [values["AOTW_DAY"], *values["REMINDER_DAYS"].split(",")]:
+        DateHelper.string_day_to_int(day)
+    for email in values["PARTICIPANT_EMAILS"].split(","):
+        if "@" not in email:
+            raise ValueError(f"{env}: invalid participant email {email!r}")
+
+
+def build_snapshot(envs):
+    environments = {}
+    for env in envs:
+        values = resolve_values(env)
+        validate(env, values)
+        environments[env] = {
+            "values": values,
+            "checksum": Config.snapshot_checksum(values),
+        }
+    return {
+        "schema_version": Config.CONFIG_SNAPSHOT_SCHEMA_VERSION,
+        "environments": environments,
+    }
+
+
+def write_snapshot(snapshot, path=SNAPSHOT_PATH):
+    with open(path, "w") as f:
+        f.write(
+            '"""Generated by AOTW/scripts/build_config_snapshot.py, do not edit."""\n\n'
+        )
+        f.write(f"SNAPSHOT = {pprint.pformat(snapshot, sort_dicts=True)}\n")
+
+
+def check_snapshot(envs):
+    try:
+        current = importlib.import_module("AOTW.logic.config_snapshot").SNAPSHOT
+    except ImportError:
+        print("No config snapshot has been built")
+        return False
+
+    fresh = True
+    for env in envs:
+        entry = current.get("environments", {}).get(env)
+        checksum = Config.snapshot_checksum(resolve_values(env))
+        if entry is None or entry["checksum"] != checksum:
+            print(f"{env}: config snapshot is stale")
+            fresh = False
+        else:
+            print(f"{env}: config snapshot is up to date ({checksum[:12]})")
+    return fresh
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    check = "--check" in args
+    envs = [arg for arg in args if arg != "--check"] or [e.value for e in Env]
+    if check:
+        sys.exit(0 if check_snapshot(envs) else 1)
+    snapshot = build_snapshot(envs)
+    write_snapshot(snapshot)
+    for env, entry in snapshot["environments"].items():
+        print(
+            f"{env}: {len(entry['values'])} variables, checksum {entry['checksum'][:12]}"
+        )
+    print(f"Wrote {SNAPSHOT_PATH}")
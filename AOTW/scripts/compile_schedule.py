@@ -0,0 +1,76 @@
+"""Compiles AOTW_DAY and REMINDER_DAYS into the schedule of days that have an email.
+
+Usage:
+    python -m AOTW.scripts.compile_schedule [prod|test] [--format manifest|cron|dates|gcloud]
+        [--hour 9] [--minute 0] [--weeks 4] [--uri ROUTER_URL]
+
+The gcloud format prints the commands creating one Cloud Scheduler job per day with an
+email, replacing the single daily job.
+"""
+
+import argparse
+import datetime
+import json
+import shlex
+
+from AOTW.logic.config import Config
+from AOTW.logic.schedule import ScheduleCompiler
+
+
+def compile_schedule(env, output_format, hour, minute, weeks, uri=None):
+    config = Config(env)
+    compiler = ScheduleCompiler.from_config(config)
+
+    if output_format == "cron":
+        return "\n".join(
+            f"{cron}  # {plan}"
+            for cron, plan in compiler.cron_expressions(hour, minute)
+        )
+    if output_format == "dates":
+        start = config.run_date
+        end = start + datetime.timedelta(weeks=weeks)
+        return "\n".join(
+            f"{date.isoformat()}  {plan}"
+            for date, plan in compiler.send_dates(start, end)
+        )
+
+    manifest = compiler.scheduler_manifest(config.env.value, hour, minute)
+    if output_format == "manifest":
+        return json.dumps(manifest, indent=4)
+    if uri is None:
+        raise ValueError("--uri is required for the gcloud format")
+    return "\n".join(
+        " ".join(
+            [
+                "gcloud scheduler jobs create http",
+                job["name"],
+                f"--schedule={shlex.quote(job['schedule'])}",
+                f"--time-zone={job['time_zone']}",
+                f"--uri={uri}",
+                "--http-method=POST",
+                "--headers=Content-Type=application/json",
+                f"--message-body={shlex.quote(json.dumps(job['body']))}",
+            ]
+        )
+        for job in manifest
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("env", nargs="?", default="prod")
+    parser.add_argument(
+        "--format",
+        choices=("manifest", "cron", "dates", "gcloud"),
+        default="manifest",
+    )
+    parser.add_argument("--hour", type=int, default=9)
+    parser.add_argument("--minute", type=int, default=0)
+    parser.add_argument("--weeks", type=int, default=4)
+    parser.add_argument("--uri")
+    args = parser.parse_args()
+    print(
+        compile_schedule(
+            args.env, args.format, args.hour, args.minute, args.weeks, args.uri
+        )
+    )
@@ -0,0 +1,214 @@
+"""Generates fun facts for every album in the weekly album files as one OpenAI batch job.
+
+Albums picked in several environments or weeks are sent once, and albums that already
+have stored fun facts are skipped unless --overwrite is given. With --local, the job
+runs against in-memory stand-ins of Cloud Storage and the OpenAI batch API, seeded with
+synthetic weekly album files, to check the whole flow without any credentials.
+
+Usage:
+    python -m AOTW.scripts.generate_fun_facts [prod|test ...] [--overwrite]
+        [--poll-seconds 30] [--local]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import tempfile
+import types
+
+from AOTW.logic.album import Album
+from AOTW.logic.blob_cache import BlobCache
+from AOTW.logic.communications import GoogleCloudStorage, OpenAIAPI
+from AOTW.logic.config import Config, Env
+from AOTW.logic.email_manager import EmailManager
+from AOTW.scripts.soak_test import LocalStorageClient
+
+LOCAL_WEEKS = 12
+LOCAL_FAIL_MARKER = "album 7"
+LOCAL_CONFIG_VALUES = {
+    "PROJECT_ID": "local",
+    "SENDER_EMAIL": "aotw@example.com",
+    "PARTICIPANT_EMAILS": "participant0@example.com,participant1@example.com",
+    "AOTW_DAY": "Monday",
+    "AOTW_FORM_LINK": "https://example.com/form",
+    "AOTW_FORM_ID": "local-form",
+    "PLAYLIST_ID": "local-playlist",
+    "PLAYLIST_LINK": "https://example.com/playlist",
+    "OPENAI_API_KEY": "local",
+    "REMINDER_DAYS": "Wednesday,Friday",
+}
+
+
+class LocalBatchBackend:
+    """
+    Stands in for the OpenAI client's files and batches endpoints, as OpenAIAPI.client.
+
+    A batch is reported in progress on its first poll and completed on the next. Each
+    prompt is answered by respond(prompt), except prompts containing fail_marker, which
+    get an error response.
+    """
+
+    def __init__(self, respond=None, fail_marker=None):
+        self.respond = respond or (lambda prompt: f"1. {prompt.splitlines()[0]}")
+        self.fail_marker = fail_marker
+        self.stored_files = {}
+        self.jobs = {}
+        self.ids = itertools.count(1)
+        self.files = types.SimpleNamespace(
+            create=self._create_file, content=self._file_content
+        )
+        self.batches = types.SimpleNamespace(
+            create=self._create_batch, retrieve=self._retrieve_batch
+        )
+
+    def _store_file(self, text):
+        file_id = f"file-{next(self.ids)}"
+        self.stored_files[file_id] = text
+        return file_id
+
+    def _create_file(self, file, purpose):
+        _, data = file
+        return types.SimpleNamespace(id=self._store_file(data.decode("utf-8")))
+
+    def _file_content(self, file_id):
+        return types.SimpleNamespace(text=self.stored_files[file_id])
+
+    def _answer(self, request):
+        prompt = request["body"]["messages"][-1]["content"]
+        if self.fail_marker and self.fail_marker in prompt:
+            response = {"status_code": 400, "body": {}}
+        else:
+            content = self.respond(prompt)
+            response = {
+                "status_code": 200,
+                "body": {"choices": [{"message": {"content": content}}]},
+            }
+        return {"custom_id": request["custom_id"], "response": response, "error": None}
+
+    def _create_batch(self, input_file_id, endpoint, completion_window, metadata=None):
+        batch_id = f"batch-{next(self.ids)}"
+        self.jobs[batch_id] = {"input_file_id": input_file_id, "polls": 0}
+        return types.SimpleNamespace(id=batch_id, status="validating")
+
+    def _retrieve_batch(self, batch_id):
+        job = self.jobs[batch_id]
+        job["polls"] += 1
+        if job["polls"] < 2:
+            return types.SimpleNamespace(id=batch_id, status="in_progress", errors=None)
+        requests = [
+            json.loads(line)
+            for line in self.stored_files[job["input_file_id"]].splitlines()
+        ]
+        if "output_file_id" not in job:
+            job["output_file_id"] = self._store_file(
+                "".join(json.dumps(self._answer(r)) + "\n" for r in requests)
+            )
+        return types.SimpleNamespace(
+            id=batch_id,
+            status="completed",
+            errors=None,
+            output_file_id=job["output_file_id"],
+            request_counts=types.SimpleNamespace(total=len(requests)),
+        )
+
+
+def read_archive_pairs(config):
+    """Returns the (album, artist) of every weekly album file of an environment."""
+    gcs_client = GoogleCloudStorage()
+    pairs = []
+    prefix = config.album_log_prefix
+    for blob_name in gcs_client.list_blob_names(prefix):
+        if not blob_name[len(prefix) :].removesuffix(".json").isdigit():
+            continue
+        data = gcs_client.read_json(blob_name)
+        if data is None:
+            continue
+        try:
+            aotw = Album.from_dict(data)
+        except ValueError as e:
+            print(f"Skipping {blob_name}: {e}")
+            continue
+        pairs.append((aotw.album, aotw.artist))
+    return pairs
+
+
+def generate(envs, overwrite=False, poll_seconds=None, configs=None):
+    """
+    Collects the albums of every environment and generates their fun facts in one batch.
+
+    Returns:
+        A dict of the stored fun facts HTML by (album, artist).
+    """
+
+    configs = configs or {env: Config(env) for env in envs}
+    pairs = []
+    for env, config in configs.items():
+        env_pairs = read_archive_pairs(config)
+        print(f"{env}: {len(env_pairs)} weekly albums")
+        pairs.extend(env_pairs)
+    # The batch is billed to the first environment's key
+    email_manager = EmailManager(next(iter(configs.values())), None)
+    try:
+        return email_manager.generate_fun_facts_batch(
+            pairs, overwrite=overwrite, poll_seconds=poll_seconds
+        )
+    finally:
+        email_manager.finish_pending()
+
+
+def seed_local(envs):
+    """Points the clients at the stand-ins and writes synthetic weekly album files."""
+    GoogleCloudStorage.client = LocalStorageClient()
+    OpenAIAPI.client = LocalBatchBackend(fail_marker=LOCAL_FAIL_MARKER)
+    BlobCache.CACHE_DIR = tempfile.mkdtemp(prefix="aotw_fun_facts_")
+    gcs_client = GoogleCloudStorage()
+
+    prompt_path = os.path.join(
+        os.path.dirname(__file__), "..", "logic", "fun_fact_prompt.txt"
+    )
+    with open(prompt_path) as f:
+        gcs_client.write_txt(f.read(), "reference/fun_fact_prompt.txt")
+
+    configs = {}
+    for env in envs:
+        config = Config.from_values(env, LOCAL_CONFIG_VALUES)
+        for week in range(1, LOCAL_WEEKS + 1):
+            # Both environments pick the same albums, so they are deduplicated
+            aotw = Album(album=f"album {week}", artist=f"artist {week}", week=week)
+            gcs_client.write_to_json(
+                aotw.to_dict(), f"{config.album_log_prefix}{week}.json"
+            )
+        configs[env] = config
+    return configs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("envs", nargs="*", default=[e.value for e in Env])
+    parser.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="Regenerate albums that already have stored fun facts",
+    )
+    parser.add_argument("--poll-seconds", type=float, default=None)
+    parser.add_argument(
+        "--local", action="store_true", help="Run against in-memory stand-ins"
+    )
+    args = parser.parse_args(argv)
+
+    configs = None
+    poll_seconds = args.poll_seconds
+    if args.local:
+        configs = seed_local(args.envs)
+        poll_seconds = poll_seconds or 0.01
+    return generate(
+        args.envs,
+        overwrite=args.overwrite,
+        poll_seconds=poll_seconds,
+        configs=configs,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Builds the JSON config bundle secret for each environment from the existing per-variable secrets.
+
+Usage:
+    python -m AOTW.scripts.migrate_config_bundle [prod|test ...] [--dry-run]
+"""
+
+import json
+import sys
+
+from AOTW.logic.config import Config, Env
+from AOTW.logic.communications import CredentialsManager
+
+
+def migrate(env, dry_run=False):
+    bundle = Config.build_config_bundle(env)
+    secret_name = Config.CONFIG_BUNDLE_SECRET
+    if Env(env) == Env.TEST:
+        secret_name = f"DEV_{secret_name}"
+
+    missing = [
+        name for name in Config.CONFIG_BUNDLE_VARS if name not in bundle["values"]
+    ]
+    print(f"{env}: {len(bundle['values'])} variables resolved")
+    if missing:
+        print(f"{env}: missing {', '.join(missing)}")
+
+    if dry_run:
+        print(f"Would write {secret_name}")
+        return None
+
+    version = CredentialsManager().add_secret_version(
+        secret_name, json.dumps(bundle, sort_keys=True)
+    )
+    print(f"Wrote {version}")
+    return version
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    dry_run = "--dry-run" in args
+    envs = [arg for arg in args if arg != "--dry-run"] or [e.value for e in Env]
+    for env in envs:
+        migrate(env, dry_run=dry_run)
@@ -0,0 +1,25 @@
+"""Recomputes the listening stats aggregate from the weekly album files.
+
+Usage:
+    python -m AOTW.scripts.rebuild_stats [prod|test ...]
+"""
+
+import sys
+
+from AOTW.logic.config import Config, Env
+from AOTW.logic.stats_manager import StatsManager
+
+
+def rebuild(env):
+    stats = StatsManager(Config(env)).rebuild()
+    print(
+        f"{env}: rebuilt stats from {stats['weeks_recorded']} weeks, "
+        f"{len(stats['artist_counts'])} artists"
+    )
+    return stats
+
+
+if __name__ == "__main__":
+    envs = sys.argv[1:] or [e.value for e in Env]
+    for env in envs:
+        rebuild(env)
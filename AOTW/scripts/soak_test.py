@@ -0,0 +1,501 @@
+"""Soak test of the submission log, weekly album and email steps as data grows.
+
+Runs FormManager, AOTWManager, Group and the JSON storage layer against in-memory
+stand-ins of Cloud Storage, Forms and Gmail, on synthetic submissions spread over many
+weeks and large rosters, at increasing scales. Each scale also runs ingest, selection
+and email for many groups, each under its own storage prefix. Per-step latency,
+throughput and RSS are written to a JSON report with sorted keys, so reports from two
+versions can be diffed.
+
+Usage:
+    python -m AOTW.scripts.soak_test [--scales 1000,10000,100000,1000000]
+        [--report soak_report.json] [--seed 0] [--verbose]
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from google.api_core.exceptions import NotFound, PreconditionFailed
+
+from AOTW.logic.aotw_manager import AOTWManager
+from AOTW.logic.blob_cache import BlobCache
+from AOTW.logic.communications import FormAPI, GmailAPI, GoogleCloudStorage
+from AOTW.logic.config import Config
+from AOTW.logic.date_helper import DateHelper
+from AOTW.logic.email_manager import EmailManager
+from AOTW.logic.form_manager import FormManager
+from AOTW.logic.group import Group
+from AOTW.logic.stats_manager import StatsManager
+from AOTW.logic.submission import Submission
+from AOTW.logic.templates import EmailTemplates, format_fun_facts
+
+# 2024-01-01, the first AOTW week, is a Monday
+START_DATE = datetime.date(2024, 1, 1)
+AOTW_DAY = "Monday"
+NEW_SUBMISSIONS_PER_RUN = 100
+WORDS = (
+    "blue midnight paper river glass velvet echo summer static golden wild "
+    "northern electric quiet hollow silver broken young neon endless"
+).split()
+
+
+class LocalBlob:
+    """The subset of google.cloud.storage.Blob used by GoogleCloudStorage, kept in memory."""
+
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+        # The object's key in the bucket's store, under the bucket's prefix
+        self.key = bucket.prefix + name
+        self.generation = None
+        self.content_encoding = None
+
+    def _stored(self):
+        if self.key not in self.bucket.objects:
+            raise NotFound(f"No such object: {self.name}")
+        return self.bucket.objects[self.key]
+
+    def download_as_bytes(self, raw_download=False):
+        data, generation, _ = self._stored()
+        self.generation = generation
+        return data
+
+    def upload_from_string(self, data, content_type=None, if_generation_match=None):
+        current = self.bucket.objects.get(self.key)
+        current_generation = current[1] if current is not None else 0
+        if (
+            if_generation_match is not None
+            and if_generation_match != current_generation
+        ):
+            raise PreconditionFailed(f"Generation mismatch for {self.name}")
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self.bucket.next_generation += 1
+        self.generation = self.bucket.next_generation
+        self.bucket.objects[self.key] = (data, self.generation, self.content_encoding)
+
+    def open(self, mode="rb", chunk_size=None, raw_download=False):
+        data, generation, _ = self._stored()
+        self.generation = generation
+        return io.BytesIO(data)
+
+    def delete(self):
+        self._stored()
+        del self.bucket.objects[self.key]
+
+
+class LocalBucket:
+    def __init__(self, objects=None, prefix=""):
+        # key -> (bytes, generation, content_encoding), possibly shared with other buckets
+        self.objects = {} if objects is None else objects
+        self.prefix = prefix
+        self.next_generation = 0
+
+    def blob(self, name):
+        return LocalBlob(self, name)
+
+    def get_blob(self, name):
+        blob = LocalBlob(self, name)
+        if blob.key not in self.objects:
+            return None
+        blob.generation = self.objects[blob.key][1]
+        return blob
+
+
+class LocalStorageClient:
+    """
+    Stands in for google.cloud.storage.Client, as GoogleCloudStorage.client.
+
+    Clients given the same objects and different prefixes share one store, each seeing
+    only the blobs under its own prefix.
+    """
+
+    def __init__(self, objects=None, prefix=""):
+        self.local_bucket = LocalBucket(objects, prefix)
+
+    def bucket(self, name):
+        return self.local_bucket
+
+    def list_blobs(self, bucket_name, prefix=None):
+        full_prefix = self.local_bucket.prefix + (prefix or "")
+        return [
+            self.local_bucket.get_blob(key[len(self.local_bucket.prefix) :])
+            for key in sorted(self.local_bucket.objects)
+            if key.startswith(full_prefix)
+        ]
+
+    def stored_bytes(self):
+        return sum(
+            len(data)
+            for key, (data, _, _) in self.local_bucket.objects.items()
+            if key.startswith(self.local_bucket.prefix)
+        )
+
+
+class LocalFormAPI(FormAPI):
+    """Serves synthetic responses through FormAPI's filtering and sorting."""
+
+    def __init__(self, submissions):
+        self.submissions = submissions
+
+    def _read_responses(self, form_id, min_timestamp=None):
+        if min_timestamp is None:
+            return list(self.submissions)
+        return [s for s in self.submissions if s.timestamp >= min_timestamp]
+
+
+class LocalGmail(GmailAPI):
+    """Builds each message like GmailAPI does, and counts it instead of sending it."""
+
+    def __init__(self, sender_email):
+        self.sender_email = sender_email
+        self.sent = 0
+        self.sent_bytes = 0
+
+    def send_email(self, recipients, subject, body):
+        message = self.create_message_html(self.sender_email, recipients, subject, body)
+        self.sent += 1
+        self.sent_bytes += len(message)
+
+
+def generate_submissions(count, participants, weeks, end, seed=0):
+    """
+    Generates count submissions from the given participants, spread evenly over weeks
+    weeks before end.
+
+    Returns:
+        A list of Submission records, oldest first.
+    """
+
+    rng = random.Random(seed)
+    end_at = datetime.datetime.combine(end, datetime.time(), datetime.timezone.utc)
+    span_seconds = weeks * 7 * 24 * 60 * 60
+    offsets = sorted(rng.randrange(1, span_seconds) for _ in range(count))
+    return [
+        Submission(
+            user_email=rng.choice(participants),
+            timestamp=end_at - datetime.timedelta(seconds=offset),
+            album=" ".join(rng.sample(WORDS, 2)),
+            artist=" ".join(rng.sample(WORDS, 2)),
+        )
+        for offset in reversed(offsets)
+    ]
+
+
+def scale_for(submissions):
+    """Roster size, group count and weeks of history grow with the submission count."""
+    return {
+        "submissions": submissions,
+        "participants": max(10, submissions // 500),
+        "groups": max(10, submissions // 1000),
+        "weeks": min(520, max(52, submissions // 2000)),
+    }
+
+
+def current_rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+    except (OSError, ValueError):
+        return None
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in KiB on Linux and in bytes on macOS
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+
+class SoakRun:
+    def __init__(self, verbose=False):
+        self.verbose = verbose
+        self.steps = {}
+
+    @contextlib.contextmanager
+    def step(self, name, records=None):
+        """Times a step. A step run several times reports its total time and records."""
+        with contextlib.ExitStack() as stack:
+            if not self.verbose:
+                devnull = stack.enter_context(open(os.devnull, "w"))
+                stack.enter_context(contextlib.redirect_stdout(devnull))
+            started_at = time.perf_counter()
+            yield
+            seconds = time.perf_counter() - started_at
+        previous = self.steps.get(name)
+        if previous is not None:
+            seconds += previous["seconds"]
+            records = (records or 0) + (previous["records"] or 0) or None
+        self.steps[name] = {
+            "seconds": round(seconds, 4),
+            "records": records,
+            "records_per_second": round(records / seconds) if records else None,
+            "rss_mb": current_rss_mb(),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        print(f"  {name}: {seconds:.3f}s")
+
+
+def use_storage(storage):
+    """Points GoogleCloudStorage at storage, with an empty blob cache."""
+    GoogleCloudStorage.client = storage
+    BlobCache.memory.clear()
+    BlobCache.memory_bytes = 0
+    BlobCache.disk_bytes = None
+    shutil.rmtree(BlobCache.CACHE_DIR, ignore_errors=True)
+
+
+def local_config(participants, run_date):
+    return Config.from_values(
+        "test",
+        {
+            "PROJECT_ID": "soak-test",
+            "SENDER_EMAIL": "aotw@example.com",
+            "PARTICIPANT_EMAILS": ",".join(participants),
+            "AOTW_DAY": AOTW_DAY,
+            "AOTW_FORM_LINK": "https://example.com/form",
+            "AOTW_FORM_ID": "soak-form",
+            "PLAYLIST_ID": "soak-playlist",
+            "PLAYLIST_LINK": "https://example.com/playlist",
+            "REMINDER_DAYS": "Wednesday,Friday",
+        },
+        test_date=run_date.isoformat(),
+    )
+
+
+def local_manager(config, participants, form_handler):
+    """Returns an AOTWManager and the Gmail stand-in it sends through."""
+    emailer = LocalGmail(config.get_sender_email())
+    manager = AOTWManager(
+        config=config,
+        group=Group(participants),
+        date_helper=DateHelper(config.run_date),
+        email_manager=EmailManager(config, emailer),
+        form_manager=FormManager(config, form_handler),
+        stats_manager=StatsManager(config),
+    )
+    return manager, emailer
+
+
+def weekly_pick(manager, run_date):
+    """This week's pick by the group's chooser, submitted just after the week starts."""
+    return Submission(
+        user_email=manager.chooser.email,
+        timestamp=datetime.datetime.combine(
+            run_date, datetime.time(hour=1), datetime.timezone.utc
+        ),
+        album="weekly album",
+        artist="weekly artist",
+    )
+
+
+def run_groups(run, scale, objects, run_date, seed=0):
+    """
+    Runs ingest, selection and email for each group, each under its own storage prefix.
+
+    The submissions are split between the groups, and each step's time is totalled over
+    the groups.
+
+    Returns:
+        The number of emails sent by all groups.
+    """
+
+    per_group = max(1, scale["submissions"] // scale["groups"])
+    emails_sent = 0
+    # Also runs each group's setup; the per-step totals are printed after it
+    with run.step("groups", records=scale["groups"]):
+        for index in range(scale["groups"]):
+            use_storage(LocalStorageClient(objects, prefix=f"groups/{index}/"))
+            participants = [
+                f"group{index}.participant{i}@example.com"
+                for i in range(scale["participants"])
+            ]
+            submissions = generate_submissions(
+                per_group, participants, scale["weeks"], run_date, seed + index
+            )
+            config = local_config(participants, run_date)
+            form_handler = LocalFormAPI(submissions)
+            manager, emailer = local_manager(config, participants, form_handler)
+            form_handler.submissions = submissions + [weekly_pick(manager, run_date)]
+
+            with run.step("group_ingest", records=len(form_handler.submissions)):
+                manager.form_manager.ingest_new_submissions()
+            with run.step("group_selection", records=1):
+                aotw = manager.create_aotw_weekly_file()
+            assert aotw is not None and aotw.chooser == manager.chooser.email
+            with run.step("group_email", records=len(participants)):
+                manager.send_daily_email()
+            emails_sent += emailer.sent
+    for name in ("group_ingest", "group_selection", "group_email"):
+        print(f"    {name}: {run.steps[name]['seconds']:.3f}s")
+    return emails_sent
+
+
+def run_scale(scale, seed=0, verbose=False):
+    objects = {}
+    storage = LocalStorageClient(objects, prefix="main/")
+    use_storage(storage)
+    EmailTemplates.templates = None
+
+    run = SoakRun(verbose)
+    participants = [f"participant{i}@example.com" for i in range(scale["participants"])]
+    run_date = START_DATE + datetime.timedelta(weeks=scale["weeks"])
+
+    with run.step("generate_submissions", records=scale["submissions"]):
+        submissions = generate_submissions(
+            scale["submissions"], participants, scale["weeks"], run_date, seed
+        )
+
+    with run.step("config"):
+        config = local_config(participants, run_date)
+        form_handler = LocalFormAPI(submissions)
+        manager, emailer = local_manager(config, participants, form_handler)
+        form_manager = manager.form_manager
+        email_manager = manager.email_manager
+
+    with run.step("log_submissions", records=scale["submissions"]):
+        form_manager.retrieve_and_log_submissions()
+
+    # New responses since the last run, including this week's pick
+    run_start = datetime.datetime.combine(
+        run_date, datetime.time(hour=1), datetime.timezone.utc
+    )
+    new_submissions = [
+        Submission(
+            user_email=email,
+            timestamp=run_start + datetime.timedelta(minutes=i),
+            album=f"album {i}",
+            artist=f"artist {i}",
+        )
+        for i, email in enumerate(
+            [manager.chooser.email]
+            + random.Random(seed).choices(participants, k=NEW_SUBMISSIONS_PER_RUN - 1)
+        )
+    ]
+    form_handler.submissions = submissions + new_submissions
+
+    with run.step("ingest_new_submissions", records=len(new_submissions)):
+        form_manager.ingest_new_submissions()
+
+    with run.step("full_log_scan", records=len(form_handler.submissions)):
+        scanned = sum(1 for _ in form_manager.iter_logged_submissions())
+    assert scanned == len(form_handler.submissions), scanned
+
+    with run.step("create_aotw_weekly_file"):
+        aotw = manager.create_aotw_weekly_file()
+    assert aotw is not None and aotw.chooser == manager.chooser.email
+
+    with run.step("send_aotw_email", records=len(participants)):
+        manager.send_daily_email()
+
+    fun_facts = "\n".join(
+        f"{i}. {' '.join(random.Random(i).choices(WORDS, k=30))}" for i in range(1, 6)
+    )
+    with run.step("send_chosen_email", records=len(participants)):
+        email_manager.send_aotw_chosen_email(
+            aotw.album, aotw.artist, fun_facts=format_fun_facts(fun_facts)
+        )
+
+    with run.step("render_personalized_bodies", records=len(participants)):
+        EmailTemplates.render_bulk(
+            "aotw_body",
+            [{"chooser_name": email.split("@")[0]} for email in participants],
+            form_link=config.aotw_form_link,
+            playlist_footer=EmailTemplates.fragment(
+                "playlist_footer", playlist_link=config.playlist_link
+            ),
+        )
+
+    stored_bytes = storage.stored_bytes()
+    group_emails_sent = run_groups(run, scale, objects, run_date, seed)
+
+    return {
+        **scale,
+        "emails_sent": emailer.sent,
+        "email_bytes": emailer.sent_bytes,
+        "group_emails_sent": group_emails_sent,
+        "stored_bytes": stored_bytes,
+        "group_stored_bytes": LocalStorageClient(
+            objects, prefix="groups/"
+        ).stored_bytes(),
+        "steps": run.steps,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(results):
+    """Adds per-step latency curves (submissions -> seconds) to the per-scale results."""
+    curves = {}
+    for result in results:
+        for name, step in result["steps"].items():
+            curves.setdefault(name, []).append([result["submissions"], step["seconds"]])
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "scales": results,
+        "latency_curves": curves,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scales",
+        default="1000,10000,100000,1000000",
+        help="Comma separated submission counts, run in increasing order",
+    )
+    parser.add_argument("--report", default="soak_report.json")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--verbose", action="store_true", help="Show the output of the steps"
+    )
+    args = parser.parse_args(argv)
+
+    # Keep the blob cache's disk tier out of the real cache directory
+    BlobCache.CACHE_DIR = tempfile.mkdtemp(prefix="aotw_soak_")
+
+    results = []
+    for submissions in sorted(int(count) for count in args.scales.split(",")):
+        scale = scale_for(submissions)
+        print(
+            f"Scale: {scale['submissions']} submissions, {scale['participants']} "
+            f"participants, {scale['groups']} groups, {scale['weeks']} weeks"
+        )
+        results.append(run_scale(scale, seed=args.seed, verbose=args.verbose))
+
+    report = build_report(results)
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"Report written to {args.report}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
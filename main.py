@@ -1,7 +1,13 @@
+import time
+
+# Recorded before the remaining imports so profiles can report import time
+IMPORT_STARTED_AT = time.perf_counter()
+
 import datetime
+import json
 
 from AOTW.logic.config import Config
-from AOTW.logic.communications import FormAPI
+from AOTW.logic.communications import FormAPI, LazyClient
 from AOTW.logic.form_manager import FormManager
 from AOTW.logic.aotw_manager import AOTWManager
 from AOTW.logic.group import Group
@@ -9,28 +15,44 @@ from AOTW.logic.date_helper import DateHelper
 from AOTW.logic.email_manager import EmailManager
 from AOTW.logic.communications import GmailAPI, SpotifyAPI
 from AOTW.logic.playlist_manager import PlaylistManager
+from AOTW.logic.prefetch_manager import PrefetchManager
+from AOTW.logic.stats_manager import StatsManager
+from AOTW.logic.schedule import DayPlan
+from AOTW.logic.ingestion import SubmissionIngestor, decode_message_data
+from AOTW.logic import profiler
+from AOTW.logic.warmup import warm_state, warm_up, warm_up_on_start
 
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED_AT
 
-def daily_email(env, test_date: datetime.datetime = None):
+
+def daily_email(env, test_date: datetime.datetime = None, plan: dict = None):
     config = Config(env, test_date)
     group = Group([*config.get_participant_emails()])
     date_helper = DateHelper(config.run_date)
-    email_manager = EmailManager(config, GmailAPI(config.get_sender_email()))
+    email_manager = EmailManager(
+        config, LazyClient(lambda: GmailAPI(config.get_sender_email()))
+    )
     manager = AOTWManager(
-        config=config, group=group, date_helper=date_helper, email_manager=email_manager
+        config=config,
+        group=group,
+        date_helper=date_helper,
+        email_manager=email_manager,
+        stats_manager=StatsManager(config),
     )
 
-    manager.send_daily_email()
+    manager.send_daily_email(plan=DayPlan.from_dict(plan) if plan else None)
 
 
 def set_aotw(env, test_date: datetime.datetime = None):
     config = Config(env, test_date)
     date_helper = DateHelper(config.run_date)
-    form_manager = FormManager(config, FormAPI())
+    form_manager = FormManager(config, LazyClient(FormAPI))
     group = Group([*config.get_participant_emails()])
-    email_manager = EmailManager(config, GmailAPI(config.get_sender_email()))
+    email_manager = EmailManager(
+        config, LazyClient(lambda: GmailAPI(config.get_sender_email()))
+    )
     playlist_manager = PlaylistManager(
-        config, SpotifyAPI(config.spotify_local_credentials)
+        config, LazyClient(lambda: SpotifyAPI(config.spotify_local_credentials))
     )
     manager = AOTWManager(
         config=config,
@@ -39,33 +61,154 @@ def set_aotw(env, test_date: datetime.datetime = None):
         group=group,
         email_manager=email_manager,
         playlist_manager=playlist_manager,
+        prefetch_manager=PrefetchManager(config, playlist_manager, email_manager),
+        stats_manager=StatsManager(config),
     )
 
-    manager.retrieve_and_log_form_submissions()
+    manager.catch_up_submissions()
+    manager.renew_submission_watch()
     manager.create_aotw_weekly_file()
+    manager.prefetch_aotw()
+    manager.start_fun_facts()
     manager.update_playlist()
     manager.send_chosen_email()
+    email_manager.finish_pending()
+
+
+def ingest_submission(env, message, update_playlist=False):
+    config = Config(env)
+    date_helper = DateHelper(config.run_date)
+    form_manager = FormManager(config, LazyClient(FormAPI))
+    group = Group([*config.get_participant_emails()])
+    email_manager = EmailManager(
+        config, LazyClient(lambda: GmailAPI(config.get_sender_email()))
+    )
+    playlist_manager = PlaylistManager(
+        config, LazyClient(lambda: SpotifyAPI(config.spotify_local_credentials))
+    )
+    manager = AOTWManager(
+        config=config,
+        date_helper=date_helper,
+        form_manager=form_manager,
+        group=group,
+        email_manager=email_manager,
+        playlist_manager=playlist_manager,
+        prefetch_manager=PrefetchManager(config, playlist_manager, email_manager),
+        stats_manager=StatsManager(config),
+    )
+
+    SubmissionIngestor(manager).handle_message(message, update_playlist=update_playlist)
+    # Fun facts started by the prefetch are stored before the invocation ends
+    email_manager.finish_pending()
+
+
+def warmup(env):
+    """Builds config, credentials and the shared API clients in parallel so the next task starts warm.
+
+    Returns:
+        The time taken by each part, see AOTW/logic/warmup.py.
+    """
+    return warm_up(env, import_seconds=IMPORT_SECONDS)
+
+
+TASKS = {
+    "daily_email": daily_email,
+    "set_aotw": set_aotw,
+}
+
+
+def _parse_event(event):
+    """Extracts the task payload from an HTTP request, Pub/Sub message or dict.
+
+    Forms watch notifications carry no body, so they are routed to ingest_submission.
+    Query parameters (e.g. ?env=test on the push endpoint) are merged into the payload.
+    """
+    if event is None:
+        return {}
+    args = {}
+    if isinstance(event, dict):
+        payload = event
+    elif hasattr(event, "get_json"):
+        args = dict(event.args)
+        payload = event.get_json(silent=True) or args
+    else:
+        payload = getattr(event, "data", None) or {}
+    message = payload.get("message")
+    if message is not None:
+        # Pub/Sub push envelope
+        if "formId" in (message.get("attributes") or {}):
+            return {**args, "task": "ingest_submission", "message": message}
+        payload = {**args, **(decode_message_data(message) or {})}
+    return payload
+
+
+def task_router(event=None):
+    """Single entry point that dispatches to a task based on the event payload.
+
+    The payload looks like {"task": "daily_email" | "set_aotw" | "warmup", "env": "prod" | "test"}.
+    Config, credentials and clients are cached at process level, so every task
+    routed through this function shares them across warm invocations.
+    Adding "profile": true (or setting AOTW_PROFILE) profiles the run, see profiler.py.
+    """
+    payload = _parse_event(event)
+    task = payload.get("task")
+    env = payload.get("env", "prod")
+    if task not in TASKS and task not in ("warmup", "ingest_submission"):
+        print(f"Unknown task: {task}")
+        return {"status": "400", "message": f"Unknown task: {task}"}
+    # Shows whether this invocation found the clients already built
+    print(json.dumps({"task": task, "warm": warm_state()}))
+    report = None
+    with profiler.profiled(
+        task, profiler.is_enabled(payload), IMPORT_SECONDS
+    ) as profile:
+        if task == "warmup":
+            report = warmup(env)
+        elif task == "ingest_submission":
+            ingest_submission(
+                env,
+                payload["message"],
+                update_playlist=str(payload.get("update_playlist")).lower() == "true",
+            )
+        elif task == "daily_email":
+            daily_email(env, payload.get("test_date"), plan=payload.get("plan"))
+        else:
+            TASKS[task](env, payload.get("test_date"))
+    response = {"status": "200", "task": task, "env": env}
+    if report is not None:
+        response["warmup"] = report
+    if profile is not None:
+        response["profile_run_id"] = profile.run_id
+    return response
 
 
 def task_daily_email(event=None):
-    daily_email("prod")
+    with profiler.profiled("daily_email", profiler.is_enabled(), IMPORT_SECONDS):
+        daily_email("prod")
     return {"status": "200", "status": "OK"}
 
 
 def task_set_aotw(event=None):
-    set_aotw("prod")
+    with profiler.profiled("set_aotw", profiler.is_enabled(), IMPORT_SECONDS):
+        set_aotw("prod")
     return {"status": "200", "status": "OK"}
 
 
 def task_dev_set_aotw(event=None):
-    set_aotw("test")
+    with profiler.profiled("set_aotw", profiler.is_enabled(), IMPORT_SECONDS):
+        set_aotw("test")
     return {"status": "200", "status": "OK"}
 
 
 def task_dev_daily_email(event=None):
-    set_aotw("test")
+    with profiler.profiled("set_aotw", profiler.is_enabled(), IMPORT_SECONDS):
+        set_aotw("test")
     return {"status": "200", "status": "OK"}
 
 
+# Optional startup hook, so a new instance is warm before its first request
+warm_up_on_start(import_seconds=IMPORT_SECONDS)
+
+
 if __name__ == "__main__":
     task_dev_set_aotw()
@@ -0,0 +1,17 @@
+import pytest
+
+from AOTW.logic.blob_cache import BlobCache
+from AOTW.logic.communications import GoogleCloudStorage
+from AOTW.scripts.soak_test import LocalStorageClient
+
+
+@pytest.fixture
+def local_storage(monkeypatch, tmp_path):
+    """Points GoogleCloudStorage at an in-memory bucket with an empty blob cache."""
+    storage = LocalStorageClient()
+    monkeypatch.setattr(GoogleCloudStorage, "client", storage)
+    monkeypatch.setattr(BlobCache, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(BlobCache, "memory", type(BlobCache.memory)())
+    monkeypatch.setattr(BlobCache, "memory_bytes", 0)
+    monkeypatch.setattr(BlobCache, "disk_bytes", None)
+    return storage
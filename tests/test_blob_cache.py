@@ -0,0 +1,32 @@
+import os
+
+from AOTW.logic.blob_cache import BlobCache
+from AOTW.logic.communications import GoogleCloudStorage
+
+
+def test_writes_only_refresh_blobs_that_are_cached(local_storage):
+    gcs_client = GoogleCloudStorage()
+    gcs_client.write_to_json({"n": 1}, "written.json")
+    gcs_client.write_to_json({"n": 1}, "cached.json")
+    gcs_client.read_json("cached.json", cache_ttl=60)
+
+    gcs_client.write_to_json({"n": 2}, "cached.json")
+
+    assert BlobCache.get("written.json") is None
+    assert gcs_client.read_json("cached.json", cache_ttl=60) == {"n": 2}
+
+
+def test_disk_tier_evicts_least_recently_used(local_storage, monkeypatch):
+    monkeypatch.setattr(BlobCache, "MAX_DISK_BYTES", 250)
+    for i, name in enumerate(["a", "b", "c"]):
+        BlobCache.put(name, 1, b"x" * 100)
+        # Spread the modification times, which order the disk entries
+        os.utime(BlobCache._path(name) + ".bin", (i, i))
+
+    BlobCache.memory.clear()
+    BlobCache.put("d", 1, b"x" * 100)
+
+    assert BlobCache.get("a") is None
+    assert BlobCache.get("b") is None
+    assert BlobCache.get("c").data == b"x" * 100
+    assert BlobCache.disk_bytes <= 250
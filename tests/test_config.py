@@ -0,0 +1,220 @@
+import json
+import types
+
+import pytest
+
+from AOTW.logic import config as config_module
+from AOTW.logic.config import Config, Env
+
+
+class SecretError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.response = types.SimpleNamespace(status_code=status_code)
+
+
+@pytest.fixture
+def config(monkeypatch):
+    monkeypatch.setenv("GOOGLE_CLOUD_PROJECT", "test-project")
+    monkeypatch.setattr(Config, "_config_bundles", {})
+    monkeypatch.setattr(Config, "_run_var_cache", {})
+    config = Config.__new__(Config)
+    config.env = Env.PROD
+    return config
+
+
+def bundle_secret(values):
+    return json.dumps(
+        {"schema_version": Config.CONFIG_BUNDLE_SCHEMA_VERSION, "values": values}
+    )
+
+
+def test_null_bundle_values_fall_back_to_their_own_secret(config, monkeypatch):
+    secrets = {
+        Config.CONFIG_BUNDLE_SECRET: bundle_secret(
+            {"AOTW_DAY": "Monday", "REMINDER_DAYS": None}
+        ),
+        "REMINDER_DAYS": "Wednesday,Friday",
+    }
+    monkeypatch.setattr(
+        config_module.CredentialsManager,
+        "get_secret_value",
+        lambda self, name, version="latest": secrets[name],
+    )
+    monkeypatch.setattr(Config, "_check_snapshot", lambda self, values: None)
+
+    assert config._lookup_run_var("AOTW_DAY") == "Monday"
+    assert config._lookup_run_var("REMINDER_DAYS") == "Wednesday,Friday"
+
+
+def test_transient_bundle_failures_are_not_cached(config, monkeypatch):
+    errors = [SecretError(503)]
+
+    def get_secret_value(self, name, version="latest"):
+        if errors:
+            raise errors.pop()
+        return bundle_secret({"AOTW_DAY": "Monday"})
+
+    monkeypatch.setattr(
+        config_module.CredentialsManager, "get_secret_value", get_secret_value
+    )
+    monkeypatch.setattr(Config, "_check_snapshot", lambda self, values: None)
+
+    assert config._get_config_bundle() is None
+    assert config._get_config_bundle() == {"AOTW_DAY": "Monday"}
+
+
+def test_missing_bundle_is_cached(config, monkeypatch):
+    calls = []
+
+    def get_secret_value(self, name, version="latest"):
+        calls.append(name)
+        raise SecretError(404)
+
+    monkeypatch.setattr(
+        config_module.CredentialsManager, "get_secret_value", get_secret_value
+    )
+
+    assert config._get_config_bundle() is None
+    assert config._get_config_bundle() is None
+    assert len(calls) == 1
+
+
+def test_run_vars_are_resolved_again_after_the_ttl(config, monkeypatch):
+    bundle = {"AOTW_DAY": "Monday"}
+    monkeypatch.setattr(
+        config_module.CredentialsManager,
+        "get_secret_value",
+        lambda self, name, version="latest": bundle_secret(bundle),
+    )
+    monkeypatch.setattr(Config, "_check_snapshot", lambda self, values: None)
+    monkeypatch.setattr(config_module, "SNAPSHOT", None)
+    assert config._get_run_var("AOTW_DAY") == "Monday"
+
+    bundle["AOTW_DAY"] = "Tuesday"
+    assert config._get_run_var("AOTW_DAY") == "Monday"
+    monkeypatch.setattr(Config, "RUN_VAR_CACHE_TTL", 0)
+    assert config._get_run_var("AOTW_DAY") == "Tuesday"
+
+
+def test_from_values_does_not_share_its_values(config, monkeypatch):
+    values = {
+        var_name: f"{var_name.lower()}@example.com"
+        for var_name in Config.CONFIG_BUNDLE_VARS
+    }
+    values["AOTW_DAY"] = "Monday"
+    values["REMINDER_DAYS"] = "Friday"
+    local = Config.from_values("prod", values)
+
+    assert local.aotw_day == "Monday"
+    assert Config._run_var_cache == {}
+
+
+def test_build_config_bundle_leaves_out_missing_variables(monkeypatch):
+    def get_secret_run_var(self, var_name):
+        if var_name == "FORMS_WATCH_TOPIC":
+            raise SecretError(404)
+        return f"value of {var_name}"
+
+    monkeypatch.setattr(Config, "_get_secret_run_var", get_secret_run_var)
+
+    bundle = Config.build_config_bundle("prod")
+
+    assert "FORMS_WATCH_TOPIC" not in bundle["values"]
+    assert bundle["values"]["AOTW_DAY"] == "value of AOTW_DAY"
+
+
+SNAPSHOT_VALUES = {"AOTW_DAY": "Monday", "FORMS_WATCH_TOPIC": None}
+
+
+def test_snapshot_checksum_ignores_key_order():
+    reordered = dict(reversed(list(SNAPSHOT_VALUES.items())))
+
+    assert Config.snapshot_checksum(reordered) == Config.snapshot_checksum(
+        SNAPSHOT_VALUES
+    )
+
+
+def test_snapshot_checksum_changes_with_any_value():
+    changed = {**SNAPSHOT_VALUES, "FORMS_WATCH_TOPIC": "topic"}
+
+    assert Config.snapshot_checksum(changed) != Config.snapshot_checksum(
+        SNAPSHOT_VALUES
+    )
+
+
+def snapshot(values, checksum):
+    return {
+        "schema_version": Config.CONFIG_SNAPSHOT_SCHEMA_VERSION,
+        "environments": {"prod": {"values": values, "checksum": checksum}},
+    }
+
+
+@pytest.fixture
+def live_bundle(monkeypatch):
+    values = dict(SNAPSHOT_VALUES)
+    monkeypatch.setattr(
+        config_module.CredentialsManager,
+        "get_secret_value",
+        lambda self, name, version="latest": bundle_secret(values),
+    )
+    return values
+
+
+@pytest.fixture
+def snapshot_config(config, live_bundle, monkeypatch):
+    monkeypatch.setattr(Config, "_checked_snapshots", set())
+    monkeypatch.setattr(Config, "_stale_snapshots", set())
+    return config
+
+
+def test_snapshot_values_are_used_when_the_checksum_matches(
+    snapshot_config, monkeypatch
+):
+    monkeypatch.setattr(
+        config_module,
+        "SNAPSHOT",
+        snapshot(SNAPSHOT_VALUES, Config.snapshot_checksum(SNAPSHOT_VALUES)),
+    )
+
+    assert snapshot_config._get_snapshot_values() == SNAPSHOT_VALUES
+    assert snapshot_config._get_run_var("AOTW_DAY") == "Monday"
+
+
+def test_snapshot_failing_its_checksum_is_ignored(snapshot_config, monkeypatch):
+    tampered = {**SNAPSHOT_VALUES, "AOTW_DAY": "Sunday"}
+    monkeypatch.setattr(
+        config_module,
+        "SNAPSHOT",
+        snapshot(tampered, Config.snapshot_checksum(SNAPSHOT_VALUES)),
+    )
+
+    assert snapshot_config._get_snapshot_values() is None
+
+
+def test_stale_snapshot_is_dropped_for_the_bundle(snapshot_config, monkeypatch):
+    monkeypatch.setattr(
+        config_module,
+        "SNAPSHOT",
+        snapshot(SNAPSHOT_VALUES, Config.snapshot_checksum(SNAPSHOT_VALUES)),
+    )
+    assert snapshot_config._get_run_var("AOTW_DAY") == "Monday"
+
+    snapshot_config._check_snapshot({"AOTW_DAY": "Tuesday"})
+
+    assert snapshot_config._get_snapshot_values() is None
+    assert (Env.PROD, "AOTW_DAY") not in Config._run_var_cache
+
+
+def test_snapshot_is_compared_with_the_live_bundle_before_use(
+    snapshot_config, live_bundle, monkeypatch
+):
+    monkeypatch.setattr(
+        config_module,
+        "SNAPSHOT",
+        snapshot(SNAPSHOT_VALUES, Config.snapshot_checksum(SNAPSHOT_VALUES)),
+    )
+    live_bundle["AOTW_DAY"] = "Tuesday"
+
+    assert snapshot_config._get_run_var("AOTW_DAY") == "Tuesday"
+    assert Env.PROD in Config._stale_snapshots
@@ -0,0 +1,103 @@
+import threading
+import time
+import types
+
+import pytest
+
+from AOTW.logic.communications import GoogleCloudStorage
+from AOTW.logic.config import Env
+from AOTW.logic.email_manager import EmailManager
+from AOTW.logic.fun_facts_store import FunFactsMetrics
+
+
+class MemoryStore:
+    def __init__(self, stored=None):
+        self.stored = dict(stored or {})
+
+    def get(self, album, artist):
+        return self.stored.get((album, artist))
+
+    def put(self, album, artist, fun_facts, source):
+        self.stored[(album, artist)] = fun_facts
+
+
+class SlowMetrics:
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.events = []
+
+    def record(self, *events, **details):
+        time.sleep(self.delay)
+        self.events.extend(events)
+
+    def flush(self):
+        pass
+
+
+@pytest.fixture
+def email_manager(monkeypatch):
+    monkeypatch.setattr(EmailManager, "__init__", lambda self: None)
+    email_manager = EmailManager()
+    email_manager.config = types.SimpleNamespace(env="test")
+    email_manager.fun_facts_store = MemoryStore()
+    email_manager.fun_facts_metrics = SlowMetrics()
+    email_manager.pending_fun_facts = {}
+    email_manager.late_fun_facts_handled = []
+    return email_manager
+
+
+def slow_generation(release):
+    def stream(album, artist):
+        release.wait(5)
+        return f"facts about {album}"
+
+    return stream
+
+
+def test_zero_deadline_does_not_wait(email_manager):
+    release = threading.Event()
+    email_manager._stream_fun_facts = slow_generation(release)
+
+    started_at = time.monotonic()
+    fun_facts = email_manager.get_fun_facts_within_deadline("x", "y", deadline=0)
+
+    assert time.monotonic() - started_at < 1
+    assert "fun facts about X by Y" in fun_facts
+    release.set()
+    email_manager.finish_pending(timeout=5)
+
+
+def test_finish_pending_waits_for_late_results_to_be_handled(email_manager):
+    release = threading.Event()
+    email_manager._stream_fun_facts = slow_generation(release)
+    email_manager.fun_facts_metrics.delay = 0.3
+
+    email_manager.get_fun_facts_within_deadline("x", "y", deadline=0.01)
+    release.set()
+    email_manager.finish_pending(timeout=5)
+
+    assert email_manager.fun_facts_store.stored[("x", "y")] == "facts about x"
+    assert "late_results_stored" in email_manager.fun_facts_metrics.events
+
+
+def test_stored_fun_facts_are_not_generated_again(email_manager):
+    email_manager.fun_facts_store.stored[("x", "y")] = "stored facts"
+    email_manager._stream_fun_facts = lambda album, artist: pytest.fail("generated")
+
+    assert email_manager.get_fun_facts_within_deadline("x", "y") == "stored facts"
+    assert "served_from_store" in email_manager.fun_facts_metrics.events
+
+
+def test_metrics_are_written_once_on_flush(local_storage):
+    metrics = FunFactsMetrics(types.SimpleNamespace(env=Env.TEST))
+    metrics.record("requests", "on_time")
+    metrics.record("requests", "deadline_hits", "fallback_template")
+
+    assert GoogleCloudStorage().read_json(metrics.blob_name) is None
+    metrics.flush()
+    metrics.flush()
+
+    counters = GoogleCloudStorage().read_json(metrics.blob_name)
+    assert counters["requests"] == 2
+    assert counters["on_time"] == 1
+    assert counters["deadline_hits"] == 1
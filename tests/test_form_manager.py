@@ -0,0 +1,65 @@
+import datetime
+import types
+
+import pytest
+
+from AOTW.logic.communications import GoogleCloudStorage
+from AOTW.logic.form_manager import FormManager
+from AOTW.logic.submission import Submission
+
+
+def submission(month, day, email="a@example.com"):
+    return Submission(
+        user_email=email,
+        timestamp=datetime.datetime(2026, month, day, 12, tzinfo=datetime.timezone.utc),
+        album=f"album {month}-{day}",
+        artist="artist",
+    )
+
+
+@pytest.fixture
+def form_manager(local_storage):
+    return FormManager(types.SimpleNamespace(aotw_form_id="form"), None)
+
+
+def test_submissions_are_logged_to_monthly_shards(form_manager, local_storage):
+    logged = form_manager._log_submissions([submission(9, 3), submission(10, 5)])
+
+    assert [s.timestamp.month for s in logged] == [10, 9]
+    assert sorted(local_storage.local_bucket.objects) == [
+        "form_submissions/2026-09.json",
+        "form_submissions/2026-10.json",
+    ]
+    assert form_manager._log_submissions([submission(10, 5)]) == []
+
+
+def test_log_is_read_most_recent_first_with_the_legacy_blob_last(form_manager):
+    GoogleCloudStorage().write_to_json(
+        [submission(8, 1).to_dict()], FormManager.LEGACY_SUBMISSIONS_BLOB
+    )
+    form_manager._log_submissions([submission(9, 3), submission(10, 5)])
+
+    days = [
+        (s.timestamp.month, s.timestamp.day)
+        for s in form_manager.iter_logged_submissions()
+    ]
+
+    assert days == [(10, 5), (9, 3), (8, 1)]
+
+
+def test_months_before_min_timestamp_are_not_read(form_manager, monkeypatch):
+    form_manager._log_submissions([submission(9, 3), submission(10, 5)])
+    streamed = []
+    iter_json_records = GoogleCloudStorage.iter_json_records
+
+    def recording_iter(self, blob_name, **kwargs):
+        streamed.append(blob_name)
+        return iter_json_records(self, blob_name, **kwargs)
+
+    monkeypatch.setattr(GoogleCloudStorage, "iter_json_records", recording_iter)
+    min_timestamp = datetime.datetime(2026, 10, 1, tzinfo=datetime.timezone.utc)
+
+    logged = list(form_manager.iter_logged_submissions(min_timestamp=min_timestamp))
+
+    assert [s.timestamp.month for s in logged] == [10]
+    assert streamed == ["form_submissions/2026-10.json"]
@@ -0,0 +1,97 @@
+import base64
+import json
+import types
+
+import pytest
+
+import main
+from AOTW.logic.ingestion import (
+    InProcessPubSub,
+    SubmissionIngestor,
+    decode_message_data,
+)
+
+FORM_ID = "aotw-form"
+TOPIC = "forms-watch"
+
+
+class FakeManager:
+    def __init__(self):
+        self.config = types.SimpleNamespace(aotw_form_id=FORM_ID)
+        self.ingested = []
+
+    def ingest_submissions(self, update_playlist=False):
+        self.ingested.append(update_playlist)
+        return ["submission"]
+
+
+@pytest.fixture
+def ingestor():
+    return SubmissionIngestor(FakeManager())
+
+
+def test_responses_notification_is_ingested(ingestor):
+    message = {"attributes": {"formId": FORM_ID, "eventType": "RESPONSES"}}
+
+    assert ingestor.handle_message(message, update_playlist=True) == ["submission"]
+    assert ingestor.manager.ingested == [True]
+
+
+@pytest.mark.parametrize(
+    "attributes",
+    [
+        {"formId": FORM_ID, "eventType": "SCHEMA"},
+        {"formId": "another-form", "eventType": "RESPONSES"},
+        {},
+    ],
+)
+def test_other_notifications_are_ignored(ingestor, attributes):
+    assert ingestor.handle_message({"attributes": attributes}) == []
+    assert ingestor.manager.ingested == []
+
+
+def test_push_delivery_reaches_the_ingestor(ingestor):
+    pubsub = InProcessPubSub()
+    pubsub.subscribe(
+        TOPIC,
+        lambda envelope: ingestor.handle_message(
+            main._parse_event(envelope)["message"]
+        ),
+    )
+
+    assert pubsub.publish_form_response(TOPIC, FORM_ID) == [["submission"]]
+    assert pubsub.publish_form_response(TOPIC, "another-form") == [[]]
+    assert ingestor.manager.ingested == [False]
+
+
+def test_router_sends_forms_notifications_to_ingest_submission(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        main,
+        "ingest_submission",
+        lambda env, message, update_playlist=False: calls.append(
+            (env, message["attributes"]["formId"], update_playlist)
+        ),
+    )
+    pubsub = InProcessPubSub()
+    pubsub.subscribe(TOPIC, main.task_router)
+
+    responses = pubsub.publish_form_response(TOPIC, FORM_ID)
+
+    assert responses[0]["task"] == "ingest_submission"
+    assert calls == [("prod", FORM_ID, False)]
+
+
+def test_router_decodes_task_payloads_from_message_data():
+    data = json.dumps({"task": "set_aotw", "env": "test"}).encode("utf-8")
+    envelope = {"message": {"data": base64.b64encode(data).decode("utf-8")}}
+
+    assert main._parse_event(envelope) == {"task": "set_aotw", "env": "test"}
+
+
+def test_decode_message_data():
+    data = base64.b64encode(b'{"a": 1}').decode("utf-8")
+
+    assert decode_message_data({"data": data}) == {"a": 1}
+    assert decode_message_data({"data": ""}) is None
+    assert decode_message_data({}) is None
@@ -0,0 +1,63 @@
+import io
+import json
+import random
+
+import pytest
+
+from AOTW.logic import json_codec
+
+
+def random_scalar(rng):
+    kind = rng.choice(["int", "float", "exp", "string", "literal"])
+    if kind == "int":
+        return rng.randint(-(10**6), 10**6)
+    if kind == "float":
+        return round(rng.uniform(-1000, 1000), rng.randint(1, 6))
+    if kind == "exp":
+        return float(f"{rng.uniform(-9, 9):.3f}e{rng.randint(-20, 20)}")
+    if kind == "string":
+        return "".join(rng.choice("ab,]\\" " é") for _ in range(rng.randint(0, 6)))
+    return rng.choice([True, False, None])
+
+
+def read_all(data, chunk_size):
+    return list(json_codec.iter_array(io.BytesIO(data), chunk_size))
+
+
+@pytest.mark.parametrize("chunk_size", range(1, 17))
+def test_iter_array_numbers_split_across_chunks(chunk_size):
+    data = b"[-2.5, 1e-7,-0.25E+3 ,10,true,null, 3]"
+    assert read_all(data, chunk_size) == json.loads(data)
+
+
+@pytest.mark.parametrize("chunk_size", range(1, 33))
+def test_iter_array_random_scalars(chunk_size):
+    rng = random.Random(chunk_size)
+    for _ in range(50):
+        items = [random_scalar(rng) for _ in range(rng.randint(0, 8))]
+        separator = rng.choice([",", ", ", " ,\n"])
+        data = ("[" + separator.join(json.dumps(item) for item in items) + "]").encode(
+            "utf-8"
+        )
+        assert read_all(data, chunk_size) == items
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64 * 1024])
+def test_iter_array_nested_items_and_multibyte_text(chunk_size):
+    items = [{"album": "Café Tacvba", "tracks": [1, 2.5]}, [], {}, "日本語", -1]
+    data = json.dumps(items, ensure_ascii=False).encode("utf-8")
+    assert read_all(data, chunk_size) == items
+
+
+def test_iter_array_empty():
+    assert read_all(b" [ ] ", 1) == []
+
+
+def test_iter_array_rejects_non_arrays():
+    with pytest.raises(ValueError):
+        read_all(b'{"a": 1}', 4)
+
+
+def test_iter_array_rejects_truncated_arrays():
+    with pytest.raises(ValueError):
+        read_all(b"[1, 2", 2)
@@ -0,0 +1,119 @@
+import time
+import types
+
+import pytest
+
+from AOTW.logic.album import Album
+from AOTW.logic.communications import GoogleCloudStorage
+from AOTW.logic.config import Env
+from AOTW.logic.playlist_manager import PlaylistManager
+from AOTW.scripts.soak_test import LocalBlob
+
+ALBUM_URI = "spotify:album:aotw"
+TRACK_URIS = [f"spotify:track:{i}" for i in range(250)]
+
+
+class FakeSpotify:
+    """A playlist that appends in chunks and can fail after a number of chunks."""
+
+    def __init__(self, fail_after_chunks=None):
+        self.tracks = []
+        self.snapshot = 0
+        self.fail_after_chunks = fail_after_chunks
+
+    def get_playlist_snapshot_id(self, playlist_id):
+        return f"snapshot-{self.snapshot}"
+
+    def get_playlist_tracks_by_album(self, playlist_id):
+        tracks_by_album = {}
+        for album_uri, track_uri in self.tracks:
+            tracks_by_album.setdefault(album_uri, set()).add(track_uri)
+        return tracks_by_album
+
+    def append_tracks(self, playlist_id, track_uris):
+        for chunk, start in enumerate(range(0, len(track_uris), 100)):
+            if self.fail_after_chunks is not None and chunk >= self.fail_after_chunks:
+                raise ConnectionError("Spotify went away")
+            self.tracks.extend(
+                (ALBUM_URI, uri) for uri in track_uris[start : start + 100]
+            )
+            self.snapshot += 1
+        return f"snapshot-{self.snapshot}"
+
+
+@pytest.fixture
+def manager(local_storage):
+    config = types.SimpleNamespace(env=Env.TEST, archive_playlist_id="archive")
+    return PlaylistManager(config, FakeSpotify())
+
+
+def update(manager):
+    return manager.update_archive_playlist(
+        Album("album", "artist"),
+        staged={"album_uri": ALBUM_URI, "track_uris": TRACK_URIS},
+    )
+
+
+def read_state(manager):
+    return GoogleCloudStorage().read_json(manager.archive_state_blob, cache_ttl=0)
+
+
+def test_appends_an_album_once(manager):
+    assert update(manager) is True
+    assert update(manager) is False
+
+    assert [uri for _, uri in manager.spotify_client.tracks] == TRACK_URIS
+    state = read_state(manager)
+    assert state["albums"] == [ALBUM_URI]
+    assert state["pending"] == {}
+    assert state["snapshot_id"] == "snapshot-3"
+
+
+def test_failed_chunk_is_not_recorded_and_resumes(manager):
+    manager.spotify_client.fail_after_chunks = 1
+    with pytest.raises(ConnectionError):
+        update(manager)
+
+    state = read_state(manager)
+    assert state["albums"] == []
+    assert state["pending"] == {ALBUM_URI: None}
+
+    manager.spotify_client.fail_after_chunks = None
+    assert update(manager) is True
+    assert [uri for _, uri in manager.spotify_client.tracks] == TRACK_URIS
+    assert read_state(manager)["albums"] == [ALBUM_URI]
+
+
+def test_album_claimed_by_another_run_is_skipped(manager):
+    GoogleCloudStorage().write_to_json(
+        {
+            "snapshot_id": "snapshot-0",
+            "albums": [],
+            "pending": {ALBUM_URI: time.time()},
+        },
+        manager.archive_state_blob,
+    )
+
+    assert update(manager) is False
+    assert manager.spotify_client.tracks == []
+
+
+def test_a_normal_week_reads_the_state_once(manager, monkeypatch):
+    update(manager)
+    calls = []
+    for name in ("download_as_bytes", "upload_from_string"):
+        method = getattr(LocalBlob, name)
+
+        def counted(self, *args, _method=method, _name=name, **kwargs):
+            if self.name == manager.archive_state_blob:
+                calls.append(_name)
+            return _method(self, *args, **kwargs)
+
+        monkeypatch.setattr(LocalBlob, name, counted)
+
+    assert manager.update_archive_playlist(
+        Album("next album", "artist"),
+        staged={"album_uri": "spotify:album:next", "track_uris": TRACK_URIS[:10]},
+    )
+
+    assert calls == ["download_as_bytes", "upload_from_string", "upload_from_string"]
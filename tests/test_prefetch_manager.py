@@ -0,0 +1,67 @@
+import types
+
+import pytest
+
+from AOTW.logic.album import Album
+from AOTW.logic.communications import GoogleCloudStorage
+from AOTW.logic.config import Env
+from AOTW.logic.prefetch_manager import PrefetchManager
+
+
+class FakePlaylistManager:
+    def resolve_album(self, aotw):
+        return {"album_uri": f"uri:{aotw.album}", "track_uris": []}
+
+
+class FakeEmailManager:
+    def start_fun_facts(self, album, artist):
+        pass
+
+
+@pytest.fixture
+def prefetch_manager(local_storage):
+    config = types.SimpleNamespace(env=Env.TEST)
+    return PrefetchManager(config, FakePlaylistManager(), FakeEmailManager())
+
+
+def pick(submission_id, submitted_at):
+    return Album(
+        album=f"album {submission_id}",
+        artist="artist",
+        week=5,
+        submission_id=submission_id,
+        submitted_at=submitted_at,
+    )
+
+
+def read(blob_name):
+    return GoogleCloudStorage().read_json(blob_name, cache_ttl=0)
+
+
+def test_newer_pick_replaces_the_staged_one(prefetch_manager):
+    older = pick("older", "2024-05-06T17:00:00.000Z")
+    newer = pick("newer", "2024-05-06T18:00:00.000Z")
+
+    prefetch_manager.prefetch(older)
+    prefetch_manager.prefetch(newer)
+
+    assert read(prefetch_manager._pointer_blob(5))["submission_id"] == "newer"
+    assert read(prefetch_manager._staged_blob("older")) is None
+    assert prefetch_manager.get_staged(newer)["album_uri"] == "uri:album newer"
+
+
+def test_slow_prefetch_of_an_older_pick_does_not_replace_a_newer_one(
+    prefetch_manager,
+):
+    older = pick("older", "2024-05-06T17:00:00.000Z")
+    newer = pick("newer", "2024-05-06T18:00:00.000Z")
+
+    prefetch_manager.prefetch(newer)
+    assert prefetch_manager.prefetch(older) is None
+
+    assert read(prefetch_manager._pointer_blob(5)) == {
+        "submission_id": "newer",
+        "submitted_at": "2024-05-06T18:00:00.000Z",
+    }
+    assert read(prefetch_manager._staged_blob("older")) is None
+    assert prefetch_manager.get_staged(newer) is not None
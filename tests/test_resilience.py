@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from AOTW.logic import resilience
+
+
+class ServerError(Exception):
+    status_code = 503
+
+
+@pytest.fixture
+def policy(monkeypatch):
+    policy = resilience.CallPolicy(deadline=1, max_attempts=3, base_delay=0.001)
+    monkeypatch.setitem(resilience.POLICIES, "openai", policy)
+    monkeypatch.setitem(
+        resilience.BREAKERS, "openai", resilience.CircuitBreaker("openai")
+    )
+    return policy
+
+
+def test_call_async_retries_transient_errors(policy):
+    attempts = []
+
+    async def request():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ServerError("busy")
+        return "ok"
+
+    assert asyncio.run(resilience.call_async("openai", request)) == "ok"
+    assert len(attempts) == 3
+
+
+def test_call_async_does_not_retry_other_errors(policy):
+    attempts = []
+
+    async def request():
+        attempts.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        asyncio.run(resilience.call_async("openai", request))
+    assert len(attempts) == 1
+
+
+def test_call_async_enforces_the_deadline(policy):
+    policy.deadline = 0.05
+
+    async def request():
+        await asyncio.sleep(1)
+
+    with pytest.raises(resilience.DeadlineExceeded):
+        asyncio.run(resilience.call_async("openai", request))
+
+
+def test_call_async_fails_fast_when_the_circuit_is_open(policy):
+    for _ in range(resilience.BREAKERS["openai"].failure_threshold):
+        resilience.BREAKERS["openai"].record_failure()
+
+    async def request():
+        return "ok"
+
+    with pytest.raises(resilience.CircuitOpenError):
+        asyncio.run(resilience.call_async("openai", request))
@@ -0,0 +1,70 @@
+import html
+import random
+import re
+from string import Template
+
+import pytest
+
+from AOTW.logic.templates import EmailTemplates, format_fun_facts
+
+
+def format_fun_facts_reference(fun_facts):
+    """The multi-pass formatting format_fun_facts replaced."""
+    fun_facts = html.escape(fun_facts)
+    fun_facts = fun_facts.replace("\n", "<br>")
+    fun_facts = re.sub(r"\\'", "'", fun_facts)
+    fun_facts = re.sub(r"\s{2,}", " ", fun_facts)
+    fun_facts = fun_facts.strip()
+    fun_facts = fun_facts.replace("1.", "<br><br>1.")
+    return re.sub(r"(<br>\s*){3,}", "<br><br>", fun_facts)
+
+
+@pytest.mark.parametrize(
+    "fun_facts, expected",
+    [
+        ("", ""),
+        ("Intro\n1. First\n2. Second", "Intro<br><br>1. First<br>2. Second"),
+        ("  Lots   of\t\tspace  ", "Lots of space"),
+        ("A\n\n\n\nB", "A<br><br>B"),
+        (
+            "Tom & Jerry <3 \"quotes\" 'x'",
+            "Tom &amp; Jerry &lt;3 &quot;quotes&quot; &#x27;x&#x27;",
+        ),
+    ],
+)
+def test_format_fun_facts_examples(fun_facts, expected):
+    assert format_fun_facts(fun_facts) == expected
+
+
+def test_format_fun_facts_matches_the_reference_formatting():
+    alphabet = ["\n", " ", "  ", "\t", "\r", "1", ".", "1.", "a", "'", "\\", "&"]
+    alphabet += ["<", ">", '"', "\u00a0", "\u2003", "\x1c", "\x0b", "<br>", "x1"]
+    rng = random.Random(0)
+    for _ in range(5000):
+        fun_facts = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 14)))
+        assert format_fun_facts(fun_facts) == format_fun_facts_reference(fun_facts)
+
+
+@pytest.fixture
+def default_templates(monkeypatch):
+    monkeypatch.setattr(
+        EmailTemplates,
+        "templates",
+        {name: Template(source) for name, source in EmailTemplates.DEFAULTS.items()},
+    )
+    EmailTemplates.fragment.cache_clear()
+
+
+def test_render_bulk_matches_render(default_templates):
+    per_recipient = [{"chooser_name": "Ann"}, {"chooser_name": "B$b ${c}"}]
+    shared = {"form_link": "https://example.com/$form", "playlist_footer": "$$"}
+
+    assert EmailTemplates.render_bulk("aotw_body", per_recipient, **shared) == [
+        EmailTemplates.render("aotw_body", **values, **shared)
+        for values in per_recipient
+    ]
+
+
+def test_render_raises_for_missing_values(default_templates):
+    with pytest.raises(KeyError):
+        EmailTemplates.render("chosen_subject", album="Album")